@@ -1,17 +1,32 @@
 import os
 import sys
 
-from flask import Flask, request, jsonify, redirect
+from flask import Flask, Response, request, jsonify, redirect
 
 current: str = os.path.dirname(os.path.realpath(__file__))
 parent: str = os.path.dirname(current)
 grandparent: str = os.path.dirname(parent)
 sys.path.append(grandparent)
-from src.processing.run_processing import process_text
+from src.processing.cache import LruSentenceCache, DEFAULT_MEMORY_MAX_ENTRIES
+from src.processing.engine import ArticleEngine
+from src.processing.utils.batch_utils import BatchTooLarge, get_batch_limits, iter_batch_results, parse_documents
 
 app = Flask(__name__)
 app.config['JSON_SORT_KEYS'] = False
 
+# the same sentences are sent again and again, so that results are kept in memory
+memory_cache_bytes: str = os.environ.get('JBTT_MEMORY_CACHE_BYTES')
+engine = ArticleEngine(memory_cache=LruSentenceCache(
+    max_entries=int(os.environ.get('JBTT_MEMORY_CACHE_ENTRIES', DEFAULT_MEMORY_MAX_ENTRIES)),
+    max_bytes=int(memory_cache_bytes) if memory_cache_bytes else None))
+
+# models loaded lazily by nltk are loaded now, not by the first request
+engine.warm_up()
+
+# concurrent requests are checked together, limits are given by JBTT_BATCH_MAX_SIZE and JBTT_BATCH_MAX_WAIT_MS
+if os.environ.get('JBTT_MICRO_BATCHING') == '1':
+    engine.start_micro_batching()
+
 
 @app.route('/')
 def main_page():
@@ -21,11 +36,89 @@ def main_page():
 @app.post('/api/processText')
 def post_process_text():
     """
-    Endpoint to process text e.g. in Postman
+    Endpoint to process text e.g. in Postman.
+    With "withOffsets": true sentences and suggestions get their positions in the text
+    """
+    data = request.json
+    with_offsets: bool = bool(data.get('withOffsets', False))
+    # results depend only on the text and the rules, so that a client sending If-None-Match with the tag
+    # of a text it has already got results for is answered without processing;
+    # 304 is allowed only for GET and HEAD, a POST whose condition fails gets 412 (RFC 9110, 13.1.2)
+    etag: str = engine.get_text_etag(data['text'], with_offsets)
+    if request.if_none_match.contains(etag):
+        response = Response(status=412)
+    else:
+        response = jsonify(engine.process_text(data['text'], with_offsets=with_offsets))
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+@app.post('/api/processDelta')
+def post_process_delta():
+    """
+    Endpoint to check a text when the client keeps results of sentences by hash:
+    body {"text": ..., "known": [hashes]}. Every sentence is given with hash, span and paragraph,
+    text and suggestions are given only for sentences which hashes are not known,
+    so that checking a long document after an edit costs only the changed sentences
     """
     data = request.json
-    result = process_text(data['text'])
-    return jsonify(result)
+    known = data.get('known') or []
+    if not isinstance(known, list):
+        return jsonify({'error': "known must be a list of hashes"}), 400
+    return jsonify({'sentences': engine.process_text_delta(data['text'], known)})
+
+
+@app.post('/api/processBatch')
+def post_process_batch():
+    """
+    Endpoint to process many documents in one request: JSON array or NDJSON (Content-Type: application/x-ndjson)
+    of texts or objects {"id": ..., "text": ...}.
+    Results are streamed as NDJSON, a line for every document as soon as it is checked,
+    or a line for every sentence with ?granularity=sentence. Errors of documents are reported in their lines.
+    Size of body and number of documents are limited by JBTT_BATCH_MAX_BYTES and JBTT_BATCH_MAX_DOCUMENTS
+    """
+    max_bytes, max_documents = get_batch_limits()
+    if request.content_length is not None and request.content_length > max_bytes:
+        return jsonify({'error': f"Batch is larger than {max_bytes} bytes"}), 413
+    body: bytes = request.stream.read(max_bytes + 1)
+    if len(body) > max_bytes:
+        return jsonify({'error': f"Batch is larger than {max_bytes} bytes"}), 413
+    try:
+        documents = parse_documents(body, request.mimetype == 'application/x-ndjson', max_documents)
+    except BatchTooLarge as error:
+        return jsonify({'error': str(error)}), 413
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+    per_sentence: bool = request.args.get('granularity') == 'sentence'
+    with_offsets: bool = request.args.get('withOffsets') == 'true'
+    return Response(iter_batch_results(engine, documents, per_sentence, with_offsets), mimetype='application/x-ndjson')
+
+
+@app.get('/api/cacheStats')
+def get_cache_stats():
+    """
+    Counters of memory cache: hits, misses, evictions, number of sentences and their size in UTF-8 bytes
+    """
+    return jsonify(engine.memory_cache.stats())
+
+
+@app.get('/api/nounGroupStats')
+def get_noun_group_stats():
+    """
+    Counters of noun group cache: hits, misses, hit rate and number of noun groups
+    """
+    return jsonify(engine.preloading.noun_group_cache.stats())
+
+
+@app.get('/api/batchStats')
+def get_batch_stats():
+    """
+    Statistics of micro-batching: sizes of batches and time of requests in queue
+    """
+    if engine.batcher is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(engine.batcher.stats(), enabled=True))
 
 
 @app.get('/alive')
@@ -33,5 +126,23 @@ def get_status():
     return jsonify('Active')
 
 
+@app.get('/ready')
+def get_readiness():
+    """
+    Readiness of the process to check texts: dictionaries and models are loaded and warmed up.
+    503 is returned until then, e.g. by a worker of server.py which is being started
+    """
+    preloading = engine.preloading
+    ready: bool = engine.is_ready()
+    return jsonify({
+        'ready': ready,
+        'pid': os.getpid(),
+        'neBackend': preloading.ne_backend,
+        'taggerBackend': preloading.tagger_backend,
+        'fingerprint': preloading.fingerprint
+    }), 200 if ready else 503
+
+
 if __name__ == '__main__':
-    app.run()
+    # the engine is safe to share by threads, see ArticleEngine
+    app.run(threaded=True)
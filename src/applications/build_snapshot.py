@@ -0,0 +1,27 @@
+import os
+import sys
+
+import click
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+grandparent = os.path.dirname(parent)
+sys.path.append(grandparent)
+
+from src.processing.utils.load_utils import build_snapshot, download_nltk_modules
+
+
+@click.command()
+@click.option('--output', help='Snapshot file, JBTT_SNAPSHOT_PATH or resources/jbtt.snapshot by default')
+def build(output: str):
+    """
+    Compiles dictionaries, grammar, Punkt model and weights of POS tagger into snapshot loaded at startup
+    python src/applications/build_snapshot.py
+    """
+    download_nltk_modules()
+    path: str = build_snapshot(output)
+    click.secho(f"Snapshot is written to {os.path.abspath(path)}", fg='green')
+
+
+if __name__ == '__main__':
+    build()
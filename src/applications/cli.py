@@ -1,6 +1,6 @@
 import os
 import sys
-from typing import IO
+from typing import IO, Iterable
 
 import click
 
@@ -9,37 +9,58 @@ parent = os.path.dirname(current)
 grandparent = os.path.dirname(parent)
 sys.path.append(grandparent)
 
-from src.processing.run_processing import process_text
+from src.processing.engine import ArticleEngine
+from src.processing.models.dtos import SentenceDto
+from src.processing.named_entities import NE_BACKENDS
+from src.processing.tagger import TAGGER_BACKENDS
+from src.processing.utils.load_utils import load_preloading
 
 
 @click.command()
 @click.option('--text', help='')
 @click.option('--input_file', type=click.File('r', encoding='utf-8'))
-def cli_text(text: str, input_file: IO):
+@click.option('--workers', type=click.IntRange(min=1), default=1, help='Number of processes to check sentences')
+@click.option('--ne_backend', type=click.Choice(NE_BACKENDS),
+              help='Backend of Named Entity recognition, JBTT_NE_BACKEND or maxent by default')
+@click.option('--tagger_backend', type=click.Choice(TAGGER_BACKENDS),
+              help='Backend of POS tagging, JBTT_TAGGER_BACKEND by default, otherwise numpy if snapshot has its weights or nltk')
+def cli_text(text: str, input_file: IO, workers: int, ne_backend: str, tagger_backend: str):
     """
     Cli app to run processing from terminal
     python src/applications/cli.py --text="It’s beautiful city. He is actor."
     python src/applications/cli.py --input_file=resources/moby_dick
+    python src/applications/cli.py --input_file=resources/moby_dick --workers=4
+    python src/applications/cli.py --input_file=resources/moby_dick --ne_backend=rules
+    python src/applications/cli.py --input_file=resources/moby_dick --tagger_backend=numpy
     """
-    if input_file:
-        text: str = input_file.read()
-    answer = process_text(text, True)
-
-    for results in answer:
-        sentence = results['text']
-        if not results['suggestions']:
-            if sentence.strip() != "":
-                click.secho(f"Sentence '{sentence}' is completely fine!", fg='green')
+    with ArticleEngine(load_preloading(ne_backend, tagger_backend)) as engine:
+        if input_file:
+            answer: Iterable[SentenceDto] = engine.iter_process_text(input_file, True, workers)
         else:
-            click.secho(f"Can suggest improvements for '{sentence}'", fg='blue')
-            for suggestion in results['suggestions']:
-                click.secho(f"Cause: '{suggestion['cause']}'", fg='blue')
-                click.secho(sentence[0:suggestion['start']], nl=False)
-                click.secho(sentence[suggestion['start']:suggestion['end']], fg='red', nl=False)
-                click.secho(sentence[suggestion['end']:-1])
-                click.secho(f"Suggestions: ", nl=False)
-                click.secho("; ".join(suggestion['replacements']), fg='green')
-            click.echo('\n')
+            answer = engine.process_text(text, True, workers)
+
+        for results in answer:
+            print_results(results)
+
+
+def print_results(results: SentenceDto):
+    """
+    Prints suggestions for one sentence
+    """
+    sentence = results['text']
+    if not results['suggestions']:
+        if sentence.strip() != "":
+            click.secho(f"Sentence '{sentence}' is completely fine!", fg='green')
+    else:
+        click.secho(f"Can suggest improvements for '{sentence}'", fg='blue')
+        for suggestion in results['suggestions']:
+            click.secho(f"Cause: '{suggestion['cause']}'", fg='blue')
+            click.secho(sentence[0:suggestion['start']], nl=False)
+            click.secho(sentence[suggestion['start']:suggestion['end']], fg='red', nl=False)
+            click.secho(sentence[suggestion['end']:-1])
+            click.secho(f"Suggestions: ", nl=False)
+            click.secho("; ".join(suggestion['replacements']), fg='green')
+        click.echo('\n')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,42 @@
+import os
+import sys
+from itertools import islice
+from typing import IO, Dict, List, Tuple
+
+import click
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+grandparent = os.path.dirname(parent)
+sys.path.append(grandparent)
+
+from src.processing.models.Preloading import Preloading
+from src.processing.named_entities import compare_backends
+from src.processing.preprocessing import pos_tagging_sents
+from src.processing.utils.load_utils import load_preloading, load_gazetteer
+from src.processing.utils.preprocessing_utils import iter_sentence_tokens
+
+
+@click.command()
+@click.option('--input_file', type=click.File('r', encoding='utf-8'), required=True)
+@click.option('--sentences', type=click.IntRange(min=1), default=5000, help='Number of sentences to compare on')
+def compare_ne(input_file: IO, sentences: int):
+    """
+    Compares backends of Named Entity recognition on the same corpus:
+    agreement of rules with nltk.ne_chunk and throughput of both
+    python src/applications/compare_ne.py --input_file=resources/moby_dick --sentences=2000
+    """
+    preloading: Preloading = load_preloading()
+    phrases: List[str] = [phrase for phrase in islice(iter_sentence_tokens(input_file), sentences) if phrase]
+    tagged_sentences: List[List[Tuple[str, str]]] = [tags for tags, _ in pos_tagging_sents(phrases, preloading)]
+    report: Dict[str, float] = compare_backends(tagged_sentences, load_gazetteer())
+
+    click.echo(f"Sentences: {report['sentences']}, tokens: {report['tokens']}")
+    click.echo(f"Agreement with nltk.ne_chunk: {report['agreement']:.2%} "
+               f"(precision {report['precision']:.2%}, recall {report['recall']:.2%})")
+    click.echo(f"maxent: {report['maxent_sentences_per_second']:.0f} sentences/s")
+    click.echo(f"rules: {report['rules_sentences_per_second']:.0f} sentences/s")
+
+
+if __name__ == '__main__':
+    compare_ne()
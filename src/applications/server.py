@@ -0,0 +1,205 @@
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Callable, List, Set
+
+import click
+from werkzeug.serving import BaseWSGIServer, make_server
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+grandparent = os.path.dirname(parent)
+sys.path.append(grandparent)
+
+# seconds a worker waits for a connection before it checks whether it is asked to stop
+POLL_INTERVAL: float = 0.5
+
+# seconds workers are given to finish their requests on shutdown, then they are killed
+GRACEFUL_TIMEOUT: float = 30.0
+
+# seconds the master sleeps between checks of exited workers
+REAP_INTERVAL: float = 0.2
+
+
+class PreforkServer:
+    """
+    Pre-fork server: the master process binds the socket and loads the application once, then forks workers
+
+    Workers inherit the loaded dictionaries and models copy-on-write, so that adding a worker costs
+    neither loading time nor a copy of the models. Objects of the master are moved to the permanent generation
+    of the garbage collector (gc.freeze()) before forking, so that collections in workers do not touch their pages.
+    Every worker accepts connections from the shared socket and handles one request at a time.
+    After max_requests requests a worker finishes its current request and exits, the master forks a new one;
+    a crashed worker is replaced as well. SIGTERM or SIGINT stops the master: workers finish their requests
+    and exit, those which do not manage it in GRACEFUL_TIMEOUT are killed
+    """
+    def __init__(self, app: Callable, host: str = '127.0.0.1', port: int = 5000, workers: int = 2,
+                 max_requests: int = 0, on_worker_start: Callable[[], None] = None):
+        """
+        :argument
+        app -- WSGI application, loaded before forking
+
+        :argument
+        workers -- number of worker processes
+
+        :argument
+        max_requests -- number of requests after which a worker is recycled, 0 means never
+
+        :argument
+        on_worker_start -- called in every worker after fork, e.g. to start threads which are not inherited
+        """
+        self.app: Callable = app
+        self.host: str = host
+        self.port: int = port
+        self.workers: int = workers
+        self.max_requests: int = max_requests
+        self.on_worker_start: Callable[[], None] = on_worker_start
+        self.socket: socket.socket = None
+        self.children: Set[int] = set()
+        self.stopping: bool = False
+
+    def bind(self) -> int:
+        """
+        Opens the listening socket shared by workers
+
+        :returns
+        bound port, useful if port 0 was asked for
+        """
+        self.socket = socket.create_server((self.host, self.port), backlog=128)
+        # workers wait for connections together, the one which is late must not block in accept()
+        self.socket.setblocking(False)
+        self.port = self.socket.getsockname()[1]
+        return self.port
+
+    def serve(self):
+        """ Forks workers and keeps their number until stopped by SIGTERM or SIGINT """
+        if self.socket is None:
+            self.bind()
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        gc.freeze()
+        try:
+            for _ in range(self.workers):
+                self.spawn_worker()
+            while not self.stopping:
+                self.reap_workers()
+                for _ in range(self.workers - len(self.children)):
+                    self.spawn_worker()
+                time.sleep(REAP_INTERVAL)
+        finally:
+            self.stop_workers()
+            self.socket.close()
+
+    def handle_stop(self, signum, frame):
+        self.stopping = True
+
+    def spawn_worker(self) -> int:
+        """
+        :returns
+        pid of the forked worker
+        """
+        pid: int = os.fork()
+        if pid == 0:
+            code: int = 0
+            try:
+                self.run_worker()
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self.children.add(pid)
+        return pid
+
+    def reap_workers(self) -> List[int]:
+        """
+        :returns
+        pids of workers which have exited since the previous call
+        """
+        exited: List[int] = []
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if pid in self.children:
+                self.children.remove(pid)
+                exited.append(pid)
+                code: int = os.waitstatus_to_exitcode(status)
+                if code != 0 and not self.stopping:
+                    click.secho(f"Worker {pid} exited with code {code}, starting a new one", fg='red', err=True)
+        return exited
+
+    def stop_workers(self):
+        """ Asks workers to finish their requests, kills those which are still running after GRACEFUL_TIMEOUT """
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+        deadline: float = time.monotonic() + GRACEFUL_TIMEOUT
+        while self.children and time.monotonic() < deadline:
+            self.reap_workers()
+            time.sleep(REAP_INTERVAL / 10)
+        for pid in list(self.children):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.children.remove(pid)
+
+    def run_worker(self):
+        """ Loop of a worker process: handles requests until it is stopped, recycled or the master is gone """
+        master: int = os.getppid()
+        stopping: List[int] = []
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        if self.on_worker_start is not None:
+            self.on_worker_start()
+        handled: List[int] = []
+
+        def counting_app(environ, start_response):
+            handled.append(1)
+            return self.app(environ, start_response)
+
+        server: BaseWSGIServer = make_server(self.host, self.port, counting_app, fd=self.socket.fileno())
+        server.socket.setblocking(False)
+        server.timeout = POLL_INTERVAL
+        while not stopping and os.getppid() == master and \
+                (not self.max_requests or len(handled) < self.max_requests):
+            server.handle_request()
+        server.server_close()
+
+
+@click.command()
+@click.option('--host', default='127.0.0.1', help='Address to listen on')
+@click.option('--port', type=int, default=5000, help='Port to listen on')
+@click.option('--workers', type=click.IntRange(min=1), default=os.cpu_count() or 1,
+              help='Number of worker processes, number of CPUs by default')
+@click.option('--max_requests', type=click.IntRange(min=0), default=0,
+              help='Number of requests after which a worker is replaced by a new one, 0 means never')
+def serve(host: str, port: int, workers: int, max_requests: int):
+    """
+    Production server: dictionaries and models are loaded once and shared by forked workers
+    python src/applications/server.py --workers=4 --max_requests=10000
+    """
+    # the application is imported here, so that dictionaries and models are loaded by the master only
+    from src.applications.app import app, engine
+
+    # the scheduler thread of micro-batching is not inherited by fork, every worker starts its own one
+    micro_batching: bool = engine.batcher is not None
+    engine.stop_micro_batching()
+
+    def on_worker_start():
+        if micro_batching:
+            engine.start_micro_batching()
+
+    server = PreforkServer(app, host, port, workers, max_requests, on_worker_start)
+    server.bind()
+    click.secho(f"Master {os.getpid()} is serving on http://{host}:{server.port} with {workers} workers", fg='green')
+    server.serve()
+
+
+if __name__ == '__main__':
+    serve()
@@ -0,0 +1,175 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List
+
+from src.processing.models.dtos import SentenceDto
+
+# maximum number of sentences checked together, see MicroBatcher
+DEFAULT_BATCH_MAX_SIZE: int = 64
+
+# maximum time in seconds the first request of a batch waits for others
+DEFAULT_BATCH_MAX_WAIT: float = 0.005
+
+# number of the latest batches statistics of queue time are computed by
+STATS_WINDOW: int = 10_000
+
+
+def get_batching_config() -> (int, float):
+    """
+    Limits of micro-batching: JBTT_BATCH_MAX_SIZE (sentences) and JBTT_BATCH_MAX_WAIT_MS (milliseconds)
+    environment variables if set, otherwise the defaults
+
+    :returns
+    maximum number of sentences in a batch and maximum wait in seconds
+    """
+    max_batch_size: str = os.environ.get('JBTT_BATCH_MAX_SIZE')
+    max_wait_ms: str = os.environ.get('JBTT_BATCH_MAX_WAIT_MS')
+    return int(max_batch_size) if max_batch_size else DEFAULT_BATCH_MAX_SIZE, \
+        float(max_wait_ms) / 1000 if max_wait_ms else DEFAULT_BATCH_MAX_WAIT
+
+
+class PendingRequest:
+    """ Sentences of one request waiting in the queue of MicroBatcher """
+    __slots__ = ('phrases', 'future', 'enqueued')
+
+    def __init__(self, phrases: List[str]):
+        self.phrases: List[str] = phrases
+        self.future: Future = Future()
+        self.enqueued: float = time.monotonic()
+
+
+class MicroBatcher:
+    """
+    Scheduler which checks sentences of concurrent requests together
+
+    Requests are put into a queue, one thread takes them out: the first request waits at most max_wait
+    for others, a batch is closed earlier if it has max_batch_size sentences. Sentences of the batch are checked
+    by one call, so that POS tagging and chunking are made in one batched pass (see run_processing.check_sentences()),
+    then every request gets its own results. A request is never split between batches
+    """
+    def __init__(self, process: Callable[[List[str]], List[SentenceDto]], max_batch_size: int = None,
+                 max_wait: float = None):
+        """
+        :argument
+        process -- function checking a list of sentences, e.g. run_processing.process_sentences()
+
+        :argument
+        max_batch_size -- maximum number of sentences in a batch, see get_batching_config()
+
+        :argument
+        max_wait -- maximum time in seconds to collect a batch, see get_batching_config()
+        """
+        default_max_batch_size, default_max_wait = get_batching_config()
+        self.process: Callable[[List[str]], List[SentenceDto]] = process
+        self.max_batch_size: int = max_batch_size if max_batch_size is not None else default_max_batch_size
+        self.max_wait: float = max_wait if max_wait is not None else default_max_wait
+        self.queue: queue.Queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.batches: int = 0
+        self.requests: int = 0
+        self.sentences: int = 0
+        self.largest_batch: int = 0
+        self.queue_times: Deque[float] = deque(maxlen=STATS_WINDOW)
+        self.closed: bool = False
+        self.thread = threading.Thread(target=self.run, name='micro-batcher', daemon=True)
+        self.thread.start()
+
+    def submit(self, phrases: List[str]) -> Future:
+        """
+        :argument
+        phrases -- sentences of one request
+
+        :returns
+        future of results for every sentence in the same order
+        """
+        if self.closed:
+            raise RuntimeError("Micro-batcher is closed")
+        request = PendingRequest(phrases)
+        self.queue.put(request)
+        return request.future
+
+    def process_sentences(self, phrases: List[str]) -> List[SentenceDto]:
+        """
+        Checks sentences of one request together with concurrent ones, waits for the results
+        """
+        if not phrases:
+            return []
+        return self.submit(phrases).result()
+
+    def run(self):
+        """ Loop of the scheduler thread: collects batches and checks them until closed """
+        while True:
+            request: PendingRequest = self.queue.get()
+            if request is None:
+                return
+            batch: List[PendingRequest] = [request]
+            size: int = len(request.phrases)
+            deadline: float = request.enqueued + self.max_wait
+            closing: bool = False
+            while size < self.max_batch_size:
+                timeout: float = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    closing = True
+                    break
+                batch.append(request)
+                size += len(request.phrases)
+            self.process_batch(batch)
+            if closing:
+                return
+
+    def process_batch(self, batch: List[PendingRequest]):
+        """ Checks sentences of all requests of the batch by one call and gives every request its results """
+        started: float = time.monotonic()
+        phrases: List[str] = [phrase for request in batch for phrase in request.phrases]
+        with self.lock:
+            self.batches += 1
+            self.requests += len(batch)
+            self.sentences += len(phrases)
+            self.largest_batch = max(self.largest_batch, len(phrases))
+            self.queue_times.extend(started - request.enqueued for request in batch)
+        try:
+            results: List[SentenceDto] = self.process(phrases)
+        except Exception as error:
+            for request in batch:
+                request.future.set_exception(error)
+            return
+        start: int = 0
+        for request in batch:
+            request.future.set_result(results[start:start + len(request.phrases)])
+            start += len(request.phrases)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        :returns
+        limits, counters of batches, requests and sentences, mean and the largest size of batch,
+        mean and 99th percentile of time in queue (milliseconds) for the latest requests
+        """
+        with self.lock:
+            queue_times: List[float] = sorted(self.queue_times)
+            return {
+                'maxBatchSize': self.max_batch_size,
+                'maxWaitMs': self.max_wait * 1000,
+                'batches': self.batches,
+                'requests': self.requests,
+                'sentences': self.sentences,
+                'meanBatchSize': self.sentences / self.batches if self.batches else 0.0,
+                'largestBatch': self.largest_batch,
+                'meanQueueMs': sum(queue_times) / len(queue_times) * 1000 if queue_times else 0.0,
+                'p99QueueMs': queue_times[int(len(queue_times) * 0.99)] * 1000 if queue_times else 0.0
+            }
+
+    def close(self):
+        """ Stops the scheduler thread after the requests already in the queue """
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
@@ -0,0 +1,424 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.processing.models.NounGroupOutcome import NounGroupOutcome
+from src.processing.models.dtos import SentenceDto
+
+# maximum number of sentences kept in persistent cache, the least recently used ones are evicted
+DEFAULT_MAX_ENTRIES: int = 1_000_000
+
+# maximum number of sentences kept in memory by default, see LruSentenceCache
+DEFAULT_MEMORY_MAX_ENTRIES: int = 100_000
+
+# maximum number of noun groups kept in memory by default, see NounGroupCache
+DEFAULT_NOUN_GROUP_MAX_ENTRIES: int = 50_000
+
+# sqlite limits number of parameters in one query
+QUERY_CHUNK_SIZE: int = 500
+
+# share of maximum number of sentences left in persistent cache by eviction, so that it is not run on every insert
+EVICTION_RATIO: float = 0.9
+
+# seconds after which a found sentence is marked as recently used again, see SqliteSentenceCache.touch()
+TOUCH_INTERVAL: float = 60.0
+
+# number of sentences marked as recently used which are written without waiting for the next put_many()
+TOUCH_BUFFER_SIZE: int = 10_000
+
+
+def get_default_cache_path() -> str:
+    """
+    Location of persistent cache: JBTT_CACHE_PATH environment variable if set,
+    otherwise jbtt/sentences.sqlite3 in user's cache directory (XDG_CACHE_HOME or ~/.cache)
+
+    :returns
+    path to the database file
+    """
+    path: str = os.environ.get('JBTT_CACHE_PATH')
+    if path:
+        return path
+    cache_home: str = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'jbtt', 'sentences.sqlite3')
+
+
+class SentenceCache(ABC):
+    """
+    Cache of processed sentences: sentence text -> SentenceDto
+
+    Results are kept separately in namespaces, the namespace is a fingerprint of dictionaries, grammar, rules
+    and nltk models (see load_utils.get_fingerprint()), so that results of other versions are never returned.
+    Subclasses implement get_many() and put_many()
+    """
+    def get(self, phrase: str, namespace: str = '') -> SentenceDto:
+        """
+        :returns
+        cached result for sentence or None
+        """
+        return self.get_many([phrase], namespace).get(phrase)
+
+    def put(self, phrase: str, result: SentenceDto, namespace: str = ''):
+        """ Adds result for sentence to cache """
+        self.put_many({phrase: result}, namespace)
+
+    @abstractmethod
+    def get_many(self, phrases: Iterable[str], namespace: str = '') -> Dict[str, SentenceDto]:
+        """
+        :returns
+        dictionary sentence -> cached result, only for sentences found in cache
+        """
+
+    @abstractmethod
+    def put_many(self, results: Dict[str, SentenceDto], namespace: str = ''):
+        """ Adds results for several sentences, results is a dictionary sentence -> result """
+
+
+def get_entry_size(phrase: str, result: str) -> int:
+    """
+    :argument
+    phrase -- cached sentence
+
+    :argument
+    result -- serialized result, JSON escapes all non-ASCII characters
+
+    :returns
+    size of the sentence and the result in UTF-8 bytes
+    """
+    return len(phrase.encode('utf-8')) + len(result)
+
+
+class LruSentenceCache(SentenceCache):
+    """
+    In-memory cache of processed sentences with the least recently used eviction
+
+    Size is bounded by number of sentences and optionally by bytes of cached text and results, see get_entry_size().
+    Results are kept serialized, so that every get returns a new object and callers cannot change cached ones.
+    """
+    def __init__(self, max_entries: int = DEFAULT_MEMORY_MAX_ENTRIES, max_bytes: int = None):
+        self.max_entries: int = max_entries
+        self.max_bytes: int = max_bytes
+        self.entries: OrderedDict = OrderedDict()
+        self.bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.lock = threading.Lock()
+
+    def get_many(self, phrases: Iterable[str], namespace: str = '') -> Dict[str, SentenceDto]:
+        found: Dict[str, str] = {}
+        with self.lock:
+            for phrase in phrases:
+                result: str = self.entries.get((namespace, phrase))
+                if result is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    self.entries.move_to_end((namespace, phrase))
+                    found[phrase] = result
+        return {phrase: json.loads(result) for phrase, result in found.items()}
+
+    def put_many(self, results: Dict[str, SentenceDto], namespace: str = ''):
+        serialized: Dict[str, str] = {phrase: json.dumps(result) for phrase, result in results.items()}
+        with self.lock:
+            for phrase, result in serialized.items():
+                previous: str = self.entries.pop((namespace, phrase), None)
+                if previous is not None:
+                    self.bytes -= get_entry_size(phrase, previous)
+                self.entries[(namespace, phrase)] = result
+                self.bytes += get_entry_size(phrase, result)
+            while self.entries and (len(self.entries) > self.max_entries or
+                                    (self.max_bytes is not None and self.bytes > self.max_bytes)):
+                (_, phrase), result = self.entries.popitem(last=False)
+                self.bytes -= get_entry_size(phrase, result)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        :returns
+        counters of hits, misses and evictions, current number of sentences and bytes
+        """
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.bytes
+            }
+
+    def clear(self):
+        """ Removes all sentences, counters are kept """
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class NounGroupCache:
+    """
+    In-memory cache of resolved noun groups with the least recently used eviction:
+    (label, (word, ...), (tag, ...)) -> NounGroupOutcome
+
+    The same noun groups recur in different sentences and texts, so that they are resolved once.
+    Outcomes are immutable and can be shared
+    """
+    def __init__(self, max_entries: int = DEFAULT_NOUN_GROUP_MAX_ENTRIES):
+        self.max_entries: int = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[NounGroupOutcome]:
+        """
+        :returns
+        cached outcome for noun group or None
+        """
+        with self.lock:
+            outcome: NounGroupOutcome = self.entries.get(key)
+            if outcome is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return outcome
+
+    def put(self, key: Tuple, outcome: NounGroupOutcome):
+        """ Adds outcome for noun group """
+        with self.lock:
+            self.entries[key] = outcome
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        :returns
+        counters of hits and misses, hit rate and current number of noun groups
+        """
+        with self.lock:
+            requests: int = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': self.hits / requests if requests else 0.0,
+                'entries': len(self.entries)
+            }
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class TieredSentenceCache(SentenceCache):
+    """ Two caches one after another, e.g. LruSentenceCache in front of SqliteSentenceCache """
+    def __init__(self, first: SentenceCache, second: SentenceCache):
+        self.first: SentenceCache = first
+        self.second: SentenceCache = second
+
+    def get_many(self, phrases: Iterable[str], namespace: str = '') -> Dict[str, SentenceDto]:
+        phrases: List[str] = list(phrases)
+        found: Dict[str, SentenceDto] = self.first.get_many(phrases, namespace)
+        found_in_second: Dict[str, SentenceDto] = self.second.get_many(
+            [phrase for phrase in phrases if phrase not in found], namespace)
+        self.first.put_many(found_in_second, namespace)
+        found.update(found_in_second)
+        return found
+
+    def put_many(self, results: Dict[str, SentenceDto], namespace: str = ''):
+        self.first.put_many(results, namespace)
+        self.second.put_many(results, namespace)
+
+
+class SqliteSentenceCache(SentenceCache):
+    """
+    Persistent cache of processed sentences in sqlite database
+
+    Every sentence is looked up and inserted separately, new results are committed atomically,
+    several processes can read and write the same database at the same time (write-ahead log).
+    Lookups do not write: time of use of found sentences is buffered and written with the next insert.
+    Number of sentences is limited, the least recently used ones are evicted,
+    so that results of outdated namespaces are removed by time without any purge.
+    The number is estimated by inserts of this process and counted only when the estimate exceeds the limit,
+    then the cache is shrunk to EVICTION_RATIO of the limit.
+    The connection is shared by threads, every call holds the lock of the cache.
+    """
+    def __init__(self, path: str = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path: str = path if path is not None else get_default_cache_path()
+        self.max_entries: int = max_entries
+        directory: str = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # transactions are managed explicitly, see put_many()
+        self.connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        # statements and transactions of threads must not interleave on the shared connection
+        self.lock = threading.RLock()
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS results (namespace TEXT NOT NULL, text TEXT NOT NULL, '
+                                'result TEXT NOT NULL, used REAL NOT NULL, PRIMARY KEY (namespace, text))')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used)')
+        # upper bound of number of sentences, counted on the first insert, see put_many()
+        self.estimated_entries: Optional[int] = None
+        # (namespace, sentence) -> time of use not written yet, see touch()
+        self.touched: Dict[Tuple[str, str], float] = {}
+
+    def get_many(self, phrases: Iterable[str], namespace: str = '') -> Dict[str, SentenceDto]:
+        """
+        Looks up several sentences at once, found ones are marked as recently used
+
+        :argument
+        phrases -- sentences to look up
+
+        :argument
+        namespace -- fingerprint of processing, see SentenceCache
+
+        :returns
+        dictionary sentence -> cached result, only for sentences found in cache
+        """
+        phrases: List[str] = list(phrases)
+        found: Dict[str, SentenceDto] = {}
+        stale: List[str] = []
+        now: float = time.time()
+        with self.lock:
+            for start in range(0, len(phrases), QUERY_CHUNK_SIZE):
+                chunk: List[str] = phrases[start:start + QUERY_CHUNK_SIZE]
+                placeholders: str = ', '.join('?' * len(chunk))
+                rows = self.connection.execute(
+                    f"SELECT text, result, used FROM results WHERE namespace = ? AND text IN ({placeholders})",
+                    [namespace] + chunk).fetchall()
+                for text, result, used in rows:
+                    found[text] = json.loads(result)
+                    if now - used > TOUCH_INTERVAL:
+                        stale.append(text)
+            if stale:
+                self.touch(stale, namespace)
+        return found
+
+    def touch(self, phrases: List[str], namespace: str = ''):
+        """
+        Marks sentences as recently used. Time of use is kept in memory and written with the next put_many(),
+        so that lookups of concurrent readers do not wait for the write lock of the database;
+        it is written at once only if TOUCH_BUFFER_SIZE sentences are waiting
+        """
+        now: float = time.time()
+        with self.lock:
+            for phrase in phrases:
+                self.touched[(namespace, phrase)] = now
+            if len(self.touched) >= TOUCH_BUFFER_SIZE:
+                with self.transaction():
+                    self.write_touched()
+
+    def write_touched(self):
+        """ Writes buffered time of use of sentences, must be called inside a transaction """
+        if self.touched:
+            self.connection.executemany('UPDATE results SET used = ? WHERE namespace = ? AND text = ?',
+                                        [(used, namespace, phrase)
+                                         for (namespace, phrase), used in self.touched.items()])
+            self.touched.clear()
+
+    def put_many(self, results: Dict[str, SentenceDto], namespace: str = ''):
+        """
+        Adds results for several sentences in one atomic transaction together with buffered time of use,
+        evicts the least recently used sentences if cache is too big
+
+        :argument
+        results -- dictionary sentence -> result
+
+        :argument
+        namespace -- fingerprint of processing, see SentenceCache
+        """
+        if not results:
+            return
+        now: float = time.time()
+        with self.transaction():
+            self.write_touched()
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO results (namespace, text, result, used) VALUES (?, ?, ?, ?)',
+                [(namespace, phrase, json.dumps(result), now) for phrase, result in results.items()])
+            # replaced sentences and inserts of other processes make the estimate inexact,
+            # the real number is counted only when the estimate is over the limit
+            if self.estimated_entries is None:
+                self.estimated_entries = self.count()
+            else:
+                self.estimated_entries += len(results)
+            if self.estimated_entries > self.max_entries:
+                self.estimated_entries = self.count()
+                excess: int = self.estimated_entries - int(self.max_entries * EVICTION_RATIO)
+                if self.estimated_entries > self.max_entries and excess > 0:
+                    self.connection.execute('DELETE FROM results WHERE rowid IN '
+                                            '(SELECT rowid FROM results ORDER BY used LIMIT ?)', (excess,))
+                    self.estimated_entries -= excess
+
+    def transaction(self):
+        """
+        Context manager of a write transaction, committed on exit or rolled back on error.
+        The lock of the cache is held until the end of the transaction
+        """
+        return Transaction(self.connection, self.lock)
+
+    def clear(self):
+        """ Removes all sentences """
+        with self.transaction():
+            self.touched.clear()
+            self.connection.execute('DELETE FROM results')
+            self.estimated_entries = 0
+
+    def close(self):
+        """ Writes buffered time of use and closes the database """
+        with self.lock:
+            if self.touched:
+                with self.transaction():
+                    self.write_touched()
+            self.connection.close()
+
+    def count(self, namespace: str = None) -> int:
+        """
+        :argument
+        namespace -- only sentences of it are counted, e.g. fingerprint of preloading; all of them if not given
+
+        :returns
+        number of cached sentences, the whole table is scanned
+        """
+        with self.lock:
+            if namespace is None:
+                return self.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            return self.connection.execute('SELECT COUNT(*) FROM results WHERE namespace = ?',
+                                           (namespace,)).fetchone()[0]
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class Transaction:
+    """ Write transaction of sqlite connection in autocommit mode """
+    def __init__(self, connection: sqlite3.Connection, lock=None):
+        self.connection = connection
+        self.lock = lock if lock is not None else threading.RLock()
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            # take the write lock at once, so that concurrent writers wait for each other instead of failing
+            self.connection.execute('BEGIN IMMEDIATE')
+        except BaseException:
+            self.lock.release()
+            raise
+        return self.connection
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self.connection.execute('COMMIT' if exc_type is None else 'ROLLBACK')
+        finally:
+            self.lock.release()
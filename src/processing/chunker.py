@@ -0,0 +1,254 @@
+import re
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+
+from nltk import Tree
+
+# id of every tag which is not mentioned in grammar and of tokens already chunked by previous rules
+OTHER_TAG_ID: int = 0
+
+# id of the state without any alive thread
+DEAD_STATE: int = -1
+
+RULE_PATTERN = re.compile(r'^\s*(?P<label>[^\s:]+)\s*:\s*\{(?P<pattern>.*)\}\s*$')
+ATOM_PATTERN = re.compile(r'<(?P<tags>[^<>{}]+)>(?P<quantifier>[?*+]?)')
+
+
+class ChunkRule:
+    """
+    One rule of grammar compiled into deterministic automaton over tag ids
+
+    States of the automaton are lists of states of the rule's NFA ordered by priority, the same way as
+    a backtracking regular expression tries them, so that it finds exactly the same chunks as nltk.RegexpParser
+    """
+    def __init__(self, label: str, table: List[List[int]], accepting: List[bool], first: FrozenSet[int]):
+        self.label = label
+        self.table = table
+        self.accepting = accepting
+        self.first = first
+
+    def match(self, ids: Sequence[int], start: int) -> int:
+        """
+        Matches the rule from start position
+
+        :argument
+        ids -- tag ids of the sentence
+
+        :argument
+        start -- position to start from
+
+        :returns
+        end position of the chunk (exclusive) or start, if the rule does not match
+        """
+        table: List[List[int]] = self.table
+        accepting: List[bool] = self.accepting
+        state: int = 0
+        end: int = start
+        for index in range(start, len(ids)):
+            state = table[state][ids[index]]
+            if state == DEAD_STATE:
+                break
+            # a match of the state has higher priority than previous ones
+            if accepting[state]:
+                end = index + 1
+        return end
+
+
+class FiniteStateChunker:
+    """
+    Chunker of grammar consisting of rules of type LABEL: {<TAG|TAG>?<TAG>*<TAG>+}
+
+    Grammar is compiled once, every sentence is chunked by one pass of every rule, see ChunkRule.
+    Rules are applied one after another, tokens chunked by a rule are not available for the next ones,
+    like in nltk.RegexpParser with the same grammar
+    """
+    def __init__(self, grammar: str, root_label: str = 'S'):
+        self.root_label = root_label
+        self.tag_ids: Dict[str, int] = {}
+        parsed_rules: List[Tuple[str, List[Tuple[FrozenSet[int], str]]]] = [
+            self.parse_rule(line) for line in grammar.splitlines() if line.strip()
+        ]
+        alphabet_size: int = len(self.tag_ids) + 1
+        self.rules: List[ChunkRule] = [compile_rule(label, atoms, alphabet_size) for label, atoms in parsed_rules]
+
+    @classmethod
+    def from_tables(cls, tables: tuple) -> 'FiniteStateChunker':
+        """
+        :argument
+        tables -- compiled grammar, see to_tables()
+
+        :returns
+        chunker without compiling the grammar again
+        """
+        root_label, tag_ids, rules = tables
+        chunker: FiniteStateChunker = cls.__new__(cls)
+        chunker.root_label = root_label
+        chunker.tag_ids = dict(tag_ids)
+        chunker.rules = [ChunkRule(label, [list(row) for row in table], list(accepting), frozenset(first))
+                         for label, table, accepting, first in rules]
+        return chunker
+
+    def to_tables(self) -> tuple:
+        """
+        :returns
+        compiled grammar of builtin types only, so that it can be serialized by marshal
+        """
+        return self.root_label, dict(self.tag_ids), [
+            (rule.label, [tuple(row) for row in rule.table], tuple(rule.accepting), tuple(sorted(rule.first)))
+            for rule in self.rules
+        ]
+
+    def parse_rule(self, line: str) -> Tuple[str, List[Tuple[FrozenSet[int], str]]]:
+        """
+        Parses one line of grammar, registering its tags
+
+        :returns
+        label and list of atoms: set of tag ids and quantifier
+        """
+        rule = RULE_PATTERN.match(line)
+        if not rule:
+            raise ValueError(f"Unsupported grammar rule: {line!r}")
+        pattern: str = re.sub(r'\s', '', rule.group('pattern'))
+        atoms: List[Tuple[FrozenSet[int], str]] = []
+        position: int = 0
+        while position < len(pattern):
+            atom = ATOM_PATTERN.match(pattern, position)
+            if not atom:
+                raise ValueError(f"Unsupported tag pattern: {pattern!r}")
+            tags: List[str] = [tag.replace('\\', '') for tag in atom.group('tags').split('|')]
+            atoms.append((frozenset(self.tag_ids.setdefault(tag, len(self.tag_ids) + 1) for tag in tags),
+                          atom.group('quantifier')))
+            position = atom.end()
+        return rule.group('label'), atoms
+
+    def get_ids(self, tokens: Sequence[tuple]) -> List[int]:
+        """
+        :returns
+        tag ids of tagged tokens
+        """
+        tag_ids: Dict[str, int] = self.tag_ids
+        return [tag_ids.get(token[1], OTHER_TAG_ID) for token in tokens]
+
+    def chunk(self, ids: List[int]) -> List[Tuple[int, int, str]]:
+        """
+        Finds chunks of all rules, changes ids of chunked tokens to OTHER_TAG_ID
+
+        :argument
+        ids -- tag ids of a sentence
+
+        :returns
+        list of chunks (start, end, label) ordered by start
+        """
+        chunks: List[Tuple[int, int, str]] = []
+        length: int = len(ids)
+        for rule in self.rules:
+            first: FrozenSet[int] = rule.first
+            start: int = 0
+            while start < length:
+                if ids[start] in first:
+                    end: int = rule.match(ids, start)
+                    if end > start:
+                        chunks.append((start, end, rule.label))
+                        ids[start:end] = [OTHER_TAG_ID] * (end - start)
+                        start = end
+                        continue
+                start += 1
+        chunks.sort()
+        return chunks
+
+    def parse(self, tokens: Sequence[tuple]) -> Tree:
+        """
+        Chunks a tagged sentence
+
+        :argument
+        tokens -- tagged tokens, tag is the second element of every token
+
+        :returns
+        tree with chunks as subtrees, the same as nltk.RegexpParser gives
+        """
+        children: list = []
+        position: int = 0
+        for start, end, label in self.chunk(self.get_ids(tokens)):
+            children += tokens[position:start]
+            children.append(Tree(label, list(tokens[start:end])))
+            position = end
+        children += tokens[position:]
+        return Tree(self.root_label, children)
+
+
+def compile_rule(label: str, atoms: List[Tuple[FrozenSet[int], str]], alphabet_size: int) -> ChunkRule:
+    """
+    Compiles a rule into deterministic automaton
+
+    :argument
+    label -- label of chunks
+
+    :argument
+    atoms -- list of set of tag ids and quantifier ('', '?', '*' or '+')
+
+    :argument
+    alphabet_size -- number of tag ids
+
+    :returns
+    compiled rule
+    """
+    # NFA program, every instruction is ('tag', ids), ('split', preferred, other) or ('match',)
+    program: List[tuple] = []
+    for ids, quantifier in atoms:
+        position: int = len(program)
+        if quantifier == '':
+            program.append(('tag', ids))
+        elif quantifier == '?':
+            program += [('split', position + 1, position + 2), ('tag', ids)]
+        elif quantifier == '*':
+            program += [('split', position + 1, position + 3), ('tag', ids), ('split', position + 1, position + 3)]
+        else:
+            program += [('tag', ids), ('split', position, position + 2)]
+    program.append(('match',))
+
+    def closure(pcs: List[int]) -> Tuple[int, ...]:
+        """ Follows splits in order of priority, threads after a match are never preferred and dropped """
+        result: List[int] = []
+        seen: set = set()
+
+        def add(pc: int):
+            if pc in seen:
+                return
+            seen.add(pc)
+            if program[pc][0] == 'split':
+                add(program[pc][1])
+                add(program[pc][2])
+            else:
+                result.append(pc)
+
+        for pc in pcs:
+            add(pc)
+        for index, pc in enumerate(result):
+            if program[pc][0] == 'match':
+                return tuple(result[:index + 1])
+        return tuple(result)
+
+    start: Tuple[int, ...] = closure([0])
+    if any(program[pc][0] == 'match' for pc in start):
+        raise ValueError(f"Rule {label} matches empty sequence of tags")
+
+    states: Dict[Tuple[int, ...], int] = {start: 0}
+    queue: List[Tuple[int, ...]] = [start]
+    table: List[List[int]] = []
+    accepting: List[bool] = []
+    while len(table) < len(queue):
+        state: Tuple[int, ...] = queue[len(table)]
+        row: List[int] = []
+        for tag_id in range(alphabet_size):
+            next_state = closure([pc + 1 for pc in state if program[pc][0] == 'tag' and tag_id in program[pc][1]])
+            if not next_state:
+                row.append(DEAD_STATE)
+                continue
+            if next_state not in states:
+                states[next_state] = len(queue)
+                queue.append(next_state)
+            row.append(states[next_state])
+        table.append(row)
+        accepting.append(program[state[-1]][0] == 'match')
+
+    first: FrozenSet[int] = frozenset(tag_id for tag_id in range(alphabet_size) if table[0][tag_id] != DEAD_STATE)
+    return ChunkRule(label, table, accepting, first)
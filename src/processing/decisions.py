@@ -0,0 +1,136 @@
+from typing import List, NamedTuple, Optional, Tuple
+
+from src.processing.lexicon import Lexicon, UNIQUE_ADJECTIVES
+from src.processing.models.Token import Token
+
+# features of a noun group, see get_features()
+DETERMINATIVE: int = 1 << 0  # article, possessive or demonstrative pronoun or cardinal number
+PLURAL: int = 1 << 1  # plural noun
+SUPERLATIVE: int = 1 << 2  # superlative adjective
+UNIQUE_ADJECTIVE: int = 1 << 3  # the first adjective means something unique (same, main, whole, ...)
+UNCOUNTABLE: int = 1 << 4  # the first noun is uncountable
+GROUP_OF: int = 1 << 5  # collocation of type 'a group of', 'a herd of'
+QUANTITY_OF: int = 1 << 6  # collocation of type 'all of', 'none of'
+ARTICLE_AFTER_VERB: int = 1 << 7  # the third word is a determiner, e.g. It is the
+NAMED_ENTITY: int = 1 << 8  # some word is a Named Entity
+
+# condition of a rule which is always true
+ALWAYS: int = 0
+
+DETERMINATIVE_TAGS: frozenset = frozenset(('DT', 'PRP$', 'CD'))
+PLURAL_TAGS: frozenset = frozenset(('NNS', 'NNPS'))
+QUANTITY_WORDS: frozenset = frozenset(('all', 'none', 'both'))
+
+
+class Insertion(NamedTuple):
+    """ Article inserted before a word of noun group """
+    position: int
+    indefinite: bool
+    definite: bool
+    cause: str
+
+
+# the noun group is left as it is
+KEEP: Optional[Insertion] = None
+
+MISSED_ARTICLE: str = "Missed article before noun group"
+PLURAL_FORM: str = "Definite article because of plural form"
+
+
+class DecisionRule(NamedTuple):
+    """
+    Rule of decision table: if noun group has any of features of condition (or condition is ALWAYS),
+    actions are applied. If the rule is final, the next rules are not checked
+    """
+    label: str
+    condition: int
+    actions: Tuple[Optional[Insertion], ...]
+    final: bool = True
+
+
+# rules are checked in order, for every label the last rule is ALWAYS
+DECISION_TABLE: Tuple[DecisionRule, ...] = (
+    DecisionRule('EXIND', ARTICLE_AFTER_VERB, (KEEP,)),
+    DecisionRule('EXIND', NAMED_ENTITY, (KEEP,), final=False),
+    DecisionRule('EXIND', ALWAYS, (Insertion(2, True, False, "Indefinite article after It is, There is, etc."),)),
+
+    DecisionRule('NPP', UNCOUNTABLE | GROUP_OF | NAMED_ENTITY, (KEEP,), final=False),
+    DecisionRule('NPP', QUANTITY_OF,
+                 (Insertion(2, False, True, "Constructions of type 'All of', 'None of' with definite article"),)),
+    DecisionRule('NPP', DETERMINATIVE, (KEEP,)),
+    DecisionRule('NPP', PLURAL, (Insertion(2, False, True, PLURAL_FORM),)),
+    DecisionRule('NPP', ALWAYS, (Insertion(2, True, True, MISSED_ARTICLE),)),
+
+    DecisionRule('NP', UNCOUNTABLE | DETERMINATIVE | NAMED_ENTITY, (KEEP,)),
+    DecisionRule('NP', PLURAL, (Insertion(0, False, True, PLURAL_FORM),)),
+    DecisionRule('NP', SUPERLATIVE | UNIQUE_ADJECTIVE,
+                 (Insertion(0, False, True, "Definite article because of adjective"),)),
+    DecisionRule('NP', ALWAYS, (Insertion(0, True, True, MISSED_ARTICLE),)),
+)
+
+
+def get_features(leaves: List[Token], lexicon: Lexicon) -> int:
+    """
+    Reduces a noun group to features by one pass over its tokens.
+    NAMED_ENTITY is not included, it depends on the whole sentence, see tree_processing_utils.resolve_noun_group()
+
+    :argument
+    leaves -- tokens of a noun group
+
+    :argument
+    lexicon -- index of uncountable nouns
+
+    :returns
+    bitmask of features
+    """
+    features: int = 0
+    noun_found: bool = False
+    adjective_found: bool = False
+    for leaf in leaves:
+        tag: str = leaf.tag
+        if tag in DETERMINATIVE_TAGS:
+            features |= DETERMINATIVE
+        elif tag in PLURAL_TAGS:
+            features |= PLURAL
+        elif tag == 'JJS':
+            features |= SUPERLATIVE
+        elif tag == 'JJ' and not adjective_found:
+            adjective_found = True
+            if leaf.word.lower() in UNIQUE_ADJECTIVES:
+                features |= UNIQUE_ADJECTIVE
+        if not noun_found and tag.startswith('NN'):
+            noun_found = True
+            if lexicon.is_uncountable(leaf.word):
+                features |= UNCOUNTABLE
+    if len(leaves) >= 2 and leaves[0].word.lower() in QUANTITY_WORDS and leaves[1].word == 'of':
+        features |= QUANTITY_OF
+    if len(leaves) >= 3:
+        if leaves[0].word == 'a' and leaves[2].word == 'of':
+            features |= GROUP_OF
+        if leaves[2].tag == 'DT':
+            features |= ARTICLE_AFTER_VERB
+    return features
+
+
+def decide(label: str, features: int) -> Tuple[Optional[Insertion], ...]:
+    """
+    Finds actions for a noun group by decision table
+
+    :argument
+    label -- label of noun group given by grammar
+
+    :argument
+    features -- bitmask of features, see get_features(); NAMED_ENTITY is set if the group has a Named Entity
+
+    :returns
+    actions: KEEP or Insertion, one after another
+    """
+    actions: Tuple[Optional[Insertion], ...] = ()
+    for rule in DECISION_TABLE:
+        if rule.label != label:
+            continue
+        if rule.condition == ALWAYS or features & rule.condition:
+            actions += rule.actions
+            if rule.final:
+                return actions
+    return actions + (KEEP,)
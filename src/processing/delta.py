@@ -0,0 +1,102 @@
+import hashlib
+from typing import Dict, Iterable, List, Set
+
+from src.processing.batching import MicroBatcher
+from src.processing.cache import SentenceCache
+from src.processing.models.Preloading import Preloading
+from src.processing.models.SentenceSpan import SentenceSpan
+from src.processing.models.dtos import SentenceDeltaDto, SentenceDto
+from src.processing.run_processing import add_offsets, complete_preloading, get_sentence_tokenizer, \
+    process_sentences, process_sentences_with_cache
+from src.processing.utils.preprocessing_utils import segment_text
+
+# number of hex digits of hashes given to clients
+HASH_LENGTH: int = 16
+
+
+def get_sentence_hash(phrase: str, fingerprint: str) -> str:
+    """
+    Hash of a sentence given to clients: the same sentence checked by the same rules has the same hash,
+    so that a client keeps results by hash and a change of rules makes all of them unknown
+
+    :argument
+    phrase -- text of the sentence
+
+    :argument
+    fingerprint -- fingerprint of preloading, see load_utils.get_fingerprint()
+
+    :returns
+    hex digest
+    """
+    return hashlib.sha1(f"{fingerprint}\0{phrase}".encode('utf-8')).hexdigest()[:HASH_LENGTH]
+
+
+def get_text_etag(text: str, fingerprint: str, with_offsets: bool = False) -> str:
+    """
+    Entity tag of results of a whole text: results depend only on the text, the rules and the format,
+    so that the tag is known before processing and a repeated request is answered without it
+
+    :argument
+    text -- text to check
+
+    :argument
+    fingerprint -- fingerprint of preloading, see load_utils.get_fingerprint()
+
+    :argument
+    with_offsets -- whether results have positions in the text
+
+    :returns
+    hex digest
+    """
+    return hashlib.sha1(f"{fingerprint}\0{int(with_offsets)}\0{text}".encode('utf-8')).hexdigest()
+
+
+def process_text_delta(text: str, known: Iterable[str], preloading: Preloading, cache: SentenceCache = None,
+                       batcher: MicroBatcher = None) -> List[SentenceDeltaDto]:
+    """
+    Checks only sentences of a text which are not known to the client.
+    The text is segmented again, every sentence gets its hash and span; sentences which hashes the client
+    already has results for are not checked and not given, so that checking a long document after an edit
+    costs only the changed sentences
+
+    :argument
+    text -- the whole text
+
+    :argument
+    known -- hashes of sentences the client keeps results for, see get_sentence_hash()
+
+    :argument
+    cache -- cache of processed sentences to use for unknown ones
+
+    :argument
+    batcher -- scheduler checking unknown sentences together with concurrent requests, see MicroBatcher
+
+    :returns
+    every sentence of the text with hash, span and paragraph; text and suggestions for unknown ones,
+    positions of their suggestions are given in the text as well as in the sentence
+    """
+    complete_preloading(preloading)
+    known_hashes: Set[str] = set(known)
+    sentences: List[SentenceSpan] = segment_text(text, get_sentence_tokenizer(preloading))
+    hashes: List[str] = [get_sentence_hash(sentence.text, preloading.fingerprint) for sentence in sentences]
+
+    # every unknown sentence is checked once, even if it is repeated in the text
+    unknown: Dict[str, str] = {}
+    for sentence, sentence_hash in zip(sentences, hashes):
+        if sentence_hash not in known_hashes:
+            unknown.setdefault(sentence_hash, sentence.text)
+    phrases: List[str] = list(unknown.values())
+    if cache is not None:
+        checked: List[SentenceDto] = process_sentences_with_cache(phrases, cache, preloading, batcher=batcher)
+    else:
+        checked = batcher.process_sentences(phrases) if batcher is not None else process_sentences(phrases, preloading)
+    results: Dict[str, SentenceDto] = dict(zip(unknown, checked))
+
+    answer: List[SentenceDeltaDto] = []
+    for sentence, sentence_hash in zip(sentences, hashes):
+        if sentence_hash in results:
+            answer.append({'hash': sentence_hash, **add_offsets(results[sentence_hash], sentence)})
+        else:
+            answer.append({'hash': sentence_hash, 'start': sentence.start, 'end': sentence.end,
+                           'paragraph': sentence.paragraph})
+    return answer
@@ -0,0 +1,186 @@
+import threading
+from typing import Iterable, Iterator, List, TextIO
+
+from src.processing.batching import MicroBatcher
+from src.processing.cache import LruSentenceCache, SentenceCache, SqliteSentenceCache, TieredSentenceCache
+from src.processing.delta import get_text_etag, process_text_delta
+from src.processing.models.Preloading import Preloading
+from src.processing.models.dtos import SentenceDeltaDto, SentenceDto
+from src.processing.run_processing import complete_preloading, get_sentence_tokenizer, process_sentence, \
+    process_sentences, process_text, iter_process_text, process_sentences_with_cache
+from src.processing.session import DocumentSession
+from src.processing.utils.load_utils import load_preloading
+
+# sentence checked by ArticleEngine.warm_up(), it has a noun group and a Named Entity
+WARM_UP_SENTENCE: str = "Boy met John Smith in city."
+
+
+class ArticleEngine:
+    """
+    Long-lived object to check texts
+
+    nltk modules, dictionaries and the compiled grammar are loaded once, when the engine is created,
+    so that every further call covers only processing of the text itself.
+    Create it once at startup of an application and reuse it for every request.
+    Persistent cache (see SqliteSentenceCache) is opened on first use and kept open until close().
+    If memory cache is given (see LruSentenceCache), every sentence is looked up there first.
+    With micro-batching (see start_micro_batching()) sentences of concurrent calls are checked together.
+    Clients keeping results by sentence hashes get only results of changed sentences, see process_text_delta().
+    A document edited again and again is checked incrementally by a session, see open_session().
+
+    Concurrency: all methods of the engine may be called from any number of threads at the same time,
+    results are the same as if the calls were made one by one. Preloading is completed and frozen when the engine
+    is created, so that dictionaries, grammar and models are only read; caches and the micro-batcher synchronize
+    themselves. Micro-batching is meant to be started and stopped at startup and shutdown of an application.
+    A DocumentSession belongs to one document and must not be shared by threads.
+    """
+    def __init__(self, preloading: Preloading = None, cache: SqliteSentenceCache = None,
+                 memory_cache: LruSentenceCache = None):
+        self.preloading: Preloading = preloading if preloading is not None else load_preloading()
+        complete_preloading(self.preloading)
+        self.cache: SqliteSentenceCache = cache
+        self.memory_cache: LruSentenceCache = memory_cache
+        self.batcher: MicroBatcher = None
+        # guards lazy opening of persistent cache and starting of micro-batching
+        self.lock = threading.Lock()
+        self.warmed_up: bool = False
+
+    def warm_up(self):
+        """
+        Checks a sample sentence, so that nltk models loaded lazily on the first use (POS tagger, NE chunker)
+        are in memory before the first request, e.g. before worker processes are forked, see server.PreforkServer
+        """
+        process_sentences([WARM_UP_SENTENCE], self.preloading)
+        self.warmed_up = True
+
+    def is_ready(self) -> bool:
+        """
+        :returns
+        True, if dictionaries and models are loaded and the engine is warmed up, see warm_up()
+        """
+        preloading: Preloading = self.preloading
+        return self.warmed_up and preloading.frozen and preloading.pos_tagger is not None and \
+            preloading.named_entities_recognizer is not None and preloading.sentence_tokenizer is not None
+
+    def start_micro_batching(self, max_batch_size: int = None, max_wait: float = None) -> MicroBatcher:
+        """
+        Starts scheduler checking sentences of concurrent process_text() calls together, see MicroBatcher
+
+        :argument
+        max_batch_size -- maximum number of sentences in a batch, JBTT_BATCH_MAX_SIZE or 64 if not given
+
+        :argument
+        max_wait -- maximum time in seconds to collect a batch, JBTT_BATCH_MAX_WAIT_MS or 5 ms if not given
+
+        :returns
+        the scheduler
+        """
+        with self.lock:
+            if self.batcher is None:
+                self.batcher = MicroBatcher(lambda phrases: process_sentences(phrases, self.preloading),
+                                            max_batch_size, max_wait)
+            return self.batcher
+
+    def stop_micro_batching(self):
+        """ Stops the scheduler after requests already in its queue, further calls are processed one by one """
+        with self.lock:
+            batcher: MicroBatcher = self.batcher
+            self.batcher = None
+        if batcher is not None:
+            batcher.close()
+
+    def get_cache(self) -> SqliteSentenceCache:
+        """
+        :returns
+        persistent cache of the engine, the default one is opened on first call
+        """
+        with self.lock:
+            if self.cache is None:
+                self.cache = SqliteSentenceCache()
+            return self.cache
+
+    def select_cache(self, use_cache: bool) -> SentenceCache:
+        """
+        :argument
+        use_cache -- whether persistent cache is needed to use
+
+        :returns
+        memory and/or persistent cache to use, None if there is no one
+        """
+        persistent_cache: SentenceCache = self.get_cache() if use_cache else None
+        if self.memory_cache is None:
+            return persistent_cache
+        if persistent_cache is None:
+            return self.memory_cache
+        return TieredSentenceCache(self.memory_cache, persistent_cache)
+
+    def process_sentence(self, phrase: str) -> SentenceDto:
+        """
+        Runs the program to check one sentence, see run_processing.process_sentence()
+        """
+        if self.memory_cache is None:
+            return process_sentence(phrase, self.preloading)
+        return process_sentences_with_cache([phrase], self.memory_cache, self.preloading)[0]
+
+    def process_text(self, text: str, use_cache: bool = False, workers: int = 1,
+                     with_offsets: bool = False) -> List[SentenceDto]:
+        """
+        Runs the program to check text, see run_processing.process_text()
+        """
+        cache: SentenceCache = self.select_cache(use_cache)
+        batcher: MicroBatcher = self.batcher if workers == 1 else None
+        return process_text(text, cache is not None, self.preloading, workers, cache, with_offsets, batcher)
+
+    def iter_process_text(self, stream: TextIO, use_cache: bool = False, workers: int = 1,
+                          with_offsets: bool = False) -> Iterator[SentenceDto]:
+        """
+        Runs the program to check text read from stream, see run_processing.iter_process_text()
+        """
+        cache: SentenceCache = self.select_cache(use_cache)
+        return iter_process_text(stream, cache is not None, self.preloading, workers, cache=cache,
+                                 with_offsets=with_offsets)
+
+    def process_text_delta(self, text: str, known: Iterable[str], use_cache: bool = False) -> List[SentenceDeltaDto]:
+        """
+        Checks only sentences of text which hashes are not known to the client, see delta.process_text_delta()
+        """
+        return process_text_delta(text, known, self.preloading, self.select_cache(use_cache), self.batcher)
+
+    def get_text_etag(self, text: str, with_offsets: bool = False) -> str:
+        """
+        Entity tag of results of process_text(), known without processing, see delta.get_text_etag()
+        """
+        return get_text_etag(text, self.preloading.fingerprint, with_offsets)
+
+    def open_session(self, text: str = '') -> DocumentSession:
+        """
+        Starts incremental checking of a document, see DocumentSession.
+        Changed sentences are checked by the micro-batcher if it is running
+
+        :argument
+        text -- the first version of the document
+
+        :returns
+        session keeping the document and its results
+        """
+        def process(phrases: List[str]) -> List[SentenceDto]:
+            if self.batcher is not None:
+                return self.batcher.process_sentences(phrases)
+            return process_sentences(phrases, self.preloading)
+
+        return DocumentSession(process, get_sentence_tokenizer(self.preloading), text)
+
+    def close(self):
+        """ Stops micro-batching and closes persistent cache, so that its buffered times of use are written """
+        self.stop_micro_batching()
+        with self.lock:
+            cache: SqliteSentenceCache = self.cache
+            self.cache = None
+        if cache is not None:
+            cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
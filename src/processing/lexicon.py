@@ -0,0 +1,67 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+# adjectives meaning something unique, the definite article is applicable with them
+UNIQUE_ADJECTIVES: FrozenSet[str] = frozenset(
+    ('same', 'main', 'whole', 'previous', 'right', 'next', 'left', 'last', 'only', 'wrong'))
+
+# punctuation stuck to a noun, it is ignored in lookups
+NOUN_PUNCTUATION: Dict[int, None] = str.maketrans('', '', ',|!.')
+
+SIBILANT_ENDINGS: Tuple[str, ...] = ('s', 'x', 'z', 'ch', 'sh')
+VOWELS: str = 'aeiou'
+
+
+def normalize_noun(word: str) -> str:
+    """
+    :returns
+    lower case form of a noun without punctuation
+    """
+    return word.translate(NOUN_PUNCTUATION).lower()
+
+
+def get_inflections(noun: str) -> Set[str]:
+    """
+    Forms of a noun: the noun itself and its regular plural (box -> boxes, city -> cities, car -> cars)
+
+    :argument
+    noun -- normalized noun, see normalize_noun()
+
+    :returns
+    set of forms
+    """
+    if noun.endswith(SIBILANT_ENDINGS):
+        plural: str = noun + 'es'
+    elif noun.endswith('y') and len(noun) > 1 and noun[-2] not in VOWELS:
+        plural = noun[:-1] + 'ies'
+    else:
+        plural = noun + 's'
+    return {noun, plural}
+
+
+class Lexicon:
+    """
+    Index of dictionaries with constant time lookups
+
+    Uncountable nouns are kept with all their forms, so that a plural form is found as well as the lemma.
+    Rules to fix POS tagging are kept by pair (word, wrong tag)
+    """
+    def __init__(self, uncountable_nouns_list: Iterable[str], rules_fix_pos_tagging: List[Dict]):
+        self.uncountable_nouns: FrozenSet[str] = frozenset(
+            form for noun in uncountable_nouns_list for form in get_inflections(normalize_noun(noun)))
+        self.pos_tag_fixes: Dict[Tuple[str, str], str] = {
+            (rule['word'], rule['posTag']): rule['changeTo'] for rule in rules_fix_pos_tagging
+        }
+
+    def is_uncountable(self, word: str) -> bool:
+        """
+        :returns
+        True, if word is a form of uncountable noun, else False
+        """
+        return normalize_noun(word) in self.uncountable_nouns
+
+    def fix_tag(self, word: str, tag: str) -> Optional[str]:
+        """
+        :returns
+        correct tag, if tag of word is known to be wrong, else None
+        """
+        return self.pos_tag_fixes.get((word.lower(), tag))
@@ -0,0 +1,24 @@
+from typing import Callable, FrozenSet, Iterable, List, Tuple
+
+
+class NamedEntities:
+    """
+    Named Entities of one tagged sentence, recognized lazily.
+    Recognition is expensive, so it runs only when some noun group really needs to be checked
+    """
+    def __init__(self, tags: List[Tuple[str, str]], recognize: Callable[[List[Tuple[str, str]]], Iterable[int]]):
+        self.tags = tags
+        self.recognize = recognize
+        self.indexes: FrozenSet[int] = None
+
+    def contains(self, indexes: Iterable[int]) -> bool:
+        """
+        :argument
+        indexes -- positions of tokens in the sentence
+
+        :returns
+        True, if any of tokens is a part of Named Entity, else False
+        """
+        if self.indexes is None:
+            self.indexes = frozenset(self.recognize(self.tags))
+        return any(index in self.indexes for index in indexes)
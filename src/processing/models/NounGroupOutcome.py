@@ -0,0 +1,43 @@
+from typing import List, NamedTuple, Optional, Tuple
+
+from src.processing.models.Suggestion import Suggestion
+from src.processing.models.Token import Token
+
+
+class SuggestionTemplate(NamedTuple):
+    """ Immutable suggestion for a noun group, positions are indexes of words of the group """
+    start: int
+    end: int
+    replacements: Tuple[str, ...]
+    cause: str
+
+    def locate(self, leaves: List[Token]) -> Suggestion:
+        """
+        :argument
+        leaves -- tokens of the noun group in a sentence
+
+        :returns
+        suggestion with spans of the tokens in the sentence
+        """
+        return Suggestion(leaves[self.start].start, leaves[self.end - 1].end, self.replacements, self.cause)
+
+
+class NounGroupOutcome(NamedTuple):
+    """
+    Result of resolution of a noun group: for every action of decision table None if the group is kept,
+    otherwise a suggestion. Named Entities depend on the whole sentence, so that both outcomes are kept:
+    if the group has no Named Entity and if it has
+    """
+    plain: Tuple[Optional[SuggestionTemplate], ...]
+    named_entity: Tuple[Optional[SuggestionTemplate], ...]
+
+    def depends_on_named_entity(self) -> bool:
+        """
+        :returns
+        True, if the group gets other suggestions when it has a Named Entity; actions keeping the group give nothing
+        """
+        return tuple(suggestion for suggestion in self.plain if suggestion is not None) != \
+            tuple(suggestion for suggestion in self.named_entity if suggestion is not None)
+
+    def get(self, named_entity: bool) -> Tuple[Optional[SuggestionTemplate], ...]:
+        return self.named_entity if named_entity else self.plain
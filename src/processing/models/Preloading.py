@@ -1,11 +1,58 @@
+import threading
 from typing import Dict, List
 
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from src.processing.cache import NounGroupCache
+from src.processing.chunker import FiniteStateChunker
+from src.processing.lexicon import Lexicon
+from src.processing.named_entities import Recognizer
+
 
 class Preloading:
-    """ Object containing info about loaded dictionaries """
+    """
+    Object containing info about loaded dictionaries
+
+    Missing parts are loaded once by run_processing.complete_preloading() under lock, after that the object is frozen:
+    its attributes cannot be set any more, so that it is shared by threads without synchronization
+    """
     def __init__(self, contractions: Dict[str, str], rules_fix_pos_tagging: List[Dict],
-                 uncountable_nouns_list: List[str], modules_updated: bool):
+                 uncountable_nouns_list: List[str], modules_updated: bool,
+                 chunk_parser: FiniteStateChunker = None, fingerprint: str = None, ne_backend: str = None,
+                 gazetteer: List[str] = None, named_entities_recognizer: Recognizer = None,
+                 tagger_backend: str = None, pos_tagger=None, lexicon: Lexicon = None,
+                 noun_group_cache: NounGroupCache = None, sentence_tokenizer: PunktSentenceTokenizer = None):
         self.contractions = contractions
         self.rules_fix_pos_tagging = rules_fix_pos_tagging
         self.uncountable_nouns_list = uncountable_nouns_list
         self.modules_updated = modules_updated
+        self.chunk_parser = chunk_parser
+        # see load_utils.get_fingerprint()
+        self.fingerprint = fingerprint
+        # see named_entities.NE_BACKENDS, the default one is used if not given
+        self.ne_backend = ne_backend
+        # known names for rules backend of Named Entity recognition
+        self.gazetteer = gazetteer
+        self.named_entities_recognizer = named_entities_recognizer
+        # see tagger.TAGGER_BACKENDS, the default one is used if not given
+        self.tagger_backend = tagger_backend
+        # see tagger.create_tagger()
+        self.pos_tagger = pos_tagger
+        # index of uncountable nouns and rules to fix POS tagging, see Lexicon
+        self.lexicon = lexicon
+        # outcomes of already resolved noun groups, shared by all texts processed with this preloading
+        self.noun_group_cache = noun_group_cache
+        # Punkt model of sentence segmentation, see preprocessing_utils.load_sentence_tokenizer()
+        self.sentence_tokenizer = sentence_tokenizer
+        # held while missing parts are loaded, see run_processing.complete_preloading()
+        self.lock = threading.Lock()
+        self.frozen: bool = False
+
+    def freeze(self):
+        """ Forbids further changes of attributes """
+        self.frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, 'frozen', False):
+            raise AttributeError(f"Preloading is frozen, {name} cannot be set")
+        super().__setattr__(name, value)
@@ -0,0 +1,20 @@
+from typing import NamedTuple, Tuple
+
+from src.processing.models.Suggestion import Suggestion
+from src.processing.models.dtos import SentenceDto
+
+
+class SentenceResult(NamedTuple):
+    """
+    Result of processing of one sentence. It is immutable and light,
+    it is turned into SentenceDto only when it is given out, see to_dto()
+    """
+    text: str
+    suggestions: Tuple[Suggestion, ...] = ()
+
+    def to_dto(self) -> SentenceDto:
+        """ Form result for API, a new object on every call """
+        return {
+            'text': self.text,
+            'suggestions': [suggestion.to_dto() for suggestion in self.suggestions]
+        }
@@ -0,0 +1,12 @@
+from typing import NamedTuple
+
+
+class SentenceSpan(NamedTuple):
+    """ Sentence of a text found by segmentation, see preprocessing_utils.segment_text() """
+    # the sentence, empty for separator of paragraphs
+    text: str
+    # absolute offsets in the text, a separator has the span of line break
+    start: int
+    end: int
+    # index of the paragraph (line) in the text
+    paragraph: int
@@ -1,33 +1,20 @@
-from typing import List
+from typing import NamedTuple, Tuple
 
 from src.processing.models.dtos import SuggestionDto
 
 
-class Suggestion:
-    def __init__(
-            self,
-            start: int,
-            end: int,
-            replacements: List[str],
-            cause: str
-    ):
-        self.start = start
-        self.end = end
-        self.replacements = replacements
-        self.cause = cause
+class Suggestion(NamedTuple):
+    """ Suggestion for NP of a sentence: start letter of NP, end letter of NP and possible articles """
+    start: int
+    end: int
+    replacements: Tuple[str, ...]
+    cause: str
 
-    def shift(self, length: int):
-        """ Shift of suggestion to number of words (=length) """
-        self.start += length
-        self.end += length
-
-    def get_suggestion_dto(self, sentence: List[str]) -> SuggestionDto:
-        """ Form suggestion: start letter of NP, end letter of NP and possible articles """
-        start_char = sum([len(words) for words in sentence[:self.start]]) + self.start
-        end_char = sum([len(words) for words in sentence[self.start:self.end]]) + start_char + self.end - self.start - 1
+    def to_dto(self) -> SuggestionDto:
+        """ Form suggestion for API, a new object on every call """
         return {
-            'start': start_char,
-            'end': end_char,
-            'replacements': self.replacements,
+            'start': self.start,
+            'end': self.end,
+            'replacements': list(self.replacements),
             'cause': self.cause
         }
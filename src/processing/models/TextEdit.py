@@ -0,0 +1,8 @@
+from typing import NamedTuple
+
+
+class TextEdit(NamedTuple):
+    """ Replacement of text[start:end] by text, see session.DocumentSession.apply_edits() """
+    start: int
+    end: int
+    text: str
@@ -0,0 +1,12 @@
+from typing import NamedTuple
+
+
+class Token(NamedTuple):
+    """ Tagged word of a sentence, leaf of a tree with noun groups """
+    word: str
+    tag: str
+    # position in the sentence, see NamedEntities
+    index: int = -1
+    # span of the word in the initial sentence, see preprocessing_utils.prepare_sentence_for_tagging()
+    start: int = -1
+    end: int = -1
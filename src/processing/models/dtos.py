@@ -1,7 +1,13 @@
 from typing import TypedDict, List
 
 
-class SuggestionDto(TypedDict):
+class SuggestionOffsetsDto(TypedDict, total=False):
+    """ Positions of NP in the whole text, given only if offsets are asked for """
+    documentStart: int
+    documentEnd: int
+
+
+class SuggestionDto(SuggestionOffsetsDto):
     """ Suggestion containing NP with article and positions of start and end of NP """
     start: int
     end: int
@@ -9,7 +15,28 @@ class SuggestionDto(TypedDict):
     cause: str
 
 
-class SentenceDto(TypedDict):
+class SentenceOffsetsDto(TypedDict, total=False):
+    """ Span of the sentence in the whole text and index of its paragraph, given only if offsets are asked for """
+    start: int
+    end: int
+    paragraph: int
+
+
+class SentenceDto(SentenceOffsetsDto):
     """ Object containing original text and list of SuggestionDto """
     text: str
     suggestions: List[SuggestionDto]
+
+
+class SentenceHashDto(TypedDict):
+    """ Hash of the sentence, see delta.get_sentence_hash() """
+    hash: str
+
+
+class SentenceDeltaDto(SentenceHashDto, SentenceOffsetsDto, total=False):
+    """
+    Sentence of delta response: hash, span and paragraph are always given,
+    text and suggestions only if the hash is not known to the client, see delta.process_text_delta()
+    """
+    text: str
+    suggestions: List[SuggestionDto]
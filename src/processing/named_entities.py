@@ -0,0 +1,184 @@
+import os
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, List, Tuple
+
+import nltk
+from nltk import Tree
+
+# backend of Named Entity recognition: nltk maxent classifier as before, nltk maxent classifier marking tokens
+# of its chunks or fast rules, see create_recognizer()
+NE_BACKENDS: Tuple[str, ...] = ('maxent', 'maxent_tokens', 'rules')
+DEFAULT_NE_BACKEND: str = 'maxent'
+
+PROPER_NOUN_TAGS: FrozenSet[str] = frozenset(('NNP', 'NNPS'))
+
+# tokens after which a word is capitalized because it starts a (quoted) sentence, not because it is a name
+SENTENCE_STARTS: FrozenSet[str] = frozenset(('.', '!', '?', ':', '``', "''", '"', '(', '--'))
+
+# capitalized words which are never names
+NOT_NAMES: FrozenSet[str] = frozenset(('I',))
+
+Recognizer = Callable[[List[Tuple[str, str]]], Iterable[int]]
+
+
+def get_default_ne_backend() -> str:
+    """
+    Backend of Named Entity recognition: JBTT_NE_BACKEND environment variable if set, otherwise maxent
+
+    :returns
+    name of backend, one of NE_BACKENDS
+    """
+    backend: str = os.environ.get('JBTT_NE_BACKEND') or DEFAULT_NE_BACKEND
+    if backend not in NE_BACKENDS:
+        raise ValueError(f"Unknown Named Entity backend {backend!r}, expected one of {', '.join(NE_BACKENDS)}")
+    return backend
+
+
+def create_recognizer(backend: str, gazetteer: Iterable[str] = ()) -> Recognizer:
+    """
+    :argument
+    backend -- name of backend, one of NE_BACKENDS
+
+    :argument
+    gazetteer -- known names, used by rules backend
+
+    :returns
+    function of tagged sentence giving positions of tokens which are Named Entities
+    """
+    if backend == 'maxent':
+        return recognize_maxent
+    if backend == 'maxent_tokens':
+        return recognize_maxent_tokens
+    if backend == 'rules':
+        return RuleBasedRecognizer(gazetteer)
+    raise ValueError(f"Unknown Named Entity backend {backend!r}, expected one of {', '.join(NE_BACKENDS)}")
+
+
+def recognize_maxent(tags: List[Tuple[str, str]]) -> List[int]:
+    """
+    Recognizes Named Entities in a tagged sentence by nltk.ne_chunk.
+    The whole sentence is classified, because the classifier uses neighbour words as features.
+    Kept as it has always been, so that suggestions of the default backend do not change:
+    chunk[0] is a tuple (word, tag), so that the check is never true and no token is marked.
+    Tokens of chunks are marked by recognize_maxent_tokens()
+
+    :argument
+    tags -- list of tuples (word, tag) of a sentence
+
+    :returns
+    positions of tokens which are Named Entities
+    """
+    entity_tags: Tree = nltk.ne_chunk(tags, binary=True)
+    entity_index = []
+    for chunk in entity_tags:
+        if hasattr(chunk, 'label'):
+            if not chunk[0]:  # nltk.ne_chunk counts every word with capital letter as NE, so that first word is excluded
+                entity_index.append(entity_tags.index(chunk))
+    return entity_index
+
+
+def recognize_maxent_tokens(tags: List[Tuple[str, str]]) -> List[int]:
+    """
+    Recognizes Named Entities in a tagged sentence by nltk.ne_chunk and marks every token of their chunks.
+    nltk.ne_chunk counts every word with capital letter as NE, so that the first word of the sentence is excluded
+
+    :argument
+    tags -- list of tuples (word, tag) of a sentence
+
+    :returns
+    positions of tokens which are Named Entities
+    """
+    return [position for position in get_ne_chunk_entities(tags) if position > 0]
+
+
+class RuleBasedRecognizer:
+    """
+    Fast Named Entity recognition by capitalization, position in the sentence, NNP tags and a gazetteer
+
+    A capitalized word inside a sentence is a name. At the start of a sentence capitalization says nothing,
+    so there a word is a name only if it is in the gazetteer or starts a sequence of proper nouns (John Smith)
+    """
+    def __init__(self, gazetteer: Iterable[str] = ()):
+        self.gazetteer: FrozenSet[str] = frozenset(gazetteer)
+
+    def __call__(self, tags: List[Tuple[str, str]]) -> List[int]:
+        """
+        :argument
+        tags -- list of tuples (word, tag) of a sentence
+
+        :returns
+        positions of tokens which are Named Entities
+        """
+        entities: List[int] = []
+        for index, (word, tag) in enumerate(tags):
+            if not word[:1].isupper() or word in NOT_NAMES:
+                continue
+            if word in self.gazetteer:
+                entities.append(index)
+            elif index > 0 and tags[index - 1][0] not in SENTENCE_STARTS:
+                entities.append(index)
+            elif tag in PROPER_NOUN_TAGS and index + 1 < len(tags) and \
+                    tags[index + 1][1] in PROPER_NOUN_TAGS and tags[index + 1][0][:1].isupper():
+                entities.append(index)
+        return entities
+
+
+def get_ne_chunk_entities(tags: List[Tuple[str, str]]) -> List[int]:
+    """
+    Positions of all tokens inside Named Entity chunks of nltk.ne_chunk, the reference for compare_backends().
+    A chunk of several words is one child of the tree, so that positions of chunks are not positions of tokens
+
+    :argument
+    tags -- list of tuples (word, tag) of a sentence
+
+    :returns
+    positions of tokens which are Named Entities
+    """
+    entities: List[int] = []
+    position: int = 0
+    for chunk in nltk.ne_chunk(tags, binary=True):
+        length: int = len(chunk) if isinstance(chunk, Tree) else 1
+        if isinstance(chunk, Tree):
+            entities += range(position, position + length)
+        position += length
+    return entities
+
+
+def compare_backends(tagged_sentences: List[List[Tuple[str, str]]],
+                     gazetteer: Iterable[str] = ()) -> Dict[str, float]:
+    """
+    Compares rules backend with nltk.ne_chunk on the same corpus
+
+    :argument
+    tagged_sentences -- list of tuples (word, tag) for every sentence
+
+    :argument
+    gazetteer -- known names, used by rules backend
+
+    :returns
+    number of sentences and tokens, share of tokens where rules agree with nltk.ne_chunk,
+    precision and recall of rules, throughput of every backend in sentences per second
+    """
+    start: float = time.perf_counter()
+    reference: List[FrozenSet[int]] = [frozenset(get_ne_chunk_entities(tags)) for tags in tagged_sentences]
+    maxent_time: float = time.perf_counter() - start
+
+    recognizer: RuleBasedRecognizer = RuleBasedRecognizer(gazetteer)
+    start = time.perf_counter()
+    found: List[FrozenSet[int]] = [frozenset(recognizer(tags)) for tags in tagged_sentences]
+    rules_time: float = time.perf_counter() - start
+
+    tokens: int = sum(len(tags) for tags in tagged_sentences)
+    true_positives: int = sum(len(expected & actual) for expected, actual in zip(reference, found))
+    expected_count: int = sum(len(expected) for expected in reference)
+    found_count: int = sum(len(actual) for actual in found)
+    disagreements: int = sum(len(expected ^ actual) for expected, actual in zip(reference, found))
+    return {
+        'sentences': len(tagged_sentences),
+        'tokens': tokens,
+        'agreement': 1 - disagreements / tokens if tokens else 1.0,
+        'precision': true_positives / found_count if found_count else 1.0,
+        'recall': true_positives / expected_count if expected_count else 1.0,
+        'maxent_sentences_per_second': len(tagged_sentences) / maxent_time if maxent_time else float('inf'),
+        'rules_sentences_per_second': len(tagged_sentences) / rules_time if rules_time else float('inf')
+    }
@@ -1,14 +1,23 @@
-from typing import List, Tuple
+from typing import FrozenSet, List, Tuple
 
-import nltk
-import nltk.tree
 from nltk import Tree
+from src.processing.chunker import FiniteStateChunker
 from src.processing.models.Preloading import Preloading
-from src.processing.models.Replace import Replace
+from src.processing.models.Token import Token
 from src.processing.utils.preprocessing_utils import fix_pos_tagging, prepare_sentence_for_tagging
 
+GRAMMAR: str = """
+                EXIND: {<DT|EX|IT>+<VBZ|VBD>+<DT>?<JJ>*<NN>+}
+                VBPART: {<VBZ|VBD><NN>+<IN>+}
+                NPP: {<DT>+<NN>?<IN>?<CD>?<DT|PRP\$>?<JJS|JJ|JJR>*<NN|NNS>+}
+                NP: {<CD>?<DT|PRP\$>?<JJS|JJ|JJR>*<NN|NNS>+}
+                """
+
+# tags of nouns required by every rule of GRAMMAR, see has_noun_group()
+NOUN_TAGS: FrozenSet[str] = frozenset(('NN', 'NNS'))
+
 
-def pos_tagging(phrase: str, preloading: Preloading) -> (List[Tuple[str, str]], List[Replace]):
+def pos_tagging(phrase: str, preloading: Preloading) -> (List[Tuple[str, str]], List[Tuple[int, int]]):
     """
     Tags sentence with part-of-speech tags
 
@@ -18,11 +27,50 @@ def pos_tagging(phrase: str, preloading: Preloading) -> (List[Tuple[str, str]],
     preloading -- object containing dictionaries
 
     :returns
-    list of tuples (word, tag) and list of replaces
+    list of tuples (word, tag) and list of their spans in the phrase
+    """
+    return pos_tagging_sents([phrase], preloading)[0]
+
+
+def pos_tagging_sents(phrases: List[str], preloading: Preloading) \
+        -> List[Tuple[List[Tuple[str, str]], List[Tuple[int, int]]]]:
+    """
+    Tags sentences with part-of-speech tags.
+    Tokens of all sentences are prepared first and tagged in one batched pass,
+    after that every sentence is fixed up and enriched separately
+
+    :argument
+    phrases -- sentences to tag with POS-tags
+    :argument
+    preloading -- object containing dictionaries
+
+    :returns
+    for every sentence list of tuples (word, tag) and list of their spans in the sentence
     """
-    tokens, replaces = prepare_sentence_for_tagging(phrase, preloading.contractions)
-    tags: List[Tuple[str, str]] = nltk.pos_tag(tokens)
-    fix_pos_tagging(tags, preloading.rules_fix_pos_tagging)
+    prepared: List[Tuple[List[str], List[Tuple[int, int]]]] = [
+        prepare_sentence_for_tagging(phrase, preloading.contractions) for phrase in phrases
+    ]
+    tagged_sents: List[List[Tuple[str, str]]] = preloading.pos_tagger.tag_sents([tokens for tokens, _ in prepared])
+    return [
+        (enrich_tags(tags, preloading), spans)
+        for tags, (_, spans) in zip(tagged_sents, prepared)
+    ]
+
+
+def enrich_tags(tags: List[Tuple[str, str]], preloading: Preloading) -> List[Tuple[str, str]]:
+    """
+    Fixes POS tags of one tagged sentence and adds tags needed by grammar (IT).
+    Named Entities are recognized later and only if needed, see NamedEntities
+
+    :argument
+    tags -- list of tuples (word, tag) of a sentence
+    :argument
+    preloading -- object containing dictionaries
+
+    :returns
+    list of tuples (word, tag)
+    """
+    fix_pos_tagging(tags, preloading.lexicon)
 
     # add tag IT, because there is need in grammar to differ pronouns between he-she and it
     same_word_tags: List[str] = ['it']
@@ -30,46 +78,58 @@ def pos_tagging(phrase: str, preloading: Preloading) -> (List[Tuple[str, str]],
         (w, w.upper()) if w in same_word_tags else (w, t)
         for w, t in tags
     ]
+    return tags
 
-    # enrich with Named Entity tag
-    entity_tags: Tree = nltk.ne_chunk(tags, binary=True)
-    entity_index = []
-    for chunk in entity_tags:
-        if hasattr(chunk, 'label'):
-            if not chunk[0]:  # nltk.ne_chunk counts every word with capital letter as NE, so that first word is excluded
-                entity_index.append(entity_tags.index(chunk))
-    if len(entity_index) != 0:
-        for index in entity_index:
-            tags[index] += ('NE',)
-    return tags, replaces
 
+def has_noun_group(tags: List[Tuple[str, str]]) -> bool:
+    """
+    Check if any noun group of grammar can be found in a sentence:
+    every rule of GRAMMAR requires NN or NNS, without them there is nothing to suggest
 
-def create_tree_from_grammar(tags: Tree) -> Tree:
+    :argument
+    tags -- list of tuples (word, tag) of a sentence
+
+    :returns
+    True, if there is a noun, else False
+    """
+    return any(tag in NOUN_TAGS for _, tag in tags)
+
+
+def create_chunk_parser() -> FiniteStateChunker:
+    """
+    Compiles the grammar of noun groups into automaton, so that it can be reused for every sentence.
+    Gives the same chunks as nltk.RegexpParser(GRAMMAR)
+
+    :returns
+    chunk parser for GRAMMAR
+    """
+    return FiniteStateChunker(GRAMMAR)
+
+
+def create_tree_from_grammar(tags: List[Tuple[str, ...]], spans: List[Tuple[int, int]],
+                             chunk_parser: FiniteStateChunker = None) -> Tree:
     """
     Extracts noun groups according to grammar by Regexp rules
 
     :argument
     tags -- list of tuples (word, tag)
+    :argument
+    spans -- spans of words in the sentence, see preprocessing_utils.prepare_sentence_for_tagging()
+    :argument
+    chunk_parser -- compiled grammar, see create_chunk_parser(); compiled on the fly if not given
 
     :returns
-    tree with indicated grammar groups
+    tree with indicated grammar groups, leaves are tokens
     """
-    pattern: str = """
-                EXIND: {<DT|EX|IT>+<VBZ|VBD>+<DT>?<JJ>*<NN>+}
-                VBPART: {<VBZ|VBD><NN>+<IN>+}
-                NPP: {<DT>+<NN>?<IN>?<CD>?<DT|PRP\$>?<JJS|JJ|JJR>*<NN|NNS>+}
-                NP: {<CD>?<DT|PRP\$>?<JJS|JJ|JJR>*<NN|NNS>+}
-                """
-    cp: nltk.RegexpParser = nltk.RegexpParser(pattern)
-    result: Tree = cp.parse(tags)
-
-    # mark unmarked leafs with OTHER to process them further as trees and count symbols in them
+    tokens: List[Token] = [
+        Token(word, tag, index, start, end) for index, ((word, tag), (start, end)) in enumerate(zip(tags, spans))
+    ]
+    cp: FiniteStateChunker = chunk_parser if chunk_parser is not None else create_chunk_parser()
+    tree: Tree = cp.parse(tokens)
 
-    for index, element in enumerate(result):
+    # mark unmarked leafs with OTHER to process them further as trees
+    for index, element in enumerate(tree):
         if not isinstance(element, Tree):
-            if isinstance(element, Tuple):
-                element = f"(OTHER {element[0]}/{element[1]})"
-            result[index] = Tree.fromstring(str(element))
-    tree: Tree = Tree.fromstring(str(result))
+            tree[index] = Tree('OTHER', [element])
 
     return tree
@@ -1,77 +1,55 @@
-from typing import List
+from typing import List, Tuple
 
 import nltk
-from src.processing.models.Replace import Replace
-from src.processing.checkers import is_noun_uncountable, is_determinative_in_group, resolve_vowel, \
-    is_named_entity, is_a_group_of, is_quantity_of
-from src.processing.models.SubtreeProcessingResult import SubtreeProcessingResult
-from src.processing.models.dtos import SentenceDto
-from src.processing.utils.tree_processing_utils import get_words_leaves, get_pos_leaves, insert_article_in_tree, \
-    resolve_npp_group, resolve_np_group
-
-
-def process_tree(phrase, tree: nltk.Tree, replaces: List[Replace], uncountable_nouns_list: List[str]) -> SentenceDto:
+from src.processing.cache import NounGroupCache
+from src.processing.lexicon import Lexicon
+from src.processing.models.NamedEntities import NamedEntities
+from src.processing.models.NounGroupOutcome import NounGroupOutcome
+from src.processing.models.SentenceResult import SentenceResult
+from src.processing.models.Suggestion import Suggestion
+from src.processing.models.Token import Token
+from src.processing.utils.tree_processing_utils import resolve_noun_group
+
+
+def process_tree(phrase, tree: nltk.Tree, lexicon: Lexicon,
+                 named_entities: NamedEntities, noun_group_cache: NounGroupCache = None) -> SentenceResult:
     """
     The core process
-    Resolves whether to insert article in NP
+    Resolves whether to insert article in NP: every NP is reduced to features once
+    and actions for them are taken from decision table (see decisions.DECISION_TABLE).
+    Outcomes of noun groups are taken from cache if given.
+    Positions of suggestions are spans of tokens in the phrase, see preprocessing.create_tree_from_grammar()
 
     :argument
     tree -- tree of sentence with extracted NPs by grammar
     :argument
-    replaces -- list of replaces to fix sentence to the initial state
+    lexicon -- index of dictionaries, see Lexicon
+    :argument
+    named_entities -- Named Entities of the sentence, recognized only if some NP needs them
     :argument
-    uncountable_nouns_list -- list containing uncountable nouns
+    noun_group_cache -- outcomes of already resolved noun groups, see NounGroupCache
 
     :returns
-    suggestion containing NP with article and positions of start and end of NP
+    result of the sentence: suggestions containing NP with article and positions of start and end of NP
     """
 
-    def empty_suggestion():
-        tree_processing_result.concat(SubtreeProcessingResult(words_leaves, []))
-
-    tree_processing_result = SubtreeProcessingResult([], [])
-    for subtree in tree.subtrees(lambda t: t.height() == 2):
-
-        words_leaves: List[str] = get_words_leaves(subtree.leaves())
-        pos_leaves: List[str] = get_pos_leaves(subtree.leaves())
-
-        if subtree.label() == 'EXIND':
-            if pos_leaves[2] == 'DT':
-                empty_suggestion()
-            else:
-                if is_named_entity(subtree.leaves()):
-                    empty_suggestion()
-                dt: str = resolve_vowel(words_leaves[2])
-                tree_processing_result.concat(
-                    insert_article_in_tree(2, dt, words_leaves, "Indefinite article after It is, There is, etc."))
-        elif subtree.label() == 'VBPART':
-            empty_suggestion()
-
-        elif subtree.label() == 'NPP':
-            if is_noun_uncountable(subtree, uncountable_nouns_list) or is_named_entity(
-                    subtree.leaves()) or is_a_group_of(words_leaves):
-                empty_suggestion()
-            if is_quantity_of(words_leaves):
-                tree_processing_result.concat(insert_article_in_tree(2, "the", words_leaves,
-                                                                     "Constructions of type 'All of', 'None of' with definite article"))
-            else:
-                if is_determinative_in_group(pos_leaves):
-                    empty_suggestion()
-                else:
-                    tree_processing_result.concat(resolve_npp_group(pos_leaves, words_leaves))
-
-        elif subtree.label() == 'NP':
-            if is_noun_uncountable(subtree, uncountable_nouns_list) or is_determinative_in_group(
-                    pos_leaves) or is_named_entity(subtree.leaves()):
-                empty_suggestion()
-            else:
-                tree_processing_result.concat(resolve_np_group(pos_leaves, words_leaves))
-
+    suggestions: List[Suggestion] = []
+    # every child of the tree is a group of tokens, see preprocessing.create_tree_from_grammar()
+    for subtree in tree:
+        leaves: List[Token] = subtree
+        label: str = subtree.label()
+        if noun_group_cache is None:
+            outcome: NounGroupOutcome = resolve_noun_group(label, leaves, lexicon)
         else:
-            empty_suggestion()
-
-    for replace in reversed(replaces):
-        tree_processing_result.apply_replace(replace)
-
-    result = tree_processing_result.get_sentence(phrase)
-    return result
+            key: Tuple = (label, tuple([leaf.word for leaf in leaves]), tuple([leaf.tag for leaf in leaves]))
+            outcome = noun_group_cache.get(key)
+            if outcome is None:
+                outcome = resolve_noun_group(label, leaves, lexicon)
+                noun_group_cache.put(key, outcome)
+        named_entity: bool = outcome.depends_on_named_entity() and \
+            named_entities.contains(leaf.index for leaf in leaves)
+        for suggestion in outcome.get(named_entity):
+            if suggestion is not None:
+                suggestions.append(suggestion.locate(leaves))
+
+    return SentenceResult(phrase, tuple(suggestions))
@@ -1,29 +1,55 @@
-import json
-import os
-from typing import List
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, TextIO
 
+from nltk import Tree
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from src.processing.batching import MicroBatcher
+from src.processing.cache import NounGroupCache, SentenceCache, SqliteSentenceCache
+from src.processing.lexicon import Lexicon
+from src.processing.models.NamedEntities import NamedEntities
+from src.processing.named_entities import create_recognizer, get_default_ne_backend
+from src.processing.tagger import create_tagger, get_default_tagger_backend
 from src.processing.models.Preloading import Preloading
+from src.processing.models.SentenceResult import SentenceResult
+from src.processing.models.SentenceSpan import SentenceSpan
 from src.processing.models.dtos import SentenceDto
 from src.processing.processor import process_tree
+from src.processing.preprocessing import create_chunk_parser
 from src.processing.utils.load_utils import download_nltk_modules, load_contractions, load_rules_fix_pos_tagging, \
-    load_uncountable_nouns_list, load_dictionaries
-from src.processing.utils.preprocessing_utils import md5, get_sentence_tokens
-from src.processing.utils.tree_processing_utils import get_tree_from_sentence
+    load_uncountable_nouns_list, load_preloading, get_fingerprint, load_gazetteer
+from src.processing.utils.preprocessing_utils import iter_segment_text, load_sentence_tokenizer, segment_text
+from src.processing.utils.tree_processing_utils import get_tree_from_sentence, get_trees_from_sentences
 
+# result of an empty sentence between paragraphs
+SEPARATOR: SentenceResult = SentenceResult('\n')
 
-def process_sentence(phrase: str, preloading: Preloading) -> SentenceDto:
+
+def complete_preloading(preloading: Preloading):
     """
-    Runs the program to check one sentence
+    Loads everything what is missing in preloading and freezes it.
+    Loading is made once under lock of preloading, further calls return at once,
+    so that threads share the completed preloading without synchronization
 
     :argument
-    phrase -- a sentence where missing articles are investigated
+    preloading -- object containing dictionaries
+    """
+    if preloading.frozen:
+        return
+    with preloading.lock:
+        if not preloading.frozen:
+            load_missing_parts(preloading)
+            preloading.freeze()
 
-    :returns
-    List of suggestions with start and end of NP and possible article replacements
+
+def load_missing_parts(preloading: Preloading):
     """
-    if phrase == '':
-        return {'text': '\n', 'suggestions': []}
+    Loads everything what is missing in preloading, see complete_preloading()
 
+    :argument
+    preloading -- object containing dictionaries
+    """
     if not preloading.modules_updated:
         download_nltk_modules()
     if not preloading.contractions:
@@ -32,13 +58,192 @@ def process_sentence(phrase: str, preloading: Preloading) -> SentenceDto:
         preloading.rules_fix_pos_tagging = load_rules_fix_pos_tagging()
     if not preloading.uncountable_nouns_list:
         preloading.uncountable_nouns_list = load_uncountable_nouns_list()
+    if preloading.lexicon is None:
+        preloading.lexicon = Lexicon(preloading.uncountable_nouns_list, preloading.rules_fix_pos_tagging)
+    if preloading.noun_group_cache is None:
+        preloading.noun_group_cache = NounGroupCache()
+    if preloading.chunk_parser is None:
+        preloading.chunk_parser = create_chunk_parser()
+    if preloading.ne_backend is None:
+        preloading.ne_backend = get_default_ne_backend()
+    if preloading.ne_backend == 'rules' and preloading.gazetteer is None:
+        preloading.gazetteer = load_gazetteer()
+    if preloading.named_entities_recognizer is None:
+        preloading.named_entities_recognizer = create_recognizer(preloading.ne_backend, preloading.gazetteer or ())
+    if preloading.tagger_backend is None:
+        preloading.tagger_backend = get_default_tagger_backend()
+    if preloading.pos_tagger is None:
+        preloading.pos_tagger = create_tagger(preloading.tagger_backend)
+    if preloading.sentence_tokenizer is None:
+        preloading.sentence_tokenizer = load_sentence_tokenizer()
+    if preloading.fingerprint is None:
+        preloading.fingerprint = get_fingerprint(preloading)
+
+
+def process_sentence(phrase: str, preloading: Preloading) -> SentenceDto:
+    """
+    Runs the program to check one sentence
+
+    :argument
+    phrase -- a sentence where missing articles are investigated
+
+    :returns
+    List of suggestions with start and end of NP and possible article replacements
+    """
+    if phrase == '':
+        return SEPARATOR.to_dto()
+
+    complete_preloading(preloading)
+
+    tree, named_entities = get_tree_from_sentence(phrase, preloading)
+    return resolve_sentence(phrase, tree, named_entities, preloading).to_dto()
+
+
+def resolve_sentence(phrase: str, tree: Optional[Tree], named_entities: NamedEntities,
+                     preloading: Preloading) -> SentenceResult:
+    """
+    Resolves articles in a sentence already converted into tree, see get_trees_from_sentences()
+
+    :argument
+    phrase -- a sentence where missing articles are investigated
 
-    tree, replaces = get_tree_from_sentence(phrase, preloading)
-    suggestions = process_tree(phrase, tree, replaces, preloading.uncountable_nouns_list)
-    return suggestions
+    :argument
+    tree -- tree of the sentence, None if there is no noun group in it
+
+    :returns
+    result of the sentence, see SentenceResult
+    """
+    if tree is None:
+        # nothing to suggest without noun groups
+        return SentenceResult(phrase)
+    return process_tree(phrase, tree, preloading.lexicon, named_entities, preloading.noun_group_cache)
 
 
-def process_text(text: str, use_cache: bool = False) -> List[SentenceDto]:
+def process_sentences(phrases: List[str], preloading: Preloading, workers: int = 1,
+                      executor: Executor = None) -> List[SentenceDto]:
+    """
+    Runs the program to check several sentences, see check_sentences()
+
+    :returns
+    List of suggestions for every sentence in the same order
+    """
+    return [result.to_dto() for result in check_sentences(phrases, preloading, workers, executor)]
+
+
+def check_sentences(phrases: List[str], preloading: Preloading, workers: int = 1,
+                    executor: Executor = None) -> List[SentenceResult]:
+    """
+    Checks several sentences, POS tagging of all of them is made in one batch.
+    Results are immutable records, they are turned into SentenceDto only when given out
+
+    :argument
+    phrases -- sentences where missing articles are investigated, empty ones are paragraph separators
+
+    :argument
+    workers -- number of processes to spread sentences over, see process_sentences_in_pool()
+
+    :argument
+    executor -- already running pool of workers to reuse, see process_sentences_in_pool()
+
+    :returns
+    results for every sentence in the same order
+    """
+    if workers > 1 and len(phrases) > 1:
+        return process_sentences_in_pool(phrases, workers, executor, preloading)
+
+    complete_preloading(preloading)
+
+    answer: List[SentenceResult] = [SEPARATOR if phrase == '' else None for phrase in phrases]
+    to_process: List[int] = [index for index, phrase in enumerate(phrases) if phrase != '']
+    trees = get_trees_from_sentences([phrases[index] for index in to_process], preloading)
+    for index, (tree, named_entities) in zip(to_process, trees):
+        answer[index] = resolve_sentence(phrases[index], tree, named_entities, preloading)
+    return answer
+
+
+# dictionaries and nltk models of a worker process, see init_worker()
+worker_preloading: Preloading = None
+
+# how many chunks of sentences every worker gets, more chunks balance the load better
+CHUNKS_PER_WORKER: int = 4
+
+
+def init_worker(ne_backend: str = None, tagger_backend: str = None, contractions: Dict[str, str] = None,
+                rules_fix_pos_tagging: List[Dict] = None, uncountable_nouns_list: List[str] = None,
+                gazetteer: List[str] = None, fingerprint: str = None):
+    """
+    Initializer of a worker process: loads dictionaries and nltk models once per worker.
+    Dictionaries of the parent are used if given, so that the worker checks sentences the same as the parent does,
+    and its fingerprint must be the same as the parent's one, otherwise results would be cached under a wrong one
+    """
+    global worker_preloading
+    if contractions is None:
+        worker_preloading = load_preloading(ne_backend, tagger_backend)
+        return
+    worker_preloading = Preloading(contractions, rules_fix_pos_tagging, uncountable_nouns_list, True,
+                                   ne_backend=ne_backend, gazetteer=gazetteer, tagger_backend=tagger_backend)
+    complete_preloading(worker_preloading)
+    if worker_preloading.fingerprint != fingerprint:
+        raise RuntimeError(f"Fingerprint of worker {worker_preloading.fingerprint} "
+                           f"differs from fingerprint of parent {fingerprint}")
+
+
+def process_chunk(phrases: List[str]) -> List[SentenceResult]:
+    """
+    Checks a chunk of sentences in a worker process
+    """
+    return check_sentences(phrases, worker_preloading)
+
+
+def create_pool(workers: int, preloading: Preloading = None) -> ProcessPoolExecutor:
+    """
+    Starts a pool of processes, every one of them loads nltk models once
+    with the same dictionaries and backends as preloading has, the default ones if preloading is not given
+    """
+    if preloading is None:
+        return ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+    complete_preloading(preloading)
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                               initargs=(preloading.ne_backend, preloading.tagger_backend, preloading.contractions,
+                                         preloading.rules_fix_pos_tagging, preloading.uncountable_nouns_list,
+                                         preloading.gazetteer, preloading.fingerprint))
+
+
+def process_sentences_in_pool(phrases: List[str], workers: int, executor: Executor = None,
+                              preloading: Preloading = None) -> List[SentenceResult]:
+    """
+    Splits sentences into chunks and checks them in a pool of processes
+
+    :argument
+    phrases -- sentences where missing articles are investigated, empty ones are paragraph separators
+
+    :argument
+    workers -- number of processes
+
+    :argument
+    executor -- pool created by create_pool(), a new one is started and stopped if not given
+
+    :argument
+    preloading -- object which dictionaries and backends a new pool uses, see create_pool()
+
+    :returns
+    results for every sentence in the original order
+    """
+    chunk_size: int = max(1, -(-len(phrases) // (workers * CHUNKS_PER_WORKER)))
+    chunks: List[List[str]] = [phrases[start:start + chunk_size] for start in range(0, len(phrases), chunk_size)]
+    if executor is None:
+        with create_pool(workers, preloading) as executor:
+            return process_sentences_in_pool(phrases, workers, executor)
+
+    answer: List[SentenceResult] = []
+    for result_for_chunk in executor.map(process_chunk, chunks):
+        answer += result_for_chunk
+    return answer
+
+
+def process_text(text: str, use_cache: bool = False, preloading: Preloading = None,
+                 workers: int = 1, cache: SentenceCache = None, with_offsets: bool = False,
+                 batcher: MicroBatcher = None) -> List[SentenceDto]:
     """
     Runs the program to check text
 
@@ -48,66 +253,215 @@ def process_text(text: str, use_cache: bool = False) -> List[SentenceDto]:
     :argument
     use_cache -- whether cache is needed to use, experimental
 
+    :argument
+    preloading -- object containing dictionaries, loaded on the fly if not given (see ArticleEngine)
+
+    :argument
+    workers -- number of processes to check sentences in parallel, 1 means in the current process
+
+    :argument
+    cache -- cache to use if use_cache, the default one is opened if not given, see SqliteSentenceCache
+
+    :argument
+    with_offsets -- whether sentences and suggestions get their positions in the text, see add_offsets()
+
+    :argument
+    batcher -- scheduler checking sentences together with concurrent requests instead of workers, see MicroBatcher
+
     :returns
     List of suggestions with start and end of NP and possible article replacements
     """
-    modules_updated: bool = download_nltk_modules()
-    contractions, rules_fix_pos_tagging, uncountable_nouns_list = load_dictionaries()
-    preloading = Preloading(contractions, rules_fix_pos_tagging, uncountable_nouns_list, modules_updated)
+    if preloading is None:
+        preloading = load_preloading()
     if not use_cache:
-        list_of_sentences = get_sentence_tokens(text)
-        answer: List[SentenceDto] = []
-        for phrase in list_of_sentences:
-            result_for_sentence = process_sentence(phrase, preloading)
-            answer.append(result_for_sentence)
+        sentences: List[SentenceSpan] = segment_text(text, get_sentence_tokenizer(preloading))
+        phrases: List[str] = [sentence.text for sentence in sentences]
+        answer: List[SentenceDto] = batcher.process_sentences(phrases) if batcher is not None else \
+            process_sentences(phrases, preloading, workers)
+        if with_offsets:
+            answer = [add_offsets(result, sentence) for result, sentence in zip(answer, sentences)]
     else:
-        answer = process_text_with_cache(text, preloading)
+        answer = process_text_with_cache(text, preloading, workers, cache, with_offsets, batcher)
 
     return answer
 
 
-def process_text_with_cache(text: str, preloading: Preloading) -> List[SentenceDto]:
+def get_sentence_tokenizer(preloading: Preloading) -> PunktSentenceTokenizer:
     """
-    Runs the program to check text using/adding cache
+    :returns
+    Punkt model of preloading, loaded with the rest of missing parts on the first call, see complete_preloading()
+    """
+    complete_preloading(preloading)
+    return preloading.sentence_tokenizer
+
+
+def add_offsets(result: SentenceDto, sentence: SentenceSpan) -> SentenceDto:
+    """
+    Adds positions in the text to result of a sentence: span and paragraph of the sentence,
+    documentStart and documentEnd of every suggestion. Result itself is not changed, it may be cached
 
     :argument
-    text -- text where missing articles are investigated
+    result -- suggestions for the sentence, positions of them are relative to the sentence
+
+    :argument
+    sentence -- span of the sentence in the text, see preprocessing_utils.segment_text()
 
     :returns
-    List of suggestions with start and end of NP and possible article replacements
+    new result with positions in the text
     """
-    hashes_json = os.path.join(os.path.dirname(__file__), "../../resources/dictionaries/hashes.json")
-    if os.path.exists(hashes_json):
-        with open(hashes_json, "r") as f:
-            hashes_exist = f.read()
-        cache = json.loads(hashes_exist)
-    else:
-        cache = {}
-
-    list_of_sentences = get_sentence_tokens(text)
-    answer: List[SentenceDto] = []
-
-    for phrase in list_of_sentences:
-        md5_phrase = md5(phrase)
-        if md5_phrase in cache.keys():
-            is_added = False
-            for entry in cache[md5_phrase]:
-                if phrase in entry['text']:
-                    answer.append(entry)
-                    is_added = True
-                    break
-            if not is_added:
-                result_for_sentence = process_sentence(phrase, preloading)
-                answer.append(result_for_sentence)
-                cache[md5_phrase].append(result_for_sentence)
+    return {
+        'text': result['text'],
+        'start': sentence.start,
+        'end': sentence.end,
+        'paragraph': sentence.paragraph,
+        'suggestions': [
+            dict(suggestion, documentStart=sentence.start + suggestion['start'],
+                 documentEnd=sentence.start + suggestion['end'])
+            for suggestion in result['suggestions']
+        ]
+    }
+
+
+# number of sentences checked together while streaming, see iter_process_text()
+STREAM_BATCH_SIZE: int = 64
+
+
+def iter_process_text(stream: TextIO, use_cache: bool = False, preloading: Preloading = None,
+                      workers: int = 1, batch_size: int = STREAM_BATCH_SIZE,
+                      cache: SentenceCache = None, with_offsets: bool = False) -> Iterator[SentenceDto]:
+    """
+    Runs the program to check text read from stream.
+    Sentences are read and checked by small batches, so that memory does not grow with the text
+    and the first results are available before the whole text is read
+
+    :argument
+    stream -- text stream where missing articles are investigated
+
+    :argument
+    use_cache -- whether cache is needed to use, experimental
+
+    :argument
+    preloading -- object containing dictionaries, loaded on the fly if not given (see ArticleEngine)
+
+    :argument
+    workers -- number of processes to check sentences in parallel, 1 means in the current process
+
+    :argument
+    batch_size -- number of sentences checked together
+
+    :argument
+    cache -- cache to use if use_cache, the default one is opened if not given, see SqliteSentenceCache
+
+    :argument
+    with_offsets -- whether sentences and suggestions get their positions in the text, see add_offsets()
+
+    :returns
+    Suggestions for every sentence in the order of the text, the same as process_text() gives
+    """
+    if preloading is None:
+        preloading = load_preloading()
+    opened_cache: SqliteSentenceCache = None
+    if not use_cache:
+        cache = None
+    elif cache is None:
+        cache = opened_cache = SqliteSentenceCache()
+    sentences: Iterator[SentenceSpan] = iter_segment_text(stream, tokenizer=get_sentence_tokenizer(preloading))
+
+    def process_batch(batch: List[SentenceSpan], executor: Executor = None) -> List[SentenceDto]:
+        phrases: List[str] = [sentence.text for sentence in batch]
+        if cache is None:
+            answer: List[SentenceDto] = process_sentences(phrases, preloading, workers, executor)
         else:
-            result_for_sentence = process_sentence(phrase, preloading)
-            answer.append(result_for_sentence)
-            cache[md5_phrase] = [result_for_sentence]
+            answer = process_sentences_with_cache(phrases, cache, preloading, workers, executor)
+        if with_offsets:
+            answer = [add_offsets(result, sentence) for result, sentence in zip(answer, batch)]
+        return answer
 
-    cache = json.dumps(cache)
-    with open(hashes_json, "w") as f:
-        f.write(cache)
+    try:
+        if workers == 1:
+            for batch in iter(lambda: list(islice(sentences, batch_size)), []):
+                yield from process_batch(batch)
+        else:
+            # one pool for the whole stream, every batch gives several chunks to every worker
+            with create_pool(workers, preloading) as executor:
+                pool_batch_size: int = batch_size * workers * CHUNKS_PER_WORKER
+                for batch in iter(lambda: list(islice(sentences, pool_batch_size)), []):
+                    yield from process_batch(batch, executor)
+    finally:
+        if opened_cache is not None:
+            opened_cache.close()
 
-    return answer
 
+def process_sentences_with_cache(phrases: List[str], cache: SentenceCache, preloading: Preloading,
+                                 workers: int = 1, executor: Executor = None,
+                                 batcher: MicroBatcher = None) -> List[SentenceDto]:
+    """
+    Runs the program to check several sentences using/adding cache
+
+    :argument
+    phrases -- sentences where missing articles are investigated, empty ones are paragraph separators
+
+    :argument
+    cache -- cache of processed sentences, new results are added to it.
+    Results are kept separately for every fingerprint of preloading
+
+    :argument
+    workers -- number of processes to check sentences missing in cache
+
+    :argument
+    executor -- already running pool of workers to reuse, see process_sentences_in_pool()
+
+    :argument
+    batcher -- scheduler checking sentences missing in cache instead of workers, see MicroBatcher
+
+    :returns
+    List of suggestions for every sentence in the same order
+    """
+    complete_preloading(preloading)
+    unique_phrases: List[str] = list(dict.fromkeys(phrases))
+    found: Dict[str, SentenceDto] = cache.get_many(unique_phrases, preloading.fingerprint)
+
+    # process all sentences missing in cache in one batch
+    missing: List[str] = [phrase for phrase in unique_phrases if phrase not in found]
+    checked: List[SentenceDto] = batcher.process_sentences(missing) if batcher is not None else \
+        process_sentences(missing, preloading, workers, executor)
+    results: Dict[str, SentenceDto] = dict(zip(missing, checked))
+    cache.put_many(results, preloading.fingerprint)
+    found.update(results)
+
+    return [found[phrase] for phrase in phrases]
+
+
+def process_text_with_cache(text: str, preloading: Preloading, workers: int = 1,
+                            cache: SentenceCache = None, with_offsets: bool = False,
+                            batcher: MicroBatcher = None) -> List[SentenceDto]:
+    """
+    Runs the program to check text using/adding cache
+
+    :argument
+    text -- text where missing articles are investigated
+
+    :argument
+    workers -- number of processes to check sentences missing in cache
+
+    :argument
+    cache -- cache of processed sentences, the default one is opened if not given, see SqliteSentenceCache
+
+    :argument
+    with_offsets -- whether sentences and suggestions get their positions in the text, see add_offsets()
+
+    :argument
+    batcher -- scheduler checking sentences missing in cache instead of workers, see MicroBatcher
+
+    :returns
+    List of suggestions with start and end of NP and possible article replacements
+    """
+    if cache is None:
+        with SqliteSentenceCache() as cache:
+            return process_text_with_cache(text, preloading, workers, cache, with_offsets, batcher)
+    sentences: List[SentenceSpan] = segment_text(text, get_sentence_tokenizer(preloading))
+    answer: List[SentenceDto] = process_sentences_with_cache([sentence.text for sentence in sentences], cache,
+                                                             preloading, workers, batcher=batcher)
+    if with_offsets:
+        answer = [add_offsets(result, sentence) for result, sentence in zip(answer, sentences)]
+    return answer
@@ -0,0 +1,179 @@
+from typing import Callable, Dict, Iterable, List
+
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from src.processing.models.SentenceSpan import SentenceSpan
+from src.processing.models.TextEdit import TextEdit
+from src.processing.models.dtos import SentenceDto
+from src.processing.run_processing import add_offsets
+from src.processing.utils.preprocessing_utils import segment_text
+
+# number of characters compared at once while looking for the common prefix and suffix of two versions
+COMPARE_BLOCK_SIZE: int = 4096
+
+
+def get_common_prefix_length(first: str, second: str, limit: int) -> int:
+    """
+    :returns
+    length of the common prefix of two strings, not longer than limit
+    """
+    length: int = 0
+    while length + COMPARE_BLOCK_SIZE <= limit and \
+            first[length:length + COMPARE_BLOCK_SIZE] == second[length:length + COMPARE_BLOCK_SIZE]:
+        length += COMPARE_BLOCK_SIZE
+    while length < limit and first[length] == second[length]:
+        length += 1
+    return length
+
+
+def get_common_suffix_length(first: str, second: str, limit: int) -> int:
+    """
+    :returns
+    length of the common suffix of two strings, not longer than limit
+    """
+    first_end: int = len(first)
+    second_end: int = len(second)
+    length: int = 0
+    while length + COMPARE_BLOCK_SIZE <= limit and \
+            first[first_end - length - COMPARE_BLOCK_SIZE:first_end - length] == \
+            second[second_end - length - COMPARE_BLOCK_SIZE:second_end - length]:
+        length += COMPARE_BLOCK_SIZE
+    while length < limit and first[first_end - length - 1] == second[second_end - length - 1]:
+        length += 1
+    return length
+
+
+class DocumentSession:
+    """
+    Document checked again and again while it is edited
+
+    The session keeps the text, its sentences and their results. A new version (see update()) or a list of edits
+    (see apply_edits()) gives the changed range of the text: only the lines touched by it are segmented again
+    and only sentences of them which were not there before are checked. Sentences before the range are left
+    as they are, sentences after it are only moved, so that their text is neither compared nor hashed.
+    The number of sentences checked by the latest change is kept in recomputed
+    """
+    def __init__(self, process: Callable[[List[str]], List[SentenceDto]], tokenizer: PunktSentenceTokenizer,
+                 text: str = ''):
+        """
+        :argument
+        process -- function checking a list of sentences, e.g. run_processing.process_sentences()
+
+        :argument
+        tokenizer -- Punkt model, see preprocessing_utils.load_sentence_tokenizer()
+
+        :argument
+        text -- the first version of the document
+        """
+        self.process: Callable[[List[str]], List[SentenceDto]] = process
+        self.tokenizer: PunktSentenceTokenizer = tokenizer
+        self.text: str = ''
+        self.sentences: List[SentenceSpan] = []
+        # results of sentences with positions relative to them, in the order of sentences
+        self.results: List[SentenceDto] = []
+        self.recomputed: int = 0
+        self.total_recomputed: int = 0
+        if text:
+            self.update(text)
+
+    def update(self, text: str) -> List[SentenceDto]:
+        """
+        Checks a new version of the document: the changed range is found by the common prefix and suffix
+        with the previous version
+
+        :returns
+        results of all sentences with positions in the new version, see get_results()
+        """
+        limit: int = min(len(self.text), len(text))
+        prefix: int = get_common_prefix_length(self.text, text, limit)
+        suffix: int = get_common_suffix_length(self.text, text, limit - prefix)
+        return self.replace_range(text, prefix, len(self.text) - suffix, len(text) - suffix)
+
+    def apply_edits(self, edits: Iterable[TextEdit]) -> List[SentenceDto]:
+        """
+        Checks the document after edits, every one is given in positions of the text after the previous ones.
+        The changed range is the union of edits, versions of the text are not compared
+
+        :returns
+        results of all sentences with positions in the new version, see get_results()
+        """
+        edits: List[TextEdit] = list(edits)
+        if not edits:
+            self.recomputed = 0
+            return self.get_results()
+        text: str = self.text
+        start: int = len(text)
+        suffix: int = len(text)
+        for edit in edits:
+            if not 0 <= edit.start <= edit.end <= len(text):
+                raise ValueError(f"Edit {edit.start}:{edit.end} is out of text of length {len(text)}")
+            start = min(start, edit.start)
+            suffix = min(suffix, len(text) - edit.end)
+            text = text[:edit.start] + edit.text + text[edit.end:]
+        return self.replace_range(text, start, len(self.text) - suffix, len(text) - suffix)
+
+    def replace_range(self, text: str, start: int, old_end: int, new_end: int) -> List[SentenceDto]:
+        """
+        Takes a new version of the document which differs from the previous one only in a range
+
+        :argument
+        text -- the new version
+
+        :argument
+        start -- start of the changed range, the same in both versions
+
+        :argument
+        old_end, new_end -- end of the changed range in the previous and the new version
+
+        :returns
+        results of all sentences with positions in the new version, see get_results()
+        """
+        old_text: str = self.text
+        # sentences never cross line breaks, so that the whole lines touched by the range are segmented again
+        line_start: int = text.rfind('\n', 0, start) + 1
+        old_line_end: int = old_text.find('\n', old_end)
+        old_line_end = len(old_text) if old_line_end == -1 else old_line_end
+        new_line_end: int = text.find('\n', new_end)
+        new_line_end = len(text) if new_line_end == -1 else new_line_end
+
+        first: int = 0
+        while first < len(self.sentences) and self.sentences[first].start < line_start:
+            first += 1
+        last: int = first
+        while last < len(self.sentences) and self.sentences[last].start < old_line_end:
+            last += 1
+
+        paragraph: int = self.sentences[first - 1].paragraph + 1 if first and line_start else 0
+        new_sentences: List[SentenceSpan] = segment_text(text, self.tokenizer, line_start, new_line_end, paragraph)
+
+        # sentences of touched lines which are not changed, e.g. the neighbours of an edited one, are not checked
+        previous: Dict[str, SentenceDto] = dict(zip((sentence.text for sentence in self.sentences[first:last]),
+                                                    self.results[first:last]))
+        phrases: List[str] = list(dict.fromkeys(sentence.text for sentence in new_sentences
+                                                if sentence.text not in previous))
+        if phrases:
+            previous.update(zip(phrases, self.process(phrases)))
+        new_results: List[SentenceDto] = [previous[sentence.text] for sentence in new_sentences]
+
+        shift: int = len(text) - len(old_text)
+        paragraph_shift: int = (text.count('\n', line_start, new_line_end) -
+                                old_text.count('\n', line_start, old_line_end))
+        moved: List[SentenceSpan] = [
+            SentenceSpan(sentence.text, sentence.start + shift, sentence.end + shift,
+                         sentence.paragraph + paragraph_shift)
+            for sentence in self.sentences[last:]
+        ] if shift or paragraph_shift else self.sentences[last:]
+
+        self.sentences = self.sentences[:first] + new_sentences + moved
+        self.results = self.results[:first] + new_results + self.results[last:]
+        self.text = text
+        self.recomputed = sum(1 for phrase in phrases if phrase)
+        self.total_recomputed += self.recomputed
+        return self.get_results()
+
+    def get_results(self) -> List[SentenceDto]:
+        """
+        :returns
+        results of all sentences of the current version with their positions in it, see run_processing.add_offsets()
+        """
+        return [add_offsets(result, sentence) for result, sentence in zip(self.results, self.sentences)]
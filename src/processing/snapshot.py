@@ -0,0 +1,116 @@
+import marshal
+import mmap
+import os
+import struct
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# increase after changing the format or the content of snapshot, older snapshots are ignored then
+SNAPSHOT_VERSION: int = 2
+
+MAGIC: bytes = b'JBTTSNAP'
+
+# magic, version and length of header
+PREFIX = struct.Struct('<8sII')
+
+# sections are aligned, so that arrays of float64 are mapped without copying
+ALIGNMENT: int = 8
+
+
+def get_default_snapshot_path() -> str:
+    """
+    Location of snapshot of resources: JBTT_SNAPSHOT_PATH environment variable if set,
+    otherwise resources/jbtt.snapshot
+
+    :returns
+    path to the snapshot file
+    """
+    return os.environ.get('JBTT_SNAPSHOT_PATH') or \
+        os.path.join(os.path.dirname(__file__), '../../resources/jbtt.snapshot')
+
+
+def write_snapshot(path: str, header: Dict, sections: Dict[str, object], arrays: Dict[str, np.ndarray]):
+    """
+    Writes snapshot file atomically: prefix, header and sections one after another
+
+    :argument
+    header -- information to check whether snapshot is up to date, builtin types only
+
+    :argument
+    sections -- objects of builtin types serialized by marshal
+
+    :argument
+    arrays -- numpy arrays written as raw bytes
+    """
+    blobs: List[Tuple[str, str, bytes, tuple]] = \
+        [(name, 'marshal', marshal.dumps(value), ()) for name, value in sections.items()] + \
+        [(name, str(array.dtype), np.ascontiguousarray(array).tobytes(), array.shape)
+         for name, array in arrays.items()]
+
+    # offsets are relative to the end of header, so that header does not depend on its own length
+    layout: Dict[str, Tuple[str, int, int, tuple]] = {}
+    offset: int = 0
+    for name, kind, blob, shape in blobs:
+        layout[name] = (kind, offset, len(blob), shape)
+        offset = align(offset + len(blob))
+    header_blob: bytes = marshal.dumps(dict(header, sections=layout))
+    header_end: int = align(PREFIX.size + len(header_blob))
+
+    temporary_path: str = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'wb') as f:
+        f.write(PREFIX.pack(MAGIC, SNAPSHOT_VERSION, len(header_blob)))
+        f.write(header_blob)
+        f.write(b'\0' * (header_end - f.tell()))
+        for name, kind, blob, shape in blobs:
+            f.write(blob)
+            position: int = f.tell() - header_end
+            f.write(b'\0' * (align(position) - position))
+    os.replace(temporary_path, path)
+
+
+def align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class Snapshot:
+    """
+    Snapshot of resources opened by memory map
+
+    Nothing is parsed on opening except small header. Arrays are views of mapped pages,
+    so that they are loaded lazily by OS and shared between processes forked after opening
+    """
+    def __init__(self, path: str):
+        self.path: str = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < PREFIX.size:
+            raise ValueError(f"Unsupported snapshot {path}")
+        magic, version, header_length = PREFIX.unpack_from(self.map)
+        if magic != MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot {path}")
+        self.header: Dict = marshal.loads(self.map[PREFIX.size:PREFIX.size + header_length])
+        self.data_offset: int = align(PREFIX.size + header_length)
+        self.sections: Dict[str, Tuple[str, int, int, tuple]] = self.header['sections']
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.sections
+
+    def get(self, name: str):
+        """
+        :returns
+        object of section deserialized by marshal
+        """
+        kind, offset, length, _ = self.sections[name]
+        start: int = self.data_offset + offset
+        return marshal.loads(self.map[start:start + length])
+
+    def get_array(self, name: str) -> np.ndarray:
+        """
+        :returns
+        read-only array mapped from the file without copying
+        """
+        kind, offset, length, shape = self.sections[name]
+        dtype = np.dtype(kind)
+        return np.frombuffer(self.map, dtype=dtype, count=length // dtype.itemsize,
+                             offset=self.data_offset + offset).reshape(shape)
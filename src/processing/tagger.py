@@ -0,0 +1,224 @@
+import os
+from typing import Dict, Iterable, List, Tuple
+
+import nltk
+import numpy as np
+from nltk.tag.perceptron import PerceptronTagger
+
+# backend of POS tagging: nltk.pos_tag_sents or ArrayPerceptronTagger, both give the same tags
+TAGGER_BACKENDS: Tuple[str, ...] = ('nltk', 'numpy')
+DEFAULT_TAGGER_BACKEND: str = 'nltk'
+
+START: List[str] = PerceptronTagger.START
+END: List[str] = PerceptronTagger.END
+
+
+def get_default_tagger_backend(default: str = DEFAULT_TAGGER_BACKEND) -> str:
+    """
+    Backend of POS tagging: JBTT_TAGGER_BACKEND environment variable if set, otherwise the default one
+
+    :argument
+    default -- backend used if the variable is not set, e.g. numpy if snapshot has weights of tagger
+
+    :returns
+    name of backend, one of TAGGER_BACKENDS
+    """
+    backend: str = os.environ.get('JBTT_TAGGER_BACKEND') or default
+    if backend not in TAGGER_BACKENDS:
+        raise ValueError(f"Unknown tagger backend {backend!r}, expected one of {', '.join(TAGGER_BACKENDS)}")
+    return backend
+
+
+def create_tagger(backend: str):
+    """
+    :argument
+    backend -- name of backend, one of TAGGER_BACKENDS
+
+    :returns
+    tagger with method tag_sents(), see NltkTagger and ArrayPerceptronTagger
+    """
+    if backend == 'nltk':
+        return NltkTagger()
+    if backend == 'numpy':
+        return ArrayPerceptronTagger.load()
+    raise ValueError(f"Unknown tagger backend {backend!r}, expected one of {', '.join(TAGGER_BACKENDS)}")
+
+
+class NltkTagger:
+    """ Tagger recommended by nltk, see nltk.pos_tag_sents() """
+    def tag_sents(self, sentences: List[List[str]]) -> List[List[Tuple[str, str]]]:
+        return nltk.pos_tag_sents(sentences)
+
+
+def normalize(word: str) -> str:
+    """ Normalization of words in context, the same as PerceptronTagger.normalize() """
+    if '-' in word and word[0] != '-':
+        return '!HYPHEN'
+    if word.isdigit() and len(word) == 4:
+        return '!YEAR'
+    if word and word[0].isdigit():
+        return '!DIGITS'
+    return word.lower()
+
+
+def get_features(i: int, word: str, context: List[str], prev: str, prev2: str) -> Tuple[str, ...]:
+    """
+    Features of a word in the same order as PerceptronTagger._get_features() adds them,
+    so that their weights are summed in the same order
+
+    :argument
+    i -- position of the word in the sentence
+
+    :argument
+    context -- normalized words of the sentence between START and END
+
+    :argument
+    prev, prev2 -- tags of two previous words
+
+    :returns
+    names of features
+    """
+    i += len(START)
+    return (
+        'bias',
+        'i suffix ' + word[-3:],
+        'i pref1 ' + (word[0] if word else ''),
+        'i-1 tag ' + prev,
+        'i-2 tag ' + prev2,
+        'i tag+i-2 tag ' + prev + ' ' + prev2,
+        'i word ' + context[i],
+        'i-1 tag+i word ' + prev + ' ' + context[i],
+        'i-1 word ' + context[i - 1],
+        'i-1 suffix ' + context[i - 1][-3:],
+        'i-2 word ' + context[i - 2],
+        'i+1 word ' + context[i + 1],
+        'i+1 suffix ' + context[i + 1][-3:],
+        'i+2 word ' + context[i + 2]
+    )
+
+
+class ArrayPerceptronTagger:
+    """
+    Averaged perceptron tagger with weights of nltk PerceptronTagger kept in a matrix
+
+    Words of the same position in all sentences of a batch are scored at once: weights of their features
+    are gathered from the matrix and summed by vectorized operations.
+    Tags are exactly the same as nltk gives:
+    weights are summed in float64 in the same order of features, unknown features have zero weights,
+    classes are ordered by descending label, so that the first maximum is the same as nltk chooses on ties
+    """
+    def __init__(self, features: List[str], tagdict: Dict[str, str], classes: List[str], weights: np.ndarray):
+        """
+        :argument
+        features -- names of features, a row of weights for every one and the last row for unknown features
+
+        :argument
+        classes -- labels ordered descending, a column of weights for every one
+
+        :argument
+        weights -- matrix of weights, may be read-only, e.g. mapped from snapshot (see load_utils.open_snapshot())
+        """
+        self.features: List[str] = features
+        self.tagdict: Dict[str, str] = tagdict
+        self.classes: List[str] = classes
+        self.feature_index: Dict[str, int] = {feature: index for index, feature in enumerate(features)}
+        self.unknown_feature: int = len(features)
+        self.weights: np.ndarray = weights
+
+    @classmethod
+    def from_weights(cls, weights: Dict[str, Dict[str, float]], tagdict: Dict[str, str],
+                     classes: Iterable[str]) -> 'ArrayPerceptronTagger':
+        """
+        :argument
+        weights -- weights of nltk AveragedPerceptron: feature -> label -> weight
+
+        :returns
+        tagger with the weights in a matrix
+        """
+        classes: List[str] = sorted(classes, reverse=True)
+        class_index: Dict[str, int] = {label: index for index, label in enumerate(classes)}
+        features: List[str] = list(weights)
+        matrix: np.ndarray = np.zeros((len(features) + 1, len(classes)), dtype=np.float64)
+        for index, feature in enumerate(features):
+            for label, weight in weights[feature].items():
+                matrix[index, class_index[label]] = weight
+        return cls(features, tagdict, classes, matrix)
+
+    @classmethod
+    def from_perceptron(cls, tagger: PerceptronTagger) -> 'ArrayPerceptronTagger':
+        """
+        :returns
+        tagger with weights of trained nltk PerceptronTagger
+        """
+        return cls.from_weights(tagger.model.weights, tagger.tagdict, tagger.classes)
+
+    @classmethod
+    def load(cls) -> 'ArrayPerceptronTagger':
+        """
+        :returns
+        tagger with weights of nltk averaged_perceptron_tagger model
+        """
+        return cls.from_perceptron(PerceptronTagger())
+
+    def tag(self, tokens: List[str]) -> List[Tuple[str, str]]:
+        """
+        Tags one sentence, see tag_sents()
+        """
+        return self.tag_sents([tokens])[0]
+
+    def tag_sents(self, sentences: List[List[str]]) -> List[List[Tuple[str, str]]]:
+        """
+        Tags tokenized sentences.
+        Tags of a word depend on tags of previous ones, so that sentences are tagged position by position,
+        all words of the same position are scored together
+
+        :argument
+        sentences -- list of words for every sentence
+
+        :returns
+        list of tuples (word, tag) for every sentence
+        """
+        contexts: List[List[str]] = [START + [normalize(word) for word in tokens] + END for tokens in sentences]
+        tags: List[List[str]] = [[''] * len(tokens) for tokens in sentences]
+        prev: List[str] = [START[0]] * len(sentences)
+        prev2: List[str] = [START[1]] * len(sentences)
+        active: List[int] = list(range(len(sentences)))
+        position: int = 0
+        while active:
+            active = [index for index in active if position < len(sentences[index])]
+            to_score: List[int] = []
+            feature_ids: List[List[int]] = []
+            for index in active:
+                word: str = sentences[index][position]
+                tag: str = self.tagdict.get(word)
+                if tag:
+                    tags[index][position] = tag
+                else:
+                    to_score.append(index)
+                    feature_ids.append([
+                        self.feature_index.get(feature, self.unknown_feature)
+                        for feature in get_features(position, word, contexts[index], prev[index], prev2[index])
+                    ])
+            if to_score:
+                for index, best in zip(to_score, self.predict(np.array(feature_ids, dtype=np.intp))):
+                    tags[index][position] = self.classes[best]
+            for index in active:
+                prev2[index] = prev[index]
+                prev[index] = tags[index][position]
+            position += 1
+        return [list(zip(tokens, sentence_tags)) for tokens, sentence_tags in zip(sentences, tags)]
+
+    def predict(self, feature_ids: np.ndarray) -> np.ndarray:
+        """
+        :argument
+        feature_ids -- matrix of feature ids, a row for every word
+
+        :returns
+        index of the best class for every word
+        """
+        # fancy indexing copies rows, so that read-only weights are not changed
+        scores: np.ndarray = self.weights[feature_ids[:, 0]]
+        # summed one feature after another, like nltk does, so that rounding is the same
+        for column in range(1, feature_ids.shape[1]):
+            scores += self.weights[feature_ids[:, column]]
+        return scores.argmax(axis=1)
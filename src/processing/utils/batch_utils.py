@@ -0,0 +1,129 @@
+import io
+import json
+import os
+from typing import Any, Iterator, List, NamedTuple, Optional
+
+# maximum size of body of a batch request in bytes
+DEFAULT_BATCH_MAX_BYTES: int = 10 * 1024 * 1024
+
+# maximum number of documents in a batch request
+DEFAULT_BATCH_MAX_DOCUMENTS: int = 10_000
+
+
+class BatchDocument(NamedTuple):
+    """ Document of a batch request: text to check or error why it cannot be checked """
+    index: int
+    id: Any
+    text: Optional[str]
+    error: Optional[str] = None
+
+
+class BatchTooLarge(ValueError):
+    """ Batch request exceeds limits, see get_batch_limits() """
+
+
+def get_batch_limits() -> (int, int):
+    """
+    Limits of a batch request: JBTT_BATCH_MAX_BYTES and JBTT_BATCH_MAX_DOCUMENTS environment variables if set,
+    otherwise the defaults
+
+    :returns
+    maximum size of body in bytes and maximum number of documents
+    """
+    max_bytes: str = os.environ.get('JBTT_BATCH_MAX_BYTES')
+    max_documents: str = os.environ.get('JBTT_BATCH_MAX_DOCUMENTS')
+    return int(max_bytes) if max_bytes else DEFAULT_BATCH_MAX_BYTES, \
+        int(max_documents) if max_documents else DEFAULT_BATCH_MAX_DOCUMENTS
+
+
+def create_document(index: int, item: Any) -> BatchDocument:
+    """
+    :argument
+    item -- text or object {"id": ..., "text": ...}
+
+    :returns
+    document, with error if the item has no text
+    """
+    if isinstance(item, str):
+        return BatchDocument(index, None, item)
+    if isinstance(item, dict):
+        text: Any = item.get('text')
+        if isinstance(text, str):
+            return BatchDocument(index, item.get('id'), text)
+        return BatchDocument(index, item.get('id'), None, "Document has no text")
+    return BatchDocument(index, None, None, "Document must be a text or an object with text")
+
+
+def parse_documents(body: bytes, ndjson: bool, max_documents: int = DEFAULT_BATCH_MAX_DOCUMENTS) \
+        -> List[BatchDocument]:
+    """
+    Parses body of a batch request: JSON array of documents or NDJSON, a document per line.
+    A broken line of NDJSON is an error of its document only
+
+    :argument
+    body -- body of the request in UTF-8
+
+    :argument
+    ndjson -- whether body is NDJSON, otherwise it is a JSON array
+
+    :argument
+    max_documents -- maximum number of documents, BatchTooLarge is raised if there are more
+
+    :returns
+    documents in the order of the request
+    """
+    text: str = body.decode('utf-8')
+    if ndjson:
+        lines: List[str] = [line for line in text.splitlines() if line.strip()]
+        if len(lines) > max_documents:
+            raise BatchTooLarge(f"Batch has more than {max_documents} documents")
+        documents: List[BatchDocument] = []
+        for index, line in enumerate(lines):
+            try:
+                documents.append(create_document(index, json.loads(line)))
+            except ValueError as error:
+                documents.append(BatchDocument(index, None, None, f"Invalid JSON: {error}"))
+        return documents
+
+    items: Any = json.loads(text)
+    if not isinstance(items, list):
+        raise ValueError("Batch must be a JSON array of documents")
+    if len(items) > max_documents:
+        raise BatchTooLarge(f"Batch has more than {max_documents} documents")
+    return [create_document(index, item) for index, item in enumerate(items)]
+
+
+def iter_batch_results(engine, documents: List[BatchDocument], per_sentence: bool = False,
+                       with_offsets: bool = False) -> Iterator[str]:
+    """
+    Checks documents one after another and gives NDJSON lines as soon as they are ready.
+    An error of a document is reported in its line, the rest of the batch is checked anyway
+
+    :argument
+    engine -- warm engine, see ArticleEngine
+
+    :argument
+    per_sentence -- whether a line is given for every sentence ({"index", "id", "sentence"})
+    instead of one for every document ({"index", "id", "sentences"})
+
+    :argument
+    with_offsets -- whether sentences and suggestions get their positions in the document
+
+    :returns
+    lines of NDJSON, every one ends with a line break
+    """
+    for document in documents:
+        header: dict = {'index': document.index, 'id': document.id}
+        if document.error is not None:
+            yield json.dumps(dict(header, error=document.error)) + '\n'
+            continue
+        try:
+            if per_sentence:
+                for sentence in engine.iter_process_text(io.StringIO(document.text), with_offsets=with_offsets):
+                    yield json.dumps(dict(header, sentence=sentence)) + '\n'
+                yield json.dumps(dict(header, done=True)) + '\n'
+            else:
+                sentences = engine.process_text(document.text, with_offsets=with_offsets)
+                yield json.dumps(dict(header, sentences=sentences)) + '\n'
+        except Exception as error:
+            yield json.dumps(dict(header, error=f"{type(error).__name__}: {error}")) + '\n'
@@ -1,6 +1,39 @@
 import os, json
-from typing import Dict, List, Tuple
+import hashlib
+from typing import Dict, List, Optional, Tuple
 import nltk
+import numpy as np
+
+from src.processing.cache import NounGroupCache
+from src.processing.checkers import RULES_VERSION
+from src.processing.chunker import FiniteStateChunker
+from src.processing.lexicon import Lexicon
+from src.processing.models.Preloading import Preloading
+from src.processing.named_entities import create_recognizer, get_default_ne_backend
+from src.processing.snapshot import Snapshot, get_default_snapshot_path, write_snapshot
+from src.processing.tagger import ArrayPerceptronTagger, create_tagger, get_default_tagger_backend, \
+    DEFAULT_TAGGER_BACKEND
+from src.processing.preprocessing import create_chunk_parser, GRAMMAR
+from src.processing.utils.preprocessing_utils import create_sentence_tokenizer, get_sentence_tokenizer_parameters, \
+    load_sentence_tokenizer
+
+DICTIONARIES_PATH: str = os.path.join(os.path.dirname(__file__), "../../../resources/dictionaries")
+
+# dictionaries compiled into snapshot, see build_snapshot()
+DICTIONARY_FILES: List[str] = [
+    'contractions.json',
+    'fix_pos_tagging_dict.json',
+    'uncountable_nouns_list.json',
+    'named_entities.json'
+]
+
+# files of nltk models which results depend on, see get_nltk_models_versions()
+NLTK_MODEL_FILES: List[str] = [
+    'tokenizers/punkt/english.pickle',
+    'taggers/averaged_perceptron_tagger/averaged_perceptron_tagger.pickle',
+    'chunkers/maxent_ne_chunker/english_ace_binary.pickle',
+    'corpora/words/en'
+]
 
 
 def load_contractions() -> Dict[str, str]:
@@ -11,7 +44,7 @@ def load_contractions() -> Dict[str, str]:
     :returns
     Dictionary of contractions
     """
-    with open(os.path.join(os.path.dirname(__file__), "../../../resources/dictionaries/contractions.json")) as f:
+    with open(os.path.join(DICTIONARIES_PATH, "contractions.json")) as f:
         contractions_raw: str = f.read()
         contractions: Dict[str, str] = json.loads(contractions_raw)
     return contractions
@@ -24,7 +57,7 @@ def load_rules_fix_pos_tagging() -> List[Dict]:
     :returns
     Dictionary of rules to fix wrong POS tagging from nltk
     """
-    with open(os.path.join(os.path.dirname(__file__), "../../../resources/dictionaries/fix_pos_tagging_dict.json")) as f:
+    with open(os.path.join(DICTIONARIES_PATH, "fix_pos_tagging_dict.json")) as f:
         fix_rules_raw: str = f.read()
         rules: List[Dict] = json.loads(fix_rules_raw)
     return rules
@@ -37,12 +70,25 @@ def load_uncountable_nouns_list() -> List[str]:
     :returns
     List of uncountable nouns
     """
-    with open(os.path.join(os.path.dirname(__file__), "../../../resources/dictionaries/uncountable_nouns_list.json")) as f:
+    with open(os.path.join(DICTIONARIES_PATH, "uncountable_nouns_list.json")) as f:
         uncountable_nouns_raw = f.read()
         uncountable_nouns_list = json.loads(uncountable_nouns_raw)['nouns']
     return uncountable_nouns_list
 
 
+def load_gazetteer() -> List[str]:
+    """
+    Loads a "dictionary" of known names for rules backend of Named Entity recognition
+
+    :returns
+    List of names
+    """
+    with open(os.path.join(DICTIONARIES_PATH, "named_entities.json")) as f:
+        names_raw = f.read()
+        names = json.loads(names_raw)['names']
+    return names
+
+
 def download_nltk_modules() -> bool:
     """
     Downloads necessary nltk modules if not exist
@@ -78,3 +124,194 @@ def load_dictionaries() -> Tuple[Dict[str, str], List[dict], List[str]]:
     rules_fix_pos_tagging: List[Dict] = load_rules_fix_pos_tagging()
     uncountable_nouns_list: List[str] = load_uncountable_nouns_list()
     return contractions, rules_fix_pos_tagging, uncountable_nouns_list
+
+
+def load_preloading(ne_backend: str = None, tagger_backend: str = None) -> Preloading:
+    """
+    Downloads nltk modules, loads dictionaries and compiles the grammar once.
+    Everything is taken from snapshot if it is up to date (see build_snapshot()), otherwise from the sources.
+    Complete snapshot was built with all nltk models downloaded, so that they are not looked for again.
+    Snapshot covers dictionaries, the grammar, Punkt model and weights of numpy tagger;
+    nltk tagger and maxent Named Entity chunker are still loaded from nltk pickles when they are used
+
+    :argument
+    ne_backend -- backend of Named Entity recognition, see named_entities.NE_BACKENDS;
+    JBTT_NE_BACKEND environment variable or maxent if not given
+    :argument
+    tagger_backend -- backend of POS tagging, see tagger.TAGGER_BACKENDS;
+    JBTT_TAGGER_BACKEND environment variable if not given, otherwise numpy if snapshot has its weights or nltk
+
+    :returns
+    object containing dictionaries and compiled grammar
+    """
+    snapshot: Snapshot = open_snapshot()
+    if snapshot is not None and is_complete_snapshot(snapshot):
+        modules_updated: bool = True
+    else:
+        modules_updated = download_nltk_modules()
+        # versions of downloaded models differ from the ones snapshot was built with
+        snapshot = open_snapshot()
+    ne_backend = ne_backend or get_default_ne_backend()
+    tagger_backend = tagger_backend or get_default_tagger_backend(
+        'numpy' if snapshot is not None and 'tagger_weights' in snapshot else DEFAULT_TAGGER_BACKEND)
+    if snapshot is not None:
+        preloading = Preloading(snapshot.get('contractions'), snapshot.get('rules_fix_pos_tagging'),
+                                snapshot.get('uncountable_nouns_list'), modules_updated,
+                                FiniteStateChunker.from_tables(snapshot.get('chunk_parser')),
+                                ne_backend=ne_backend, tagger_backend=tagger_backend)
+        if ne_backend == 'rules':
+            preloading.gazetteer = snapshot.get('gazetteer')
+    else:
+        contractions, rules_fix_pos_tagging, uncountable_nouns_list = load_dictionaries()
+        preloading = Preloading(contractions, rules_fix_pos_tagging, uncountable_nouns_list, modules_updated,
+                                create_chunk_parser(), ne_backend=ne_backend, tagger_backend=tagger_backend)
+        if ne_backend == 'rules':
+            preloading.gazetteer = load_gazetteer()
+    preloading.lexicon = Lexicon(preloading.uncountable_nouns_list, preloading.rules_fix_pos_tagging)
+    preloading.noun_group_cache = NounGroupCache()
+    preloading.named_entities_recognizer = create_recognizer(preloading.ne_backend, preloading.gazetteer or ())
+    if tagger_backend == 'numpy' and snapshot is not None and 'tagger_weights' in snapshot:
+        preloading.pos_tagger = ArrayPerceptronTagger(snapshot.get('tagger_features'), snapshot.get('tagger_tagdict'),
+                                                      snapshot.get('tagger_classes'),
+                                                      snapshot.get_array('tagger_weights'))
+    else:
+        preloading.pos_tagger = create_tagger(tagger_backend)
+    if snapshot is not None and 'sentence_tokenizer' in snapshot:
+        preloading.sentence_tokenizer = create_sentence_tokenizer(snapshot.get('sentence_tokenizer'))
+    else:
+        preloading.sentence_tokenizer = load_sentence_tokenizer()
+    preloading.fingerprint = get_fingerprint(preloading)
+    return preloading
+
+
+def get_nltk_models_versions() -> List[str]:
+    """
+    Identifies versions of nltk and its models by size and modification time of model files,
+    so that model files are not read
+
+    :returns
+    list of versions
+    """
+    versions: List[str] = [nltk.__version__]
+    for model_file in NLTK_MODEL_FILES:
+        try:
+            pointer = nltk.data.find(model_file)
+        except LookupError:
+            versions.append(f"{model_file}:missing")
+            continue
+        if isinstance(pointer, nltk.data.ZipFilePathPointer):
+            path, entry = pointer.zipfile.filename, pointer.entry
+        else:
+            path, entry = pointer.path, ''
+        stat = os.stat(path)
+        versions.append(f"{model_file}:{entry}:{stat.st_size}:{stat.st_mtime_ns}")
+    return versions
+
+
+def get_fingerprint(preloading: Preloading) -> str:
+    """
+    Fingerprint of everything what results of processing depend on:
+    content of dictionaries, grammar, version of rules, backend of Named Entity recognition
+    and versions of nltk models. Backend of POS tagging is not a part of it, all backends give the same tags.
+    Caches keep results separately for every fingerprint, so that a change of any of them invalidates cache
+
+    :argument
+    preloading -- object containing dictionaries
+
+    :returns
+    hash
+    """
+    sources = {
+        'contractions': preloading.contractions,
+        'rules_fix_pos_tagging': preloading.rules_fix_pos_tagging,
+        'uncountable_nouns_list': preloading.uncountable_nouns_list,
+        'grammar': GRAMMAR,
+        'rules_version': RULES_VERSION,
+        'ne_backend': preloading.ne_backend,
+        'gazetteer': preloading.gazetteer,
+        'nltk': get_nltk_models_versions()
+    }
+    return hashlib.sha256(json.dumps(sources, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def get_sources_versions() -> Dict:
+    """
+    Identifies versions of everything what snapshot is compiled from:
+    dictionaries by size and modification time of files, grammar and nltk models
+
+    :returns
+    versions of sources
+    """
+    dictionaries: List[str] = []
+    for dictionary_file in DICTIONARY_FILES:
+        stat = os.stat(os.path.join(DICTIONARIES_PATH, dictionary_file))
+        dictionaries.append(f"{dictionary_file}:{stat.st_size}:{stat.st_mtime_ns}")
+    return {'dictionaries': dictionaries, 'grammar': GRAMMAR, 'nltk': get_nltk_models_versions()}
+
+
+def build_snapshot(path: str = None) -> str:
+    """
+    Compiles dictionaries, the grammar, parameters of Punkt model and weights of POS tagger into one snapshot file,
+    so that they are loaded without parsing by load_preloading().
+    Punkt model and weights of POS tagger are skipped if nltk models are not downloaded
+
+    :argument
+    path -- snapshot file, see snapshot.get_default_snapshot_path()
+
+    :returns
+    path of written snapshot
+    """
+    path = path if path is not None else get_default_snapshot_path()
+    contractions, rules_fix_pos_tagging, uncountable_nouns_list = load_dictionaries()
+    sections: Dict[str, object] = {
+        'contractions': contractions,
+        'rules_fix_pos_tagging': rules_fix_pos_tagging,
+        'uncountable_nouns_list': uncountable_nouns_list,
+        'gazetteer': load_gazetteer(),
+        'chunk_parser': create_chunk_parser().to_tables()
+    }
+    arrays: Dict[str, np.ndarray] = {}
+    try:
+        tagger: ArrayPerceptronTagger = ArrayPerceptronTagger.load()
+    except LookupError:
+        tagger = None
+    if tagger is not None:
+        sections.update(tagger_features=tagger.features, tagger_tagdict=tagger.tagdict,
+                        tagger_classes=tagger.classes)
+        arrays['tagger_weights'] = tagger.weights
+    try:
+        sections['sentence_tokenizer'] = get_sentence_tokenizer_parameters(load_sentence_tokenizer())
+    except LookupError:
+        pass
+    write_snapshot(path, {'sources': get_sources_versions()}, sections, arrays)
+    return path
+
+
+def open_snapshot(path: str = None) -> Optional[Snapshot]:
+    """
+    Opens snapshot if it exists and is up to date
+
+    :argument
+    path -- snapshot file, see snapshot.get_default_snapshot_path()
+
+    :returns
+    snapshot or None, if the sources have to be loaded instead
+    """
+    path = path if path is not None else get_default_snapshot_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        snapshot: Snapshot = Snapshot(path)
+    except (OSError, ValueError, EOFError, TypeError, KeyError):
+        return None
+    if snapshot.header.get('sources') != get_sources_versions():
+        return None
+    return snapshot
+
+
+def is_complete_snapshot(snapshot: Snapshot) -> bool:
+    """
+    :returns
+    whether snapshot was built with all nltk models downloaded
+    """
+    return not any(version.endswith(':missing') for version in snapshot.header['sources']['nltk'])
@@ -1,60 +1,73 @@
 import hashlib
-from typing import Dict, List, Tuple
+import re
+from collections import defaultdict
+from typing import Dict, Iterator, List, TextIO, Tuple
 
-from src.processing.models.Replace import Replace
-from nltk import sent_tokenize
+import nltk
+from nltk.tokenize.punkt import PunktParameters, PunktSentenceTokenizer
+from src.processing.lexicon import Lexicon
+from src.processing.models.SentenceSpan import SentenceSpan
 
+# word of a sentence, the same as str.split() gives
+WORD = re.compile(r'\S+')
 
-def fix_pos_tagging(tags: List[Tuple[str, str]], rules: List[Dict]) -> List[Dict]:
+# Punkt model of sentence segmentation, see load_sentence_tokenizer()
+PUNKT_MODEL: str = 'tokenizers/punkt/english.pickle'
+
+# number of characters read from a stream at once, see iter_sentence_tokens()
+STREAM_CHUNK_SIZE: int = 65536
+
+
+def fix_pos_tagging(tags: List[Tuple[str, str]], lexicon: Lexicon) -> List[Tuple[str, str]]:
     """
-    Loads a dictionary of words which can have wrong POS tag after tagging.
-    Changes wrong tag for word in list of tuples of noun-tag
+    Changes wrong tag for word in list of tuples of noun-tag by rules of lexicon
 
     Example actor is recognized by nltk as adjective, meanwhile it's a noun.
 
     :argument
-    tags -- a list with tuples word-tag
+    tags -- a list with tuples word-tag, changed in place
 
     :argument
-    rules --dictionary of rules to fix wrong POS tagging from nltk
+    lexicon -- index of rules to fix wrong POS tagging from nltk
 
     :returns
-    List of rules to change tags
+    the same list of tags
     """
-    for tag in tags:
-        for rule in rules:
-            if rule['word'] == tag[0].lower() and tag[1] == rule['posTag']:
-                index = tags.index(tag)
-                tags[index] = (tag[0], rule['changeTo'])
-    return rules
+    for index, (word, tag) in enumerate(tags):
+        fixed_tag: str = lexicon.fix_tag(word, tag)
+        if fixed_tag is not None:
+            tags[index] = (word, fixed_tag)
+    return tags
 
 
-def prepare_sentence_for_tagging(sentence: str, contractions: Dict[str, str]) -> (List[str], List[Replace]):
+def prepare_sentence_for_tagging(sentence: str, contractions: Dict[str, str]) -> (List[str], List[Tuple[int, int]]):
     """
-    Attention! Changes the initial sentence
+    Splits sentence into tokens, the initial sentence is not changed
     Applies contractions from contractions dictionary to sentence
     Changes apostrophe, ), ( as they affect parsing sentence to tree
 
+    Every token keeps span of the word of the initial sentence it comes from,
+    all tokens of an expanded contraction have the span of the contraction
+
     :argument
-    sentence -- a sentence to change
+    sentence -- a sentence to split
 
     :argument
     contractions -- a dictionary of contractions of type it's -> it is
 
     :returns
-    Changed sentence (i.e list of tokens), list of replaces made
+    Changed sentence (i.e list of tokens), list of spans (start, end) of tokens in the initial sentence
     """
     symbols = ['(', ')', '/', '}', '{', '.', ',', ":", ";", "?", '!']
-    replaces: List[Replace] = []
-    replaced_sentence_tokens = []
+    replaced_sentence_tokens: List[str] = []
+    spans: List[Tuple[int, int]] = []
 
-    for index, word in enumerate(sentence.split()):
+    for match in WORD.finditer(sentence):
+        word: str = match.group()
         unified_word = word.lower().replace("`", "'").replace("’", "'")
-        rep: Replace
         has_changed_symbols = False
         for symbol in symbols:
             if symbol in unified_word:
-                rep = Replace(len(replaced_sentence_tokens), 1, word)
                 if symbol == '/':
                     unified_word = unified_word.replace('/', 'or')
                 if symbol == '}':
@@ -66,18 +79,15 @@ def prepare_sentence_for_tagging(sentence: str, contractions: Dict[str, str]) ->
                 has_changed_symbols = True
                 break
 
-        if unified_word in contractions.keys():
-            replace_words = contractions[unified_word].split()
-            rep = Replace(len(replaced_sentence_tokens), len(replace_words), word)
-            replaces.append(rep)
-            replaced_sentence_tokens += replace_words
+        if unified_word in contractions:
+            replace_words: List[str] = contractions[unified_word].split()
+        elif has_changed_symbols:
+            replace_words = [unified_word]
         else:
-            if has_changed_symbols:
-                replaces.append(rep)
-                replaced_sentence_tokens.append(unified_word)
-            else:
-                replaced_sentence_tokens.append(word)
-    return replaced_sentence_tokens, replaces
+            replace_words = [word]
+        replaced_sentence_tokens += replace_words
+        spans += [match.span()] * len(replace_words)
+    return replaced_sentence_tokens, spans
 
 
 def md5(string):
@@ -88,23 +98,189 @@ def md5(string):
     return hashlib.md5(string.encode('utf-8')).hexdigest()
 
 
-def get_sentence_tokens(text: str) -> List[str]:
+def load_sentence_tokenizer() -> PunktSentenceTokenizer:
+    """
+    :returns
+    Punkt model of sentence segmentation, the same as sent_tokenize() uses
+    """
+    return nltk.data.load(PUNKT_MODEL)
+
+
+def get_sentence_tokenizer_parameters(tokenizer: PunktSentenceTokenizer) -> Dict:
+    """
+    :returns
+    parameters of Punkt model as builtin types, so that they are kept in snapshot, see create_sentence_tokenizer()
+    """
+    parameters: PunktParameters = tokenizer._params
+    return {
+        'abbrev_types': sorted(parameters.abbrev_types),
+        'collocations': sorted(parameters.collocations),
+        'sent_starters': sorted(parameters.sent_starters),
+        'ortho_context': dict(parameters.ortho_context)
+    }
+
+
+def create_sentence_tokenizer(parameters: Dict) -> PunktSentenceTokenizer:
+    """
+    :argument
+    parameters -- parameters of Punkt model, see get_sentence_tokenizer_parameters()
+
+    :returns
+    Punkt model segmenting the same as the one parameters are taken from
+    """
+    punkt_parameters = PunktParameters()
+    punkt_parameters.abbrev_types = set(parameters['abbrev_types'])
+    punkt_parameters.collocations = set(tuple(collocation) for collocation in parameters['collocations'])
+    punkt_parameters.sent_starters = set(parameters['sent_starters'])
+    punkt_parameters.ortho_context = defaultdict(int, parameters['ortho_context'])
+    return PunktSentenceTokenizer(punkt_parameters)
+
+
+def segment_line(line: str, offset: int, paragraph: int, tokenizer: PunktSentenceTokenizer) -> List[SentenceSpan]:
+    """
+    Splits one line into sentences, the same as sent_tokenize() does
+
+    :argument
+    offset -- position of the line in the text
+
+    :returns
+    sentences with absolute spans
+    """
+    if line == '':
+        return []
+    return [SentenceSpan(line[start:end], offset + start, offset + end, paragraph)
+            for start, end in tokenizer.span_tokenize(line)]
+
+
+def segment_text(text: str, tokenizer: PunktSentenceTokenizer = None, start: int = 0, end: int = None,
+                 paragraph: int = 0) -> List[SentenceSpan]:
+    """
+    Splits a text into sentences by one pass: lines are found by position and split by the loaded Punkt model,
+    so that the text is not split into a list of lines and the model is not looked up for every line.
+    Every line is a paragraph, a separator with empty text and the span of the line break is put between paragraphs.
+    A line of whitespace only gives no sentence
+
+    :argument
+    text -- text to split
+
+    :argument
+    tokenizer -- Punkt model, see load_sentence_tokenizer(); loaded if not given
+
+    :argument
+    start, end -- range of whole lines to split, the whole text if not given
+
+    :argument
+    paragraph -- index of the paragraph the range starts with
+
+    :returns
+    sentences and separators with absolute spans in the text
+    """
+    if tokenizer is None:
+        tokenizer = load_sentence_tokenizer()
+    if end is None:
+        end = len(text)
+    sentences: List[SentenceSpan] = []
+    while True:
+        line_break: int = text.find('\n', start, end)
+        if line_break == -1:
+            sentences += segment_line(text[start:end], start, paragraph, tokenizer)
+            return sentences
+        sentences += segment_line(text[start:line_break], start, paragraph, tokenizer)
+        sentences.append(SentenceSpan('', line_break, line_break + 1, paragraph))
+        paragraph += 1
+        start = line_break + 1
+
+
+def get_sentence_tokens(text: str, tokenizer: PunktSentenceTokenizer = None) -> List[str]:
     """
-    Tokenizes a text to sentence tokens
+    Tokenizes a text to sentence tokens, see segment_text()
 
     :argument
     text -- text to tokenize
 
     :returns
-    tokens
+    tokens, empty ones are separators of paragraphs
     """
-    lines = text.split('\n')
-    tokenized = []
-    for line in lines:
-        if line == '':
-            tokenized.append(line)
-        else:
-            tokenized += sent_tokenize(line)
-            tokenized.append('')
-    tokenized.pop(len(tokenized) - 1)
-    return tokenized
+    return [sentence.text for sentence in segment_text(text, tokenizer)]
+
+
+def iter_segment_text(stream: TextIO, chunk_size: int = STREAM_CHUNK_SIZE,
+                      tokenizer: PunktSentenceTokenizer = None) -> Iterator[SentenceSpan]:
+    """
+    Splits a text read from stream into sentences, see segment_text().
+    The stream is read by chunks, so that the whole text is never kept in memory.
+    A line longer than a chunk is tokenized up to its last whitespace and cut before its last two sentences,
+    they are completed by next chunks, so that every boundary given out is decided by whole words after it.
+    While the kept sentences grow, the line is tokenized again only after its length doubles,
+    so that a long line without sentence ends takes linear time, not quadratic
+
+    :argument
+    stream -- text stream to split
+
+    :argument
+    chunk_size -- number of characters to read at once
+
+    :argument
+    tokenizer -- Punkt model, see load_sentence_tokenizer(); loaded if not given
+
+    :returns
+    sentences and separators, the same as segment_text() gives for the whole text
+    """
+    if tokenizer is None:
+        tokenizer = load_sentence_tokenizer()
+    # incomplete line read so far, kept by pieces, so that it is not copied on every chunk
+    pieces: List[str] = []
+    length: int = 0
+    # length of the incomplete line at which it is tokenized again
+    threshold: int = chunk_size
+    # position of the incomplete line in the text
+    offset: int = 0
+    paragraph: int = 0
+    while True:
+        chunk: str = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines: List[str] = chunk.split('\n')
+        if len(lines) > 1:
+            lines[0] = ''.join(pieces) + lines[0]
+            for line in lines[:-1]:
+                yield from segment_line(line, offset, paragraph, tokenizer)
+                offset += len(line)
+                yield SentenceSpan('', offset, offset + 1, paragraph)
+                offset += 1
+                paragraph += 1
+            pieces, length, threshold = [], 0, chunk_size
+        pieces.append(lines[-1])
+        length += len(lines[-1])
+        if length > threshold:
+            buffer: str = ''.join(pieces)
+            # Punkt decides a boundary by the word after it, so that the word cut by the chunk is not tokenized
+            cut: int = len(buffer)
+            while cut and not buffer[cut - 1].isspace():
+                cut -= 1
+            spans: List[Tuple[int, int]] = list(tokenizer.span_tokenize(buffer[:cut])) if cut else []
+            # the last two sentences are kept, so that the start of the kept ones is decided by whole words after it;
+            # tokenizing is restarted only after whitespace, Punkt splits runs like ??? otherwise
+            kept: int = len(spans) - 2
+            while kept > 0 and not buffer[spans[kept][0] - 1].isspace():
+                kept -= 1
+            for start, end in spans[:max(kept, 0)]:
+                yield SentenceSpan(buffer[start:end], offset + start, offset + end, paragraph)
+            if kept > 0:
+                offset += spans[kept][0]
+                buffer = buffer[spans[kept][0]:]
+            pieces, length = [buffer], len(buffer)
+            threshold = max(chunk_size, 2 * length)
+    # the last line has no separator after it
+    yield from segment_line(''.join(pieces), offset, paragraph, tokenizer)
+
+
+def iter_sentence_tokens(stream: TextIO, chunk_size: int = STREAM_CHUNK_SIZE,
+                         tokenizer: PunktSentenceTokenizer = None) -> Iterator[str]:
+    """
+    Tokenizes a text read from stream to sentence tokens, see iter_segment_text()
+
+    :returns
+    tokens, the same as get_sentence_tokens() gives for the whole text
+    """
+    return (sentence.text for sentence in iter_segment_text(stream, chunk_size, tokenizer))
@@ -1,18 +1,18 @@
-from typing import List
+from typing import List, Optional, Tuple
 
 import nltk
-from nltk import Tree
-import copy
 
+from src.processing.models.NamedEntities import NamedEntities
+from src.processing.models.NounGroupOutcome import NounGroupOutcome, SuggestionTemplate
 from src.processing.models.Preloading import Preloading
-from src.processing.models.Replace import Replace
-from src.processing.checkers import is_noun_plural, is_jj_superlative, has_unique_jj, resolve_vowel
-from src.processing.models.SubtreeProcessingResult import SubtreeProcessingResult
-from src.processing.models.Suggestion import Suggestion
-from src.processing.preprocessing import pos_tagging, create_tree_from_grammar
+from src.processing.checkers import resolve_vowel
+from src.processing.decisions import decide, get_features, Insertion, KEEP, NAMED_ENTITY
+from src.processing.lexicon import Lexicon
+from src.processing.models.Token import Token
+from src.processing.preprocessing import pos_tagging_sents, create_tree_from_grammar, has_noun_group
 
 
-def get_tree_from_sentence(phrase: str, preloading: Preloading) -> (nltk.Tree, List[Replace]):
+def get_tree_from_sentence(phrase: str, preloading: Preloading) -> (nltk.Tree, NamedEntities):
     """
     Processes string into tree
 
@@ -22,48 +22,61 @@ def get_tree_from_sentence(phrase: str, preloading: Preloading) -> (nltk.Tree, L
     preloading -- object containing dictionaries
 
     :returns
-    Tree representation of phrase, lst of made replaces in it
+    Tree representation of phrase (None if there is no noun group in it) and its Named Entities
     """
+    return get_trees_from_sentences([phrase], preloading)[0]
 
-    tags, replaces = pos_tagging(phrase, preloading)
-    tree: nltk.Tree = create_tree_from_grammar(tags)
-    return tree, replaces
+
+def get_trees_from_sentences(phrases: List[str], preloading: Preloading) \
+        -> List[Tuple[Optional[nltk.Tree], NamedEntities]]:
+    """
+    Processes strings into trees, tagging all of them in one batch.
+    Trees are not built for sentences without nouns, Named Entities are recognized lazily.
+    Leaves of trees keep their spans in the phrase
+
+    :argument
+    phrases -- strings to convert in trees
+    :argument
+    preloading -- object containing dictionaries
+
+    :returns
+    for every phrase tree representation of it (None if there is no noun group in it) and its Named Entities
+    """
+    return [
+        (create_tree_from_grammar(tags, spans, preloading.chunk_parser) if has_noun_group(tags) else None,
+         NamedEntities(tags, preloading.named_entities_recognizer))
+        for tags, spans in pos_tagging_sents(phrases, preloading)
+    ]
 
 
-def get_words_leaves(tree_leaves: List[str]) -> List[str]:
+def get_words_leaves(tree_leaves: List[Token]) -> List[str]:
     """
-    Extracts words from tree with tuples word-tag
+    Extracts words from tree with tokens
 
     :argument
-    tree_leaves -- list with word/tag elements
+    tree_leaves -- list of tokens
 
     :returns
     List of words
     """
-    leaves: List[str] = []
-    for leaf in tree_leaves:
-        leaves.append(leaf.split('/')[0])
-    return leaves
+    return [leaf.word for leaf in tree_leaves]
 
 
-def get_pos_leaves(tree_leaves: List[str]) -> List[str]:
+def get_pos_leaves(tree_leaves: List[Token]) -> List[str]:
     """
-    Extracts POS tags from tree with tuples word-tag
+    Extracts POS tags from tree with tokens
 
     :argument
-    tree_leaves -- list with word/tag elements
+    tree_leaves -- list of tokens
 
     :returns
     List of tags
     """
-    leaves: List[str] = []
-    for leaf in tree_leaves:
-        leaves.append(leaf.split('/')[1])
-    return leaves
+    return [leaf.tag for leaf in tree_leaves]
 
 
-def insert_article_in_tree(position: int, article: str, words_leaves: List[str], rule: str) -> (
-        Tree, SubtreeProcessingResult):
+def insert_article_in_tree(position: int, articles: List[str], words_leaves: List[str],
+                           rule: str) -> SuggestionTemplate:
     """
     Inserts needed article in given position
 
@@ -74,84 +87,70 @@ def insert_article_in_tree(position: int, article: str, words_leaves: List[str],
     position -- position to insert in
 
     :argument
-    article -- article to insert
+    articles -- articles to insert, a replacement for every one
 
     :argument
     rule -- cause, why insertion made
 
     :returns
-    suggestions made for NP
+    suggestion made for NP, positions are relative to it
     """
     start_ng = position
     end_ng = len(words_leaves)
 
-    replacement_leaves = copy.deepcopy(words_leaves)
+    replacement_leaves = words_leaves[position:end_ng]
     if position == 0:
         replacement_leaves[0] = replacement_leaves[0].lower()
-    replacement: str = f"{article} {' '.join(replacement_leaves[position:end_ng])}"
+    group: str = ' '.join(replacement_leaves)
 
-    suggestion = Suggestion(start_ng, end_ng, [replacement], rule)
-    return SubtreeProcessingResult(words_leaves, [suggestion])
+    return SuggestionTemplate(start_ng, end_ng, tuple(f"{article} {group}" for article in articles), rule)
 
 
-def resolve_np_group(pos_leaves: List[str],
-                     words_leaves: List[str]) -> SubtreeProcessingResult:
+def resolve_insertion(insertion: Insertion, words_leaves: List[str]) -> SuggestionTemplate:
     """
-    Resolves where to place an article if NP was found by following grammar
-    <CD>?<DT|PRP\$>?<JJS|JJ>*<NN|NNS>+
+    Inserts articles chosen by decision table, see decisions.decide()
 
     :argument
-    words_leaves -- see get_words_leaves()
+    insertion -- position, articles and cause
 
     :argument
-    pos_leaves -- see get_pos_leaves()
+    words_leaves -- see get_words_leaves()
 
     :returns
-    suggestions made for NP
+    suggestion made for NP
     """
-    if is_noun_plural(pos_leaves) or is_jj_superlative(pos_leaves) or has_unique_jj(
-            words_leaves, pos_leaves):
-        subtree_processing_result = insert_article_in_tree(0, 'the', words_leaves,
-                                                           "Definite article because of plural form" if is_noun_plural(
-                                                               pos_leaves) else "Definite article because of adjective")
-    else:
-        dt: str = resolve_vowel(words_leaves[0])
-        subtree_processing_result = insert_article_in_tree(0, dt,
-                                                           words_leaves, "Missed article before noun group")
-        subtree_processing_resultThe = insert_article_in_tree(0, 'the',
-                                                              words_leaves, "Missed article before noun group")
-        subtree_processing_result.suggestions[0].replacements.append(
-            subtree_processing_resultThe.suggestions[0].replacements[0]
-        )
-    return subtree_processing_result
-
-
-def resolve_npp_group(pos_leaves: List[str],
-                      words_leaves: List[str]) -> (
-        Tree, Tree, SubtreeProcessingResult):
+    articles: List[str] = []
+    if insertion.indefinite:
+        articles.append(resolve_vowel(words_leaves[insertion.position]))
+    if insertion.definite:
+        articles.append('the')
+    return insert_article_in_tree(insertion.position, articles, words_leaves, insertion.cause)
+
+
+def resolve_noun_group(label: str, leaves: List[Token], lexicon: Lexicon) -> NounGroupOutcome:
     """
-    Resolves where to place an article if NP was found by following grammar
-    <DT>+<NN>?<IN>?<CD>?<DT|PRP\$>?<JJS|JJ>*<NN|NNS>+
+    Resolves articles in a noun group, both if it has no Named Entity and if it has.
+    The outcome depends only on label, words and tags of the group, so that it can be reused, see NounGroupCache
 
     :argument
-    pos_leaves -- see get_pos_leaves()
+    label -- label of noun group given by grammar
 
     :argument
-    words_leaves -- see get_words_leaves()
+    leaves -- tokens of the noun group
+
+    :argument
+    lexicon -- index of uncountable nouns
 
     :returns
-    suggestions made for NP
+    suggestions for every action of decision table, None for kept group
     """
-    if is_noun_plural(pos_leaves):
-        subtree_processing_result = insert_article_in_tree(2, 'the',
-                                                           words_leaves, "Definite article because of plural form")
-    else:
-        dt: str = resolve_vowel(words_leaves[2])
-        subtree_processing_result = insert_article_in_tree(2, dt,
-                                                           words_leaves, "Missed article before noun group")
-        subtree_processing_resultThe = insert_article_in_tree(2, 'the',
-                                                              words_leaves, "Missed article before noun group")
-        subtree_processing_result.suggestions[0].replacements.append(
-            subtree_processing_resultThe.suggestions[0].replacements[0]
-        )
-    return subtree_processing_result
+    words_leaves: List[str] = get_words_leaves(leaves)
+    features: int = get_features(leaves, lexicon)
+
+    def resolve(actions: Tuple[Optional[Insertion], ...]) -> Tuple[Optional[SuggestionTemplate], ...]:
+        return tuple(None if action is KEEP else resolve_insertion(action, words_leaves) for action in actions)
+
+    actions: Tuple[Optional[Insertion], ...] = decide(label, features)
+    named_entity_actions: Tuple[Optional[Insertion], ...] = decide(label, features | NAMED_ENTITY)
+    plain: Tuple[Optional[SuggestionTemplate], ...] = resolve(actions)
+    return NounGroupOutcome(plain, plain if named_entity_actions == actions else resolve(named_entity_actions))
@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+from typing import List
+
+import allure
+import pytest
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.processing.models.dtos import SentenceDto
+from src.processing.utils.batch_utils import BatchDocument, BatchTooLarge, get_batch_limits, iter_batch_results, \
+    parse_documents, DEFAULT_BATCH_MAX_DOCUMENTS
+
+
+class FakeEngine:
+    """ Gives a sentence for every line of text, fails on texts with 'fail' """
+    def process_text(self, text: str, with_offsets: bool = False) -> List[SentenceDto]:
+        return list(self.iter_process_text(text.splitlines(), with_offsets))
+
+    def iter_process_text(self, stream, with_offsets: bool = False):
+        for line in stream:
+            if 'fail' in line:
+                raise ValueError("broken text")
+            yield {'text': line.rstrip('\n'), 'suggestions': []}
+
+
+@allure.feature("Application")
+@allure.story("Batch")
+@allure.title("Documents are parsed from JSON array and NDJSON")
+def test_parse_documents():
+    with allure.step("JSON array of texts and objects"):
+        body: bytes = json.dumps(["Boy came.", {"id": 7, "text": "He is actor."}, {"id": 8}, 5]).encode()
+        documents: List[BatchDocument] = parse_documents(body, ndjson=False)
+        assert documents[:2] == [BatchDocument(0, None, "Boy came."), BatchDocument(1, 7, "He is actor.")]
+        assert documents[2].id == 8 and documents[2].error
+        assert documents[3].error
+    with allure.step("Broken line of NDJSON is an error of its document only"):
+        documents = parse_documents(b'"Boy came."\n\n{broken\n{"id": "a", "text": "He is actor."}\n', ndjson=True)
+        assert [document.index for document in documents] == [0, 1, 2]
+        assert documents[1].error.startswith("Invalid JSON")
+        assert documents[2] == BatchDocument(2, "a", "He is actor.")
+    with allure.step("Not an array and too many documents are rejected"):
+        with pytest.raises(ValueError):
+            parse_documents(b'{"text": "Boy came."}', ndjson=False)
+        with pytest.raises(BatchTooLarge):
+            parse_documents(b'["a", "b", "c"]', ndjson=False, max_documents=2)
+        with pytest.raises(BatchTooLarge):
+            parse_documents(b'"a"\n"b"\n"c"', ndjson=True, max_documents=2)
+
+
+@allure.feature("Application")
+@allure.story("Batch")
+@allure.title("Results are given per document or per sentence, errors do not stop the batch")
+def test_iter_batch_results():
+    documents: List[BatchDocument] = [BatchDocument(0, 'a', "Boy came.\nHe is actor."),
+                                      BatchDocument(1, 'b', "It will fail."),
+                                      BatchDocument(2, 'c', None, "Document has no text"),
+                                      BatchDocument(3, 'd', "I like this actor.")]
+    with allure.step("A line for every document"):
+        lines = [json.loads(line) for line in iter_batch_results(FakeEngine(), documents)]
+        assert lines[0] == {'index': 0, 'id': 'a', 'sentences': [{'text': "Boy came.", 'suggestions': []},
+                                                                 {'text': "He is actor.", 'suggestions': []}]}
+        assert lines[1] == {'index': 1, 'id': 'b', 'error': "ValueError: broken text"}
+        assert lines[2] == {'index': 2, 'id': 'c', 'error': "Document has no text"}
+        assert lines[3]['sentences'] == [{'text': "I like this actor.", 'suggestions': []}]
+    with allure.step("A line for every sentence"):
+        lines = [json.loads(line) for line in iter_batch_results(FakeEngine(), documents, per_sentence=True)]
+        assert [line['index'] for line in lines] == [0, 0, 0, 1, 2, 3, 3]
+        assert lines[1]['sentence'] == {'text': "He is actor.", 'suggestions': []}
+        assert lines[2] == {'index': 0, 'id': 'a', 'done': True}
+        assert 'error' in lines[3]
+
+
+@allure.feature("Application")
+@allure.story("Batch")
+@allure.title("Limits are taken from environment")
+def test_batch_limits(monkeypatch):
+    monkeypatch.delenv('JBTT_BATCH_MAX_BYTES', raising=False)
+    monkeypatch.delenv('JBTT_BATCH_MAX_DOCUMENTS', raising=False)
+    assert get_batch_limits()[1] == DEFAULT_BATCH_MAX_DOCUMENTS
+    monkeypatch.setenv('JBTT_BATCH_MAX_BYTES', '1024')
+    monkeypatch.setenv('JBTT_BATCH_MAX_DOCUMENTS', '10')
+    assert get_batch_limits() == (1024, 10)
@@ -0,0 +1,104 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import allure
+import pytest
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.processing.batching import MicroBatcher, get_batching_config, DEFAULT_BATCH_MAX_SIZE
+from src.processing.models.dtos import SentenceDto
+
+
+class RecordingProcess:
+    """ Checks sentences instantly and remembers sizes of batches """
+    def __init__(self, delay: float = 0.0):
+        self.delay: float = delay
+        self.sizes: List[int] = []
+        self.lock = threading.Lock()
+
+    def __call__(self, phrases: List[str]) -> List[SentenceDto]:
+        with self.lock:
+            self.sizes.append(len(phrases))
+        time.sleep(self.delay)
+        return [{'text': phrase.upper(), 'suggestions': []} for phrase in phrases]
+
+
+@allure.feature("Application")
+@allure.story("Micro-batching")
+@allure.title("Concurrent requests are checked together and get their own results")
+def test_concurrent_requests():
+    process = RecordingProcess(delay=0.01)
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait=0.05)
+    requests: List[List[str]] = [[f"sentence {index} {number}" for number in range(index % 3 + 1)]
+                                 for index in range(40)]
+    try:
+        with allure.step("Send requests from several threads"):
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                answers = list(executor.map(batcher.process_sentences, requests))
+        with allure.step("Every request gets results of its sentences"):
+            assert answers == [[{'text': phrase.upper(), 'suggestions': []} for phrase in phrases]
+                               for phrases in requests]
+        with allure.step("Requests are batched, a batch is closed when it is full"):
+            assert sum(process.sizes) == sum(len(phrases) for phrases in requests)
+            assert len(process.sizes) < len(requests)
+            # the last request may overfill a batch, requests are not split
+            assert max(process.sizes) < 8 + 3
+        with allure.step("Check statistics"):
+            stats = batcher.stats()
+            assert stats['requests'] == len(requests)
+            assert stats['batches'] == len(process.sizes)
+            assert stats['meanBatchSize'] > 1
+            assert stats['largestBatch'] == max(process.sizes)
+            assert 0 <= stats['meanQueueMs'] <= stats['p99QueueMs']
+    finally:
+        batcher.close()
+
+
+@allure.feature("Application")
+@allure.story("Micro-batching")
+@allure.title("Single request waits not longer than max wait")
+def test_max_wait():
+    batcher = MicroBatcher(RecordingProcess(), max_batch_size=100, max_wait=0.01)
+    try:
+        start = time.monotonic()
+        assert batcher.process_sentences(['boy came']) == [{'text': 'BOY CAME', 'suggestions': []}]
+        assert time.monotonic() - start < 1
+        assert batcher.process_sentences([]) == []
+    finally:
+        batcher.close()
+
+
+@allure.feature("Application")
+@allure.story("Micro-batching")
+@allure.title("Error of a batch is raised for every request of it")
+def test_batch_error():
+    def fail(phrases: List[str]) -> List[SentenceDto]:
+        raise ValueError("broken")
+
+    batcher = MicroBatcher(fail, max_batch_size=4, max_wait=0.01)
+    try:
+        with pytest.raises(ValueError):
+            batcher.process_sentences(['boy came'])
+    finally:
+        batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(['boy came'])
+
+
+@allure.feature("Application")
+@allure.story("Micro-batching")
+@allure.title("Limits are taken from environment")
+def test_batching_config(monkeypatch):
+    monkeypatch.delenv('JBTT_BATCH_MAX_SIZE', raising=False)
+    monkeypatch.delenv('JBTT_BATCH_MAX_WAIT_MS', raising=False)
+    assert get_batching_config()[0] == DEFAULT_BATCH_MAX_SIZE
+    monkeypatch.setenv('JBTT_BATCH_MAX_SIZE', '16')
+    monkeypatch.setenv('JBTT_BATCH_MAX_WAIT_MS', '2.5')
+    assert get_batching_config() == (16, 0.0025)
@@ -0,0 +1,105 @@
+import json
+import os
+import sqlite3
+import sys
+from typing import Dict, Iterable, List
+
+import allure
+import pytest
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.processing.cache import EVICTION_RATIO, LruSentenceCache, SentenceCache, SqliteSentenceCache
+from src.processing.models.dtos import SentenceDto
+
+
+def create_result(phrase: str) -> SentenceDto:
+    return {'text': phrase, 'suggestions': [{'start': 0, 'end': len(phrase), 'replacements': [phrase.upper()],
+                                             'cause': 'Test'}]}
+
+
+@allure.feature("Cache")
+@allure.story("Interface")
+@allure.title("Cache without put_many cannot be created")
+def test_abstract_cache():
+    class ReadOnlyCache(SentenceCache):
+        def get_many(self, phrases: Iterable[str], namespace: str = '') -> Dict[str, SentenceDto]:
+            return {}
+
+    with pytest.raises(TypeError):
+        ReadOnlyCache()
+
+
+@allure.feature("Cache")
+@allure.story("Persistent cache")
+@allure.title("Sentences are counted only when the estimate is over the limit")
+def test_sqlite_eviction(tmp_path, monkeypatch):
+    with SqliteSentenceCache(str(tmp_path / 'cache.sqlite3'), max_entries=100) as cache:
+        counts: List[int] = []
+        count = cache.count
+        monkeypatch.setattr(cache, 'count', lambda: counts.append(1) or count())
+        with allure.step("Insert 150 sentences by 10"):
+            for start in range(0, 150, 10):
+                cache.put_many({f"sentence {number}": create_result(f"sentence {number}")
+                                for number in range(start, start + 10)})
+        with allure.step("The least recently used sentences are evicted, the table is counted a few times"):
+            assert len(counts) <= 4
+            assert int(100 * EVICTION_RATIO) <= len(cache) <= 100
+            assert cache.get("sentence 149") == create_result("sentence 149")
+            assert cache.get("sentence 0") is None
+
+
+@allure.feature("Cache")
+@allure.story("Persistent cache")
+@allure.title("Lookups do not wait for the write lock, time of use is written with the next insert")
+def test_sqlite_touch(tmp_path):
+    path: str = str(tmp_path / 'cache.sqlite3')
+    with SqliteSentenceCache(path) as cache:
+        cache.put_many({"Boy came.": create_result("Boy came.")})
+        writer = sqlite3.connect(path, timeout=0, isolation_level=None)
+        writer.execute('UPDATE results SET used = 0')
+        with allure.step("Another process holds the write lock, lookup is answered anyway"):
+            writer.execute('BEGIN IMMEDIATE')
+            assert cache.get("Boy came.") == create_result("Boy came.")
+            assert list(cache.touched) == [('', "Boy came.")]
+            writer.execute('ROLLBACK')
+        with allure.step("Time of use is written with the next insert"):
+            cache.put_many({"He is actor.": create_result("He is actor.")})
+            assert cache.touched == {}
+            assert writer.execute('SELECT used FROM results WHERE text = ?', ("Boy came.",)).fetchone()[0] > 0
+        with allure.step("Recently used sentence is not marked again"):
+            cache.get("Boy came.")
+            assert cache.touched == {}
+        writer.close()
+
+
+@allure.feature("Cache")
+@allure.story("Memory cache")
+@allure.title("Size of memory cache is counted in UTF-8 bytes")
+def test_memory_cache_bytes():
+    phrase: str = "Café is near."
+    result: SentenceDto = create_result(phrase)
+    cache = LruSentenceCache(max_bytes=1000)
+    cache.put_many({phrase: result})
+    with allure.step("Non-ASCII characters of the sentence and the result are counted by their encoded length"):
+        assert cache.stats()['bytes'] == len(phrase.encode('utf-8')) + len(json.dumps(result).encode('utf-8'))
+        assert cache.stats()['bytes'] > 2 * len(phrase)
+    with allure.step("Sentences are evicted when their size exceeds the limit"):
+        cache.put_many({f"Café {number} is near.": create_result(f"Café {number} is near.") for number in range(20)})
+        assert 0 < cache.stats()['bytes'] <= 1000
+        assert cache.get(phrase) is None
+
+
+@allure.feature("Cache")
+@allure.story("Persistent cache")
+@allure.title("Sentences are counted by namespace")
+def test_sqlite_count(tmp_path):
+    with SqliteSentenceCache(str(tmp_path / 'cache.sqlite3')) as cache:
+        cache.put_many({"Boy came.": create_result("Boy came.")}, 'old')
+        cache.put_many({"Boy came.": create_result("Boy came."), "He is actor.": create_result("He is actor.")}, 'new')
+        assert cache.count('old') == 1
+        assert cache.count('new') == 2
+        assert cache.count('missing') == 0
+        assert cache.count() == len(cache) == 3
@@ -0,0 +1,89 @@
+import os
+import random
+import sys
+import time
+from typing import List, Tuple
+
+import allure
+import nltk
+import pytest
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.processing.chunker import FiniteStateChunker
+from src.processing.preprocessing import GRAMMAR, create_chunk_parser
+
+# tags of grammar are more frequent, so that long chunks and overlapping candidates occur often
+CORPUS_TAGS: List[str] = ['DT', 'DT', 'EX', 'IT', 'VBZ', 'VBD', 'JJ', 'JJ', 'JJS', 'JJR', 'NN', 'NN', 'NN', 'NNS',
+                          'IN', 'CD', 'PRP$', 'PRP', 'NNP', 'VB', 'RB', 'CC', '.', ',']
+
+# timing depends on the machine, so that benchmarks run only on demand: JBTT_BENCHMARK=1 pytest test
+benchmark = pytest.mark.skipif(not os.environ.get('JBTT_BENCHMARK'), reason="set JBTT_BENCHMARK=1 to run benchmarks")
+
+
+@allure.feature("Grammar")
+@allure.story("Chunker")
+@allure.title("Compiled chunker gives the same trees as nltk.RegexpParser")
+def test_chunker_conformance(tagged_corpus):
+    with allure.step("Compile grammar"):
+        chunker: FiniteStateChunker = create_chunk_parser()
+        regexp_parser = nltk.RegexpParser(GRAMMAR)
+    with allure.step(f"Chunk {len(tagged_corpus)} sentences"):
+        mismatches = [sentence for sentence in tagged_corpus
+                      if chunker.parse(sentence) != regexp_parser.parse(sentence)]
+    with allure.step("All trees are equal"):
+        assert mismatches == []
+
+
+@pytest.mark.parametrize("grammar, sentence, result",
+                         [
+                             ('A: {<X>?<X>}', [('a', 'X')], '(S (A a/X))'),
+                             ('A: {<X>*<Y>}\nB: {<X>+}', [('a', 'X'), ('b', 'X'), ('c', 'Z'), ('d', 'X')],
+                              '(S (B a/X b/X) c/Z (B d/X))'),
+                             ('A: {<P\\$>+}', [('my', 'P$'), ('a', 'X')], '(S (A my/P$) a/X)')
+                         ])
+@allure.feature("Grammar")
+@allure.story("Chunker")
+@allure.title("Priority of rules and quantifiers")
+def test_chunker_rules(grammar, sentence, result):
+    assert str(FiniteStateChunker(grammar).parse(sentence)) == result
+    assert str(nltk.RegexpParser(grammar).parse(sentence)) == result
+
+
+@allure.feature("Grammar")
+@allure.story("Chunker")
+@allure.title("Speed of compiled chunker and nltk.RegexpParser")
+@benchmark
+def test_chunker_benchmark():
+    chunker: FiniteStateChunker = create_chunk_parser()
+    regexp_parser = nltk.RegexpParser(GRAMMAR)
+    with allure.step("Generate tagged sentences"):
+        tagged_corpus = generate_corpus(20000)
+    with allure.step("Chunk corpus by nltk.RegexpParser"):
+        regexp_time = measure(regexp_parser, tagged_corpus)
+    with allure.step("Chunk corpus by compiled chunker"):
+        chunker_time = measure(chunker, tagged_corpus)
+    allure.attach(body=f"nltk.RegexpParser: {regexp_time:.3f}s\nFiniteStateChunker: {chunker_time:.3f}s\n"
+                       f"speedup: {regexp_time / chunker_time:.1f}x",
+                  name='Benchmark', attachment_type=allure.attachment_type.TEXT)
+
+
+def measure(parser, corpus: List[List[Tuple[str, str]]]) -> float:
+    start = time.perf_counter()
+    for sentence in corpus:
+        parser.parse(sentence)
+    return time.perf_counter() - start
+
+
+def generate_corpus(size: int) -> List[List[Tuple[str, str]]]:
+    generator = random.Random(2701)
+    return [[(f"w{index}", generator.choice(CORPUS_TAGS)) for index in range(generator.randint(1, 40))]
+            for _ in range(size)]
+
+
+@pytest.fixture(scope='module')
+def tagged_corpus() -> List[List[Tuple[str, str]]]:
+    with allure.step("Generate tagged sentences"):
+        return generate_corpus(500)
@@ -0,0 +1,77 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import allure
+import pytest
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.processing.cache import LruSentenceCache, SqliteSentenceCache, TieredSentenceCache
+from src.processing.models.Preloading import Preloading
+from src.processing.models.dtos import SentenceDto
+
+
+def create_result(phrase: str) -> SentenceDto:
+    return {'text': phrase, 'suggestions': [{'start': 0, 'end': len(phrase), 'replacements': [phrase.upper()],
+                                             'cause': 'Test'}]}
+
+
+@allure.feature("Concurrency")
+@allure.story("Cache")
+@allure.title("Persistent cache is shared by threads")
+def test_sqlite_cache_threads(tmp_path):
+    cache = SqliteSentenceCache(str(tmp_path / 'cache.sqlite3'), max_entries=500)
+    errors: List[Exception] = []
+
+    def hammer(worker: int):
+        try:
+            for step in range(50):
+                phrases: List[str] = [f"sentence {worker} {step} {number}" for number in range(5)]
+                cache.put_many({phrase: create_result(phrase) for phrase in phrases}, 'namespace')
+                found: Dict[str, SentenceDto] = cache.get_many(phrases + ['missing'], 'namespace')
+                assert all(found[phrase] == create_result(phrase) for phrase in found)
+                assert 'missing' not in found
+        except Exception as error:
+            errors.append(error)
+
+    with cache:
+        with allure.step("Write and read from several threads"):
+            threads: List[threading.Thread] = [threading.Thread(target=hammer, args=(worker,)) for worker in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        with allure.step("No errors, size is limited"):
+            assert errors == []
+            assert len(cache) <= 500
+
+
+@allure.feature("Concurrency")
+@allure.story("Cache")
+@allure.title("Tiered cache gives the same results to concurrent readers")
+def test_tiered_cache_threads(tmp_path):
+    with SqliteSentenceCache(str(tmp_path / 'cache.sqlite3')) as persistent_cache:
+        cache = TieredSentenceCache(LruSentenceCache(max_entries=50), persistent_cache)
+        phrases: List[str] = [f"sentence {number}" for number in range(200)]
+        cache.put_many({phrase: create_result(phrase) for phrase in phrases})
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            answers = list(executor.map(lambda start: cache.get_many(phrases[start:start + 40]), range(0, 200, 10)))
+        for start, found in zip(range(0, 200, 10), answers):
+            assert found == {phrase: create_result(phrase) for phrase in phrases[start:start + 40]}
+
+
+@allure.feature("Concurrency")
+@allure.story("Preloading")
+@allure.title("Frozen preloading cannot be changed")
+def test_frozen_preloading():
+    preloading = Preloading({}, [], [], True)
+    preloading.fingerprint = 'changed before freezing'
+    preloading.freeze()
+    with pytest.raises(AttributeError):
+        preloading.fingerprint = 'changed after freezing'
+    assert preloading.fingerprint == 'changed before freezing'
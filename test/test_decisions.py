@@ -0,0 +1,195 @@
+import os
+import sys
+import tracemalloc
+from typing import List, Tuple
+
+import allure
+import pytest
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import nltk
+from nltk import Tree
+
+from src.processing.cache import NounGroupCache
+from src.processing.decisions import decide, get_features, Insertion, KEEP, DETERMINATIVE, PLURAL, SUPERLATIVE, \
+    UNIQUE_ADJECTIVE, UNCOUNTABLE, GROUP_OF, QUANTITY_OF, ARTICLE_AFTER_VERB, NAMED_ENTITY
+from src.processing.lexicon import Lexicon
+from src.processing.models.NamedEntities import NamedEntities
+from src.processing.models.NounGroupOutcome import NounGroupOutcome
+from src.processing.models.SentenceResult import SentenceResult
+from src.processing.models.dtos import SentenceDto
+from src.processing.models.Token import Token
+from src.processing.preprocessing import GRAMMAR, create_tree_from_grammar
+from src.processing.processor import process_tree
+from src.processing.utils.load_utils import load_uncountable_nouns_list
+from src.processing.utils.preprocessing_utils import prepare_sentence_for_tagging
+from src.processing.utils.tree_processing_utils import get_pos_leaves, get_words_leaves, resolve_noun_group
+
+
+def tokens(tags: List[Tuple[str, str]]) -> List[Token]:
+    # words separated by single spaces
+    starts: List[int] = [sum(len(word) + 1 for word, _ in tags[:index]) for index in range(len(tags))]
+    return [Token(word, tag, index, start, start + len(word)) for index, ((word, tag), start) in
+            enumerate(zip(tags, starts))]
+
+
+@pytest.fixture(scope='module')
+def lexicon() -> Lexicon:
+    return Lexicon(load_uncountable_nouns_list(), [])
+
+
+@pytest.mark.parametrize("tags, features",
+                         [
+                             ([('the', 'DT'), ('whale', 'NN')], DETERMINATIVE),
+                             ([('greatest', 'JJS'), ('cities', 'NNS')], SUPERLATIVE | PLURAL),
+                             ([('whole', 'JJ'), ('old', 'JJ'), ('ship', 'NN')], UNIQUE_ADJECTIVE),
+                             ([('old', 'JJ'), ('whole', 'JJ'), ('ship', 'NN')], 0),
+                             ([('advice', 'NN'), ('book', 'NN')], UNCOUNTABLE),
+                             ([('a', 'DT'), ('group', 'NN'), ('of', 'IN'), ('boys', 'NNS')],
+                              DETERMINATIVE | GROUP_OF | PLURAL),
+                             ([('All', 'DT'), ('of', 'IN'), ('the', 'DT'), ('students', 'NNS')],
+                              DETERMINATIVE | QUANTITY_OF | PLURAL | ARTICLE_AFTER_VERB)
+                         ])
+@allure.feature("Grammar")
+@allure.story("Decision table")
+@allure.title("Noun group is reduced to features")
+def test_features(lexicon, tags, features):
+    assert get_features(tokens(tags), lexicon) == features
+
+
+@allure.feature("Grammar")
+@allure.story("Decision table")
+@allure.title("Actions of decision table")
+def test_decide():
+    assert decide('NP', 0) == (Insertion(0, True, True, "Missed article before noun group"),)
+    assert decide('NP', NAMED_ENTITY) == (KEEP,)
+    assert decide('VBPART', 0) == (KEEP,)
+    assert decide('EXIND', NAMED_ENTITY) == (KEEP, Insertion(2, True, False, "Indefinite article after It is, There is, etc."))
+
+
+@allure.feature("Grammar")
+@allure.story("Decision table")
+@allure.title("Named Entities are not recognized if they do not change the outcome")
+def test_lazy_named_entities(lexicon):
+    def fail(tags):
+        raise AssertionError("Named Entities are recognized")
+
+    group: List[Token] = tokens([('the', 'DT'), ('boy', 'NN')])
+    outcome: NounGroupOutcome = resolve_noun_group('NP', group, lexicon)
+    assert not outcome.depends_on_named_entity()
+    tree = Tree('S', [Tree('NP', group), Tree('VBD', [Token('came', 'VBD', 2, 8, 12)])])
+    sentence: SentenceResult = process_tree("the boy came", tree, lexicon, NamedEntities([], fail))
+    assert sentence.suggestions == ()
+    with allure.step("Keeping the group as well as suggesting is the same as suggesting"):
+        group = tokens([('it', 'IT'), ('is', 'VBZ'), ('city', 'NN')])
+        outcome = resolve_noun_group('EXIND', group, lexicon)
+        assert outcome.plain != outcome.named_entity
+        assert not outcome.depends_on_named_entity()
+        sentence = process_tree("it is city", Tree('S', [Tree('EXIND', group)]), lexicon, NamedEntities([], fail))
+        assert len(sentence.suggestions) == 1
+
+
+@allure.feature("Grammar")
+@allure.story("Noun group cache")
+@allure.title("Repeated noun groups are resolved once and give the same suggestions")
+def test_noun_group_cache(lexicon):
+    group: List[Token] = tokens([('boy', 'NN')])
+    with allure.step("Process the same sentence without and with cache"):
+        cache = NounGroupCache(max_entries=2)
+        expected = process_tree("boy came", Tree('S', [Tree('NP', group)]), lexicon,
+                                NamedEntities([], lambda tags: []))
+        results = [process_tree("boy came", Tree('S', [Tree('NP', group)]), lexicon,
+                                NamedEntities([], lambda tags: []), cache) for _ in range(4)]
+        assert all(result == expected for result in results)
+        assert expected.suggestions
+    with allure.step("Suggestions given out are not shared"):
+        sentence: SentenceDto = results[0].to_dto()
+        sentence['suggestions'][0]['replacements'].clear()
+        assert results[0].to_dto()['suggestions'][0]['replacements']
+    with allure.step("Check hit rate"):
+        assert cache.stats() == {'hits': 3, 'misses': 1, 'hitRate': 0.75, 'entries': 1}
+    with allure.step("The least recently used noun groups are evicted"):
+        for word in ('ship', 'whale', 'sea'):
+            process_tree(word, Tree('S', [Tree('NP', tokens([(word, 'NN')]))]), lexicon,
+                         NamedEntities([], lambda tags: []), cache)
+        assert len(cache) == 2
+
+
+@allure.feature("Grammar")
+@allure.story("Tree")
+@allure.title("Leaves of the tree are tokens of the sentence, words are never joined with tags")
+def test_tree_from_tokens():
+    phrase: str = "it is speed in km/h of old ship"
+    group: List[Token] = tokens(list(zip(phrase.split(), ['IT', 'VBZ', 'NN', 'IN', 'NN', 'IN', 'JJ', 'NN'])))
+    words: List[str] = [token.word for token in group]
+    tags: List[Tuple[str, str]] = [(token.word, token.tag) for token in group]
+    tree: Tree = create_tree_from_grammar(tags, [(token.start, token.end) for token in group])
+    with allure.step("Groups are the same as nltk.RegexpParser gives, other words are wrapped"):
+        assert [subtree.label() for subtree in tree] == \
+            [subtree.label() if isinstance(subtree, Tree) else 'OTHER'
+             for subtree in nltk.RegexpParser(GRAMMAR).parse(tags)]
+        assert all(isinstance(subtree, Tree) for subtree in tree)
+    with allure.step("Tokens keep words with slashes, tags, positions and spans"):
+        leaves: List[Token] = tree.leaves()
+        assert all(isinstance(leaf, Token) for leaf in leaves)
+        assert get_words_leaves(leaves) == words
+        assert get_pos_leaves(leaves) == [tag for _, tag in tags]
+        assert [leaf.index for leaf in leaves] == list(range(len(words)))
+        assert [phrase[leaf.start:leaf.end] for leaf in leaves] == phrase.split()
+
+
+@allure.feature("Grammar")
+@allure.story("Offsets")
+@allure.title("Suggestions point to words of the initial sentence")
+def test_offsets(lexicon):
+    phrase: str = "It's   beautiful\tcity, isn't it"
+    with allure.step("Tokens keep spans of initial words, contractions are expanded"):
+        words, spans = prepare_sentence_for_tagging(phrase, {"it's": "it is", "isn't": "is not"})
+        assert words == ['it', 'is', 'beautiful', 'city', 'is', 'not', 'it']
+        assert [phrase[start:end] for start, end in spans] == \
+               ["It's", "It's", 'beautiful', 'city,', "isn't", "isn't", 'it']
+    with allure.step("Offsets of suggestion are spans of the first and the last word of noun group"):
+        tags: List[Tuple[str, str]] = list(zip(words, ['IT', 'VBZ', 'JJ', 'NN', 'VBZ', 'RB', 'IT']))
+        tree = create_tree_from_grammar(tags, spans)
+        sentence: SentenceResult = process_tree(phrase, tree, lexicon, NamedEntities(tags, lambda tags: []))
+        assert sentence.to_dto()['suggestions'] == [{'start': 7, 'end': 22, 'replacements': ['a beautiful city'],
+                                                     'cause': "Indefinite article after It is, There is, etc."}]
+
+
+@allure.feature("Grammar")
+@allure.story("Result model")
+@allure.title("Results are kept as light records and turned into dictionaries only when given out")
+def test_result_memory(lexicon):
+    phrases: List[str] = [f"the old ship {index} came to great whale" for index in range(1000)]
+    trees: List[Tree] = []
+    for phrase in phrases:
+        words, spans = prepare_sentence_for_tagging(phrase, {})
+        trees.append(create_tree_from_grammar(list(zip(words, ['DT', 'JJ', 'NN', 'CD', 'VBD', 'TO', 'JJ', 'NN'])),
+                                              spans))
+    cache = NounGroupCache()
+    for phrase, tree in zip(phrases, trees):
+        process_tree(phrase, tree, lexicon, NamedEntities([], lambda tags: []), cache)
+
+    def measure(process) -> Tuple[list, int]:
+        tracemalloc.start()
+        try:
+            results: list = [process(phrase, tree) for phrase, tree in zip(phrases, trees)]
+            return results, tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+
+    with allure.step("Process sentences into records and into dictionaries"):
+        records, records_memory = measure(
+            lambda phrase, tree: process_tree(phrase, tree, lexicon, NamedEntities([], lambda tags: []), cache))
+        dtos, dtos_memory = measure(
+            lambda phrase, tree: process_tree(phrase, tree, lexicon, NamedEntities([], lambda tags: []),
+                                              cache).to_dto())
+    allure.attach(body=f"records: {records_memory / len(phrases):.0f} B/sentence\n"
+                       f"dictionaries: {dtos_memory / len(phrases):.0f} B/sentence",
+                  name='Memory', attachment_type=allure.attachment_type.TEXT)
+    assert [record.to_dto() for record in records] == dtos
+    assert records[0].suggestions
+    assert records_memory < dtos_memory
@@ -0,0 +1,58 @@
+import os
+import sys
+from typing import List, Tuple
+
+import allure
+import pytest
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.processing.lexicon import Lexicon, get_inflections
+from src.processing.utils.load_utils import load_uncountable_nouns_list, load_rules_fix_pos_tagging
+from src.processing.utils.preprocessing_utils import fix_pos_tagging
+
+
+@pytest.fixture(scope='module')
+def lexicon() -> Lexicon:
+    return Lexicon(load_uncountable_nouns_list(), load_rules_fix_pos_tagging())
+
+
+@pytest.mark.parametrize("word, result",
+                         [
+                             ('Advice', True),
+                             ('advice.', True),
+                             ('Advices', True),
+                             ('informations!', True),
+                             ('boy', False),
+                             ('boys', False)
+                         ])
+@allure.feature("Lexicon")
+@allure.story("Uncountable nouns")
+@allure.title("Uncountable nouns are found by any form")
+def test_uncountable(lexicon, word, result):
+    assert lexicon.is_uncountable(word) == result
+
+
+@pytest.mark.parametrize("noun, inflections",
+                         [
+                             ('box', {'box', 'boxes'}),
+                             ('city', {'city', 'cities'}),
+                             ('day', {'day', 'days'}),
+                             ('car', {'car', 'cars'})
+                         ])
+@allure.feature("Lexicon")
+@allure.story("Uncountable nouns")
+@allure.title("Plural forms of nouns")
+def test_inflections(noun, inflections):
+    assert get_inflections(noun) == inflections
+
+
+@allure.feature("Lexicon")
+@allure.story("POS tagging")
+@allure.title("Wrong tags are fixed by rules")
+def test_fix_pos_tagging(lexicon):
+    tags: List[Tuple[str, str]] = [('He', 'PRP'), ('is', 'VBZ'), ('Actor', 'JJ'), ('and', 'CC'), ('actor', 'NN')]
+    assert fix_pos_tagging(tags, lexicon) == [('He', 'PRP'), ('is', 'VBZ'), ('Actor', 'NN'), ('and', 'CC'),
+                                              ('actor', 'NN')]
@@ -0,0 +1,80 @@
+import os
+import sys
+from typing import Dict, List, Tuple
+
+import allure
+import nltk
+import pytest
+from nltk import Tree
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.processing.named_entities import RuleBasedRecognizer, compare_backends, create_recognizer, \
+    recognize_maxent, recognize_maxent_tokens
+from src.processing.utils.load_utils import load_gazetteer
+
+
+@pytest.mark.parametrize("tags, entities",
+                         [
+                             ([('He', 'PRP'), ('met', 'VBD'), ('Mary', 'NNP'), ('in', 'IN'), ('town', 'NN')], [2]),
+                             ([('Boy', 'NNP'), ('came', 'VBD'), ('to', 'TO'), ('me', 'PRP')], []),
+                             ([('John', 'NNP'), ('Smith', 'NNP'), ('came', 'VBD')], [0, 1]),
+                             ([('London', 'NNP'), ('is', 'VBZ'), ('big', 'JJ')], [0]),
+                             ([('So', 'RB'), ('I', 'PRP'), ('said', 'VBD'), (':', ':'), ('Stop', 'VB')], [])
+                         ])
+@allure.feature("Named Entities")
+@allure.story("Rules")
+@allure.title("Named Entities by capitalization, position, NNP tags and gazetteer")
+def test_rules(tags, entities):
+    recognizer: RuleBasedRecognizer = RuleBasedRecognizer(load_gazetteer())
+    assert recognizer(tags) == entities
+
+
+@allure.feature("Named Entities")
+@allure.story("Maxent")
+@allure.title("Default maxent backend marks nothing, maxent_tokens marks tokens of chunks except the first word")
+def test_maxent_positions(monkeypatch):
+    tags: List[Tuple[str, str]] = [('John', 'NNP'), ('met', 'VBD'), ('Mary', 'NNP'), ('Smith', 'NNP'),
+                                   ('in', 'IN'), ('New', 'NNP'), ('York', 'NNP')]
+    chunks: Tree = Tree('S', [Tree('NE', tags[0:1]), tags[1], Tree('NE', tags[2:4]), tags[4],
+                              Tree('NE', tags[5:7])])
+    monkeypatch.setattr(nltk, 'ne_chunk', lambda tokens, binary: chunks)
+    with allure.step("Default backend marks nothing, the same as before"):
+        assert recognize_maxent(tags) == []
+    with allure.step("Tokens of chunks are marked by maxent_tokens backend"):
+        assert recognize_maxent_tokens(tags) == [2, 3, 5, 6]
+
+
+@allure.feature("Named Entities")
+@allure.story("Backends")
+@allure.title("Backend is selected by name")
+def test_create_recognizer():
+    assert create_recognizer('maxent') is recognize_maxent
+    assert create_recognizer('maxent_tokens') is recognize_maxent_tokens
+    assert isinstance(create_recognizer('rules', ['Paris']), RuleBasedRecognizer)
+    with pytest.raises(ValueError):
+        create_recognizer('crf')
+
+
+@allure.feature("Named Entities")
+@allure.story("Backends")
+@allure.title("Rules agree with nltk.ne_chunk and are faster")
+def test_compare_backends():
+    sentences: List[str] = [
+        "Mr. Smith went to Washington with his friend.",
+        "The old man told Ishmael about the white whale.",
+        "She bought a new car in Berlin last year.",
+        "Captain Ahab stood on the deck of the Pequod."
+    ] * 50
+    with allure.step("Tag sentences"):
+        tagged_sentences: List[List[Tuple[str, str]]] = nltk.pos_tag_sents(
+            [nltk.word_tokenize(sentence) for sentence in sentences])
+    with allure.step("Compare backends"):
+        report: Dict[str, float] = compare_backends(tagged_sentences, load_gazetteer())
+    allure.attach(body='\n'.join(f"{key}: {value}" for key, value in report.items()),
+                  name='Comparison', attachment_type=allure.attachment_type.TEXT)
+    assert report['sentences'] == len(sentences)
+    assert report['agreement'] > 0.9
+    assert report['rules_sentences_per_second'] > report['maxent_sentences_per_second']
@@ -0,0 +1,117 @@
+import io
+import os
+import sys
+from typing import List
+
+import allure
+import pytest
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.processing.models.SentenceSpan import SentenceSpan
+from src.processing.models.dtos import SentenceDto
+from src.processing.run_processing import add_offsets
+from src.processing.utils.preprocessing_utils import get_sentence_tokens, iter_segment_text, segment_text
+
+TEXT: str = "It’s beautiful city.  He is actor.\n\n  Boy came to me. All of students were present.\n" \
+            "Main part is fantastic.   In greatest city in world."
+
+
+@pytest.fixture(scope='module')
+def tokenizer() -> PunktSentenceTokenizer:
+    return PunktSentenceTokenizer()
+
+
+def tokenize_by_lines(text: str, tokenizer: PunktSentenceTokenizer) -> List[str]:
+    """ Sentences of every line with separators between lines """
+    tokenized: List[str] = []
+    for line in text.split('\n'):
+        tokenized += tokenizer.tokenize(line) + ['']
+    return tokenized[:-1]
+
+
+@pytest.mark.parametrize("text", [TEXT, '', '\n', 'Boy came.\n', '\n\n  \nBoy came. Ship sank  ', TEXT * 20])
+@allure.feature("Segmentation")
+@allure.story("Sentences")
+@allure.title("Sentences are the same as line by line tokenization gives, spans point to them")
+def test_segment_text(tokenizer, text):
+    sentences: List[SentenceSpan] = segment_text(text, tokenizer)
+    with allure.step("The same sentences and separators"):
+        assert [sentence.text for sentence in sentences] == tokenize_by_lines(text, tokenizer)
+        assert get_sentence_tokens(text, tokenizer) == tokenize_by_lines(text, tokenizer)
+    with allure.step("Spans and paragraphs"):
+        assert all(text[sentence.start:sentence.end] == (sentence.text or '\n') for sentence in sentences)
+        assert all(text.count('\n', 0, sentence.start) == sentence.paragraph for sentence in sentences)
+    with allure.step("Streamed text gives the same spans"):
+        assert list(iter_segment_text(io.StringIO(text), tokenizer=tokenizer)) == sentences
+
+
+@pytest.mark.parametrize("text", ["Boy came home. He said: stop! It is 5 p.m. now. Mr. Smith is actor.",
+                                  "???:unknown)      edu  ", "Wait... what?! (Yes.) \"No.\" Fine."])
+@allure.feature("Segmentation")
+@allure.story("Sentences")
+@allure.title("Streamed line gives the same sentences wherever a chunk cuts it")
+def test_iter_segment_cut(tokenizer, text):
+    sentences: List[SentenceSpan] = segment_text(text, tokenizer)
+    for chunk_size in range(1, len(text) + 1):
+        assert list(iter_segment_text(io.StringIO(text), chunk_size, tokenizer)) == sentences, chunk_size
+
+
+@pytest.mark.parametrize("text", ["Boy came.\n   \nHe is actor.\n\t", "   ", "\n \n", " \nBoy came.", "Boy came.  \n  "])
+@allure.feature("Segmentation")
+@allure.story("Offsets")
+@allure.title("Blank lines give only separators pointing to their line breaks")
+def test_blank_lines(tokenizer, text):
+    sentences: List[SentenceSpan] = segment_text(text, tokenizer)
+    with allure.step("Whitespace is never a sentence, every line break is a separator"):
+        assert all(sentence.text.strip() for sentence in sentences if sentence.text)
+        assert [sentence.start for sentence in sentences if not sentence.text] == \
+            [position for position, character in enumerate(text) if character == '\n']
+    with allure.step("Offsets of separators point to their line breaks"):
+        for sentence in sentences:
+            result: SentenceDto = add_offsets({'text': sentence.text or '\n', 'suggestions': []}, sentence)
+            assert text[result['start']:result['end']] == result['text']
+    with allure.step("Streamed text gives the same spans"):
+        assert list(iter_segment_text(io.StringIO(text), 2, tokenizer)) == sentences
+
+
+class CountingTokenizer(PunktSentenceTokenizer):
+    """ Punkt model counting characters it tokenizes """
+    def __init__(self):
+        super().__init__()
+        self.tokenized: int = 0
+
+    def span_tokenize(self, text: str, realign_boundaries: bool = True):
+        self.tokenized += len(text)
+        return super().span_tokenize(text, realign_boundaries)
+
+
+@pytest.mark.parametrize("text", ['word ' * 20000, ('Boy came to me. ' + 'word ' * 3000) * 10],
+                         ids=['without_end', 'long_sentences'])
+@allure.feature("Segmentation")
+@allure.story("Sentences")
+@allure.title("Long line read from stream is tokenized in linear time")
+def test_iter_segment_long_line(text):
+    tokenizer: CountingTokenizer = CountingTokenizer()
+    sentences: List[SentenceSpan] = list(iter_segment_text(io.StringIO(text), 1000, tokenizer))
+    with allure.step("Sentences are the same as for the whole text"):
+        assert [sentence.text for sentence in sentences] == tokenize_by_lines(text, PunktSentenceTokenizer())
+        assert all(text[sentence.start:sentence.end] == sentence.text for sentence in sentences)
+    with allure.step("Every character is tokenized a few times, not once per chunk"):
+        assert tokenizer.tokenized <= 4 * len(text)
+
+
+@allure.feature("Segmentation")
+@allure.story("Offsets")
+@allure.title("Offsets in the text are added to a copy of result")
+def test_add_offsets():
+    result = {'text': 'Boy came.', 'suggestions': [
+        {'start': 0, 'end': 3, 'replacements': ['a boy', 'the boy'], 'cause': 'Missed article before noun group'}]}
+    with_offsets = add_offsets(result, SentenceSpan('Boy came.', 10, 19, 2))
+    assert with_offsets == {'text': 'Boy came.', 'start': 10, 'end': 19, 'paragraph': 2, 'suggestions': [
+        {'start': 0, 'end': 3, 'replacements': ['a boy', 'the boy'], 'cause': 'Missed article before noun group',
+         'documentStart': 10, 'documentEnd': 13}]}
+    assert 'documentStart' not in result['suggestions'][0]
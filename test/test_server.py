@@ -0,0 +1,89 @@
+import json
+import os
+import signal
+import sys
+import time
+import urllib.request
+from typing import List, Set
+
+import allure
+import pytest
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.applications.server import PreforkServer
+
+
+def pid_app(environ, start_response):
+    """ Answers with pid of the worker """
+    start_response('200 OK', [('Content-Type', 'application/json')])
+    return [json.dumps(os.getpid()).encode()]
+
+
+def start_master(server: PreforkServer) -> int:
+    """ Runs the server in a forked master process """
+    server.bind()
+    pid: int = os.fork()
+    if pid == 0:
+        try:
+            server.serve()
+        finally:
+            os._exit(0)
+    return pid
+
+
+def get_worker_pid(port: int) -> int:
+    for attempt in range(50):
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5) as response:
+                return json.loads(response.read())
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError("Server does not answer")
+
+
+def stop_master(pid: int) -> int:
+    os.kill(pid, signal.SIGTERM)
+    for attempt in range(100):
+        exited, status = os.waitpid(pid, os.WNOHANG)
+        if exited:
+            return os.waitstatus_to_exitcode(status)
+        time.sleep(0.1)
+    os.kill(pid, signal.SIGKILL)
+    raise TimeoutError("Master is not stopped")
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="Pre-fork server needs fork()")
+@allure.feature("Application")
+@allure.story("Server")
+@allure.title("Workers are recycled after max requests and replaced")
+def test_worker_recycling():
+    server = PreforkServer(pid_app, port=0, workers=2, max_requests=3)
+    master: int = start_master(server)
+    try:
+        with allure.step("Send requests"):
+            pids: List[int] = [get_worker_pid(server.port) for _ in range(12)]
+        with allure.step("Requests are handled by workers, not the master, every worker handles at most 3"):
+            assert master not in pids
+            assert all(pids.count(pid) <= 3 for pid in set(pids))
+            assert len(set(pids)) >= 4
+    finally:
+        assert stop_master(master) == 0
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="Pre-fork server needs fork()")
+@allure.feature("Application")
+@allure.story("Server")
+@allure.title("Killed worker is replaced")
+def test_worker_respawn():
+    server = PreforkServer(pid_app, port=0, workers=1)
+    master: int = start_master(server)
+    try:
+        worker: int = get_worker_pid(server.port)
+        os.kill(worker, signal.SIGKILL)
+        pids: Set[int] = {get_worker_pid(server.port) for _ in range(3)}
+        assert worker not in pids
+    finally:
+        assert stop_master(master) == 0
@@ -0,0 +1,99 @@
+import os
+import sys
+from typing import List
+
+import allure
+import pytest
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.processing.models.TextEdit import TextEdit
+from src.processing.models.dtos import SentenceDto
+from src.processing.run_processing import add_offsets
+from src.processing.session import DocumentSession, get_common_prefix_length, get_common_suffix_length
+from src.processing.utils.preprocessing_utils import segment_text
+
+TEXT: str = "It’s beautiful city.  He is actor.\n\nBoy came to me. All of students were present.\n" \
+            "Main part is fantastic.   In greatest city in world."
+
+
+class RecordingProcess:
+    """ Gives a suggestion for every sentence and remembers checked sentences """
+    def __init__(self):
+        self.checked: List[str] = []
+
+    def __call__(self, phrases: List[str]) -> List[SentenceDto]:
+        self.checked += [phrase for phrase in phrases if phrase]
+        return [{'text': phrase or '\n', 'suggestions': [
+            {'start': 0, 'end': len(phrase), 'replacements': [phrase.upper()], 'cause': 'Test'}] if phrase else []}
+            for phrase in phrases]
+
+
+@pytest.fixture(scope='module')
+def tokenizer() -> PunktSentenceTokenizer:
+    return PunktSentenceTokenizer()
+
+
+def check_from_scratch(text: str, tokenizer: PunktSentenceTokenizer) -> List[SentenceDto]:
+    sentences = segment_text(text, tokenizer)
+    return [add_offsets(result, sentence)
+            for result, sentence in zip(RecordingProcess()([sentence.text for sentence in sentences]), sentences)]
+
+
+@allure.feature("Session")
+@allure.story("Incremental checking")
+@allure.title("Only the edited sentence is checked again, the rest are moved")
+def test_update(tokenizer):
+    process = RecordingProcess()
+    session = DocumentSession(process, tokenizer, TEXT)
+    assert session.get_results() == check_from_scratch(TEXT, tokenizer)
+    sentences: int = sum(1 for sentence in segment_text(TEXT, tokenizer) if sentence.text)
+    assert session.recomputed == sentences
+    with allure.step("Edit a word of the first sentence"):
+        process.checked.clear()
+        edited: str = TEXT.replace("beautiful", "nice")
+        assert session.update(edited) == check_from_scratch(edited, tokenizer)
+        assert process.checked == ["It’s nice city."]
+        assert session.recomputed == 1
+    with allure.step("The same version costs nothing"):
+        session.update(edited)
+        assert session.recomputed == 0
+    with allure.step("Join two paragraphs"):
+        joined: str = edited.replace("actor.\n\n", "actor. ")
+        assert session.update(joined) == check_from_scratch(joined, tokenizer)
+        assert session.recomputed == 0
+        assert session.total_recomputed == sentences + 1
+
+
+@allure.feature("Session")
+@allure.story("Incremental checking")
+@allure.title("Edits are applied one after another")
+def test_apply_edits(tokenizer):
+    process = RecordingProcess()
+    session = DocumentSession(process, tokenizer, TEXT)
+    process.checked.clear()
+    edits: List[TextEdit] = [TextEdit(0, 4, "This is"), TextEdit(len(TEXT) + 3, len(TEXT) + 3, " Ship sank."),
+                             TextEdit(0, 0, "New line.\n")]
+    edited: str = TEXT
+    for edit in edits:
+        edited = edited[:edit.start] + edit.text + edited[edit.end:]
+    assert session.apply_edits(edits) == check_from_scratch(edited, tokenizer)
+    assert session.text == edited
+    with allure.step("Edit out of text is rejected"):
+        with pytest.raises(ValueError):
+            session.apply_edits([TextEdit(0, len(edited) + 1, '')])
+
+
+@pytest.mark.parametrize("first, second, prefix, suffix",
+                         [("", "", 0, 0), ("abc", "abc", 3, 0), ("abcd", "abxd", 2, 1), ("aaa", "aaaa", 3, 0),
+                          ("x" * 10000 + "a" + "y" * 9000, "x" * 10000 + "bc" + "y" * 9000, 10000, 9000)])
+@allure.feature("Session")
+@allure.story("Incremental checking")
+@allure.title("Common prefix and suffix do not overlap")
+def test_common_parts(first, second, prefix, suffix):
+    limit: int = min(len(first), len(second))
+    assert get_common_prefix_length(first, second, limit) == prefix
+    assert get_common_suffix_length(first, second, limit - prefix) == suffix
@@ -0,0 +1,132 @@
+import os
+import random
+import sys
+from typing import List
+
+import allure
+import pytest
+from nltk.tag.perceptron import PerceptronTagger
+from nltk.tokenize.punkt import PunktSentenceTokenizer, PunktTrainer
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.processing.chunker import FiniteStateChunker
+from src.processing.snapshot import Snapshot, write_snapshot
+from src.processing.tagger import ArrayPerceptronTagger, get_default_tagger_backend
+from src.processing.utils.load_utils import build_snapshot, open_snapshot, load_dictionaries, is_complete_snapshot, \
+    DICTIONARIES_PATH
+from src.processing.utils.preprocessing_utils import create_sentence_tokenizer, get_sentence_tokenizer_parameters
+from src.processing.preprocessing import create_chunk_parser
+
+
+@allure.feature("Application")
+@allure.story("Snapshot")
+@allure.title("Snapshot gives the same dictionaries and grammar as the sources")
+def test_snapshot(tmp_path):
+    path: str = str(tmp_path / 'jbtt.snapshot')
+    with allure.step("Build snapshot"):
+        build_snapshot(path)
+    with allure.step("Open snapshot"):
+        snapshot: Snapshot = open_snapshot(path)
+        assert snapshot is not None
+    with allure.step("Content is the same as the sources"):
+        contractions, rules_fix_pos_tagging, uncountable_nouns_list = load_dictionaries()
+        assert snapshot.get('contractions') == contractions
+        assert snapshot.get('rules_fix_pos_tagging') == rules_fix_pos_tagging
+        assert snapshot.get('uncountable_nouns_list') == uncountable_nouns_list
+        chunker: FiniteStateChunker = FiniteStateChunker.from_tables(snapshot.get('chunk_parser'))
+        assert chunker.to_tables() == create_chunk_parser().to_tables()
+
+
+@allure.feature("Application")
+@allure.story("Snapshot")
+@allure.title("Stale snapshot is not used")
+def test_stale_snapshot(tmp_path):
+    path: str = str(tmp_path / 'jbtt.snapshot')
+    build_snapshot(path)
+    with allure.step("Snapshot is stale after a dictionary is changed"):
+        dictionary: str = os.path.join(DICTIONARIES_PATH, 'contractions.json')
+        stat = os.stat(dictionary)
+        try:
+            os.utime(dictionary, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+            assert open_snapshot(path) is None
+        finally:
+            os.utime(dictionary, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    with allure.step("Broken or missing snapshot is not used"):
+        with open(path, 'wb') as f:
+            f.write(b'garbage')
+        assert open_snapshot(path) is None
+        assert open_snapshot(str(tmp_path / 'missing.snapshot')) is None
+
+
+@allure.feature("Application")
+@allure.story("Snapshot")
+@allure.title("Weights of tagger are mapped from snapshot")
+def test_snapshot_tagger(tmp_path):
+    generator = random.Random(2701)
+    with allure.step("Train nltk PerceptronTagger"):
+        perceptron = PerceptronTagger(load=False)
+        random.seed(2701)
+        perceptron.train([[(f"w{generator.randint(0, 50)}", generator.choice(['NN', 'VB', 'DT']))
+                           for _ in range(10)] for _ in range(100)], nr_iter=2)
+        tagger: ArrayPerceptronTagger = ArrayPerceptronTagger.from_perceptron(perceptron)
+    with allure.step("Write and map weights"):
+        path: str = str(tmp_path / 'tagger.snapshot')
+        write_snapshot(path, {}, {'features': tagger.features, 'tagdict': tagger.tagdict, 'classes': tagger.classes},
+                       {'weights': tagger.weights})
+        snapshot: Snapshot = Snapshot(path)
+        mapped: ArrayPerceptronTagger = ArrayPerceptronTagger(snapshot.get('features'), snapshot.get('tagdict'),
+                                                              snapshot.get('classes'), snapshot.get_array('weights'))
+        assert not mapped.weights.flags.writeable
+    with allure.step("Tags are the same"):
+        sentences: List[List[str]] = [[f"w{generator.randint(0, 60)}" for _ in range(8)] for _ in range(200)]
+        assert mapped.tag_sents(sentences) == [perceptron.tag(tokens) for tokens in sentences]
+
+
+@allure.feature("Application")
+@allure.story("Snapshot")
+@allure.title("Punkt model is restored from snapshot")
+def test_snapshot_sentence_tokenizer(tmp_path):
+    with allure.step("Train Punkt model"):
+        trainer = PunktTrainer()
+        trainer.INCLUDE_ALL_COLLOCS = True
+        trainer.train("Mr. Smith met Dr. Brown at St. Paul. They spoke. Mr. Brown left at 5 p.m. today. " * 20)
+        tokenizer = PunktSentenceTokenizer(trainer.get_params())
+        assert tokenizer._params.abbrev_types
+    with allure.step("Write and read parameters"):
+        path: str = str(tmp_path / 'punkt.snapshot')
+        write_snapshot(path, {}, {'sentence_tokenizer': get_sentence_tokenizer_parameters(tokenizer)}, {})
+        restored: PunktSentenceTokenizer = create_sentence_tokenizer(Snapshot(path).get('sentence_tokenizer'))
+    with allure.step("Sentences are the same"):
+        text: str = "Mr. Smith met Dr. Brown. They spoke at St. Paul. Mr. Brown left at 5 p.m. today. He came."
+        assert list(restored.span_tokenize(text)) == list(tokenizer.span_tokenize(text))
+        assert get_sentence_tokenizer_parameters(restored) == get_sentence_tokenizer_parameters(tokenizer)
+
+
+@allure.feature("Application")
+@allure.story("Snapshot")
+@allure.title("Snapshot built without nltk models is not complete")
+def test_complete_snapshot(tmp_path):
+    path: str = str(tmp_path / 'jbtt.snapshot')
+    header: dict = {'sources': {'nltk': ['3.8', 'tokenizers/punkt/english.pickle::1:1']}}
+    write_snapshot(path, header, {}, {})
+    assert is_complete_snapshot(Snapshot(path))
+    header['sources']['nltk'].append('corpora/words/en:missing')
+    write_snapshot(path, header, {}, {})
+    assert not is_complete_snapshot(Snapshot(path))
+
+
+@allure.feature("Application")
+@allure.story("Snapshot")
+@allure.title("Environment variable overrides the default tagger backend")
+def test_default_tagger_backend(monkeypatch):
+    monkeypatch.delenv('JBTT_TAGGER_BACKEND', raising=False)
+    assert get_default_tagger_backend() == 'nltk'
+    assert get_default_tagger_backend('numpy') == 'numpy'
+    monkeypatch.setenv('JBTT_TAGGER_BACKEND', 'nltk')
+    assert get_default_tagger_backend('numpy') == 'nltk'
+    monkeypatch.setenv('JBTT_TAGGER_BACKEND', 'spacy')
+    with pytest.raises(ValueError):
+        get_default_tagger_backend()
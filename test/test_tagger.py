@@ -0,0 +1,94 @@
+import os
+import random
+import sys
+import time
+from typing import List, Tuple
+
+import allure
+import nltk
+import pytest
+from nltk.tag.perceptron import PerceptronTagger
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.processing.tagger import ArrayPerceptronTagger, create_tagger, NltkTagger
+
+TRAINING_TAGS: List[str] = ['DT', 'JJ', 'NN', 'NNS', 'VB', 'VBZ', 'IN', 'RB', 'CD', 'PRP']
+
+
+def has_tagger_model() -> bool:
+    try:
+        nltk.data.find('taggers/averaged_perceptron_tagger')
+    except LookupError:
+        return False
+    return True
+
+
+# timing depends on the machine, so that benchmarks run only on demand: JBTT_BENCHMARK=1 pytest test
+benchmark = pytest.mark.skipif(not os.environ.get('JBTT_BENCHMARK'), reason="set JBTT_BENCHMARK=1 to run benchmarks")
+requires_model = pytest.mark.skipif(not has_tagger_model(), reason="nltk averaged_perceptron_tagger is not downloaded")
+
+
+@allure.feature("POS tagging")
+@allure.story("NumPy tagger")
+@allure.title("Array tagger gives the same tags as trained nltk PerceptronTagger")
+def test_tagger_conformance():
+    generator = random.Random(2701)
+    vocabulary: List[Tuple[str, str]] = [(f"w{index}", generator.choice(TRAINING_TAGS)) for index in range(300)]
+
+    def sentence() -> List[Tuple[str, str]]:
+        # ambiguous tags and capitalized words, so that weights are close and ties occur
+        return [(word.capitalize() if generator.random() < 0.1 else word,
+                 tag if generator.random() < 0.8 else generator.choice(TRAINING_TAGS))
+                for word, tag in (generator.choice(vocabulary) for _ in range(generator.randint(1, 25)))]
+
+    with allure.step("Train nltk PerceptronTagger"):
+        perceptron = PerceptronTagger(load=False)
+        random.seed(2701)
+        perceptron.train([sentence() for _ in range(500)], nr_iter=3)
+        tagger: ArrayPerceptronTagger = ArrayPerceptronTagger.from_perceptron(perceptron)
+    with allure.step("Tag the same sentences by both taggers"):
+        sentences: List[List[str]] = [[word for word, _ in sentence()] for _ in range(2000)]
+        sentences += [['1999', '12', 'well-known', '-', ''], []]
+        assert tagger.tag_sents(sentences) == [perceptron.tag(tokens) for tokens in sentences]
+
+
+@allure.feature("POS tagging")
+@allure.story("NumPy tagger")
+@allure.title("Backend is selected by name")
+def test_create_tagger():
+    assert isinstance(create_tagger('nltk'), NltkTagger)
+    with pytest.raises(ValueError):
+        create_tagger('crf')
+
+
+@allure.feature("POS tagging")
+@allure.story("NumPy tagger")
+@allure.title("Speed of array tagger and nltk.pos_tag_sents")
+@benchmark
+@requires_model
+def test_tagger_benchmark():
+    # treebank tokenizer doesn't need punkt model
+    tokenizer = nltk.TreebankWordTokenizer()
+    sentences: List[List[str]] = [tokenizer.tokenize(sentence) for sentence in [
+        "Call me Ishmael.",
+        "Some years ago, never mind how long precisely, having little or no money in my purse, "
+        "I thought I would sail about a little and see the watery part of the world.",
+        "It is a way I have of driving off the spleen and regulating the circulation.",
+        "There is nothing surprising in this."
+    ] * 500]
+    tagger: ArrayPerceptronTagger = ArrayPerceptronTagger.load()
+    perceptron = PerceptronTagger()
+    with allure.step("Tag by nltk"):
+        start = time.perf_counter()
+        expected = [perceptron.tag(tokens) for tokens in sentences]
+        nltk_time = time.perf_counter() - start
+    with allure.step("Tag by array tagger"):
+        start = time.perf_counter()
+        actual = tagger.tag_sents(sentences)
+        array_time = time.perf_counter() - start
+    allure.attach(body=f"nltk: {nltk_time:.3f}s\nnumpy: {array_time:.3f}s\nspeedup: {nltk_time / array_time:.1f}x",
+                  name='Benchmark', attachment_type=allure.attachment_type.TEXT)
+    assert actual == expected
@@ -1,9 +1,12 @@
+import io
 import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 import allure
+import nltk
 import pytest
 from click.testing import CliRunner
 from gutenberg.acquire import load_etext
@@ -15,10 +18,14 @@ sys.path.append(parent)
 
 from src.applications.app import app
 from src.applications.cli import cli_text
+from src.processing import delta
+from src.processing import run_processing as run_processing_module
+from src.processing.cache import LruSentenceCache, SqliteSentenceCache
+from src.processing.engine import ArticleEngine
 from src.processing.models.dtos import SentenceDto, SuggestionDto
 from src.processing.models.Preloading import Preloading
-from src.processing.run_processing import process_sentence, process_text
-from src.processing.utils.load_utils import download_nltk_modules, load_dictionaries
+from src.processing.run_processing import complete_preloading, process_sentence, process_text, iter_process_text
+from src.processing.utils.load_utils import download_nltk_modules, load_dictionaries, load_preloading, get_fingerprint
 
 
 @pytest.mark.parametrize("sentence, result",
@@ -26,6 +33,9 @@ from src.processing.utils.load_utils import download_nltk_modules, load_dictiona
                              ('It’s beautiful city',
                               [SuggestionDto(start=5, end=19, cause='Indefinite article after It is, There is, etc.',
                                              replacements=['a beautiful city'])]),
+                             ('It’s   beautiful  city',
+                              [SuggestionDto(start=7, end=22, cause='Indefinite article after It is, There is, etc.',
+                                             replacements=['a beautiful city'])]),
                              ('There are two cats', [])
                          ])
 @allure.feature("Grammar")
@@ -211,6 +221,230 @@ def test_server():
                       attachment_type=allure.attachment_type.JSON)
 
 
+@allure.feature("Application")
+@allure.story("API")
+@allure.title("Repeated sentences are taken from memory cache")
+def test_server_memory_cache():
+    with allure.step(f"Run test API client"):
+        client = app.test_client()
+    with allure.step(f"Execute the same POST request twice"):
+        # the sentence is not sent by other tests, so that it is not in cache yet
+        request_text = {"text": "Cat sat on mat. Cat sat on mat."}
+        stats_before = client.get('/api/cacheStats').json
+        first = client.post('/api/processText', json=request_text)
+        stats_between = client.get('/api/cacheStats').json
+        second = client.post('/api/processText', json=request_text)
+        stats_after = client.get('/api/cacheStats').json
+    with allure.step("Repeated sentence is looked up once: a miss for the first request, a hit for the second"):
+        assert second.json == first.json
+        assert stats_between['misses'] == stats_before['misses'] + 1
+        assert stats_between['hits'] == stats_before['hits']
+        assert stats_after['hits'] == stats_between['hits'] + 1
+        assert stats_after['misses'] == stats_between['misses']
+
+
+@allure.feature("Application")
+@allure.story("API")
+@allure.title("Server is ready when models are loaded")
+def test_server_ready():
+    response = app.test_client().get('/ready')
+    assert response.status_code == 200
+    assert response.json['ready'] is True
+    assert response.json['pid'] == os.getpid()
+
+
+@allure.feature("Concurrency")
+@allure.story("API")
+@allure.title("Server gives the same results to many concurrent requests")
+def test_server_concurrent():
+    texts: List[str] = ["It’s beautiful city. He is actor.", "Boy came to me.", "All of students were present.",
+                        "Main part is fantastic.\nIn greatest city in world.", "I like this actor.",
+                        "She is good actor. Ship sank near island."]
+    with allure.step("Results of requests one by one"):
+        client = app.test_client()
+        expected = [client.post('/api/processText', json={"text": text, "withOffsets": True}).json for text in texts]
+    with allure.step("Hammer the server from many threads"):
+        def post(index: int):
+            text: str = texts[index % len(texts)]
+            response = app.test_client().post('/api/processText', json={"text": text, "withOffsets": True})
+            return index, response.status_code, response.json
+
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            answers = list(executor.map(post, range(400)))
+    with allure.step("Every response is the same as one by one"):
+        for index, status_code, result in answers:
+            assert status_code == 200
+            assert result == expected[index % len(texts)]
+
+
+@allure.feature("Application")
+@allure.story("API")
+@allure.title("Batch of documents is streamed as NDJSON")
+def test_server_batch():
+    with allure.step(f"Run test API client"):
+        client = app.test_client()
+    with allure.step(f"Execute POST request with NDJSON"):
+        body: str = '\n'.join([json.dumps({"id": "first", "text": "He is actor."}), '{broken',
+                                json.dumps("Boy came to me.")])
+        response = client.post('/api/processBatch', data=body, content_type='application/x-ndjson')
+    with allure.step("Every document gets its line, broken one gets an error"):
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [line['index'] for line in lines] == [0, 1, 2]
+        assert lines[0]['id'] == 'first'
+        assert lines[0]['sentences'] == client.post('/api/processText', json={"text": "He is actor."}).json
+        assert 'error' in lines[1]
+        assert lines[2]['sentences'][0]['text'] == 'Boy came to me.'
+    with allure.step("Not an array is rejected"):
+        assert client.post('/api/processBatch', json={"text": "He is actor."}).status_code == 400
+
+
+@allure.feature("Application")
+@allure.story("API")
+@allure.title("Text which results the client has is answered with 412 without processing")
+def test_server_etag():
+    with allure.step(f"Run test API client"):
+        client = app.test_client()
+    with allure.step("The first request gets results with entity tag"):
+        request_text = {"text": "He is actor."}
+        first = client.post('/api/processText', json=request_text)
+        etag: str = first.headers['ETag']
+        assert first.status_code == 200 and etag
+    with allure.step("The same text with If-None-Match is not processed again"):
+        second = client.post('/api/processText', json=request_text, headers={'If-None-Match': etag})
+        assert second.status_code == 412
+        assert second.headers['ETag'] == etag
+        assert second.data == b''
+    with allure.step("Another text or format gets new results"):
+        assert client.post('/api/processText', json={"text": "Boy came to me."},
+                           headers={'If-None-Match': etag}).status_code == 200
+        assert client.post('/api/processText', json=dict(request_text, withOffsets=True),
+                           headers={'If-None-Match': etag}).status_code == 200
+
+
+@allure.feature("Application")
+@allure.story("Delta")
+@allure.title("Only sentences unknown to the client are checked and given")
+def test_process_text_delta(init_dictionaries, monkeypatch):
+    engine = ArticleEngine(init_dictionaries)
+    text: str = "It’s beautiful city. He is actor.\nBoy came to me. All of students were present."
+    with allure.step("The first request gets results of all sentences"):
+        first = engine.process_text_delta(text, [])
+        assert [{key: value for key, value in sentence.items() if key != 'hash'} for sentence in first] == \
+            engine.process_text(text, with_offsets=True)
+    with allure.step("After an edit only the changed sentence is checked"):
+        checked: List[List[str]] = []
+        original = delta.process_sentences
+        monkeypatch.setattr(delta, 'process_sentences',
+                            lambda phrases, preloading: checked.append(phrases) or original(phrases, preloading))
+        edited: str = text.replace("He is actor.", "She is good actor.")
+        second = engine.process_text_delta(edited, [sentence['hash'] for sentence in first])
+        assert checked == [["She is good actor."]]
+        assert [sentence['text'] for sentence in second if 'text' in sentence] == ["She is good actor."]
+        assert second[1]['suggestions'][0]['replacements'] == ['a good actor', 'the good actor']
+    with allure.step("Known sentences get their new spans"):
+        assert second[3]['hash'] == first[3]['hash']
+        assert second[3]['start'] == first[3]['start'] + len("She is good actor.") - len("He is actor.")
+        assert edited[second[3]['start']:second[3]['end']] == "Boy came to me."
+
+
+@allure.feature("Application")
+@allure.story("Engine")
+@allure.title("Engine loads dictionaries and models once and reuses them for every call")
+def test_engine_loads_once(init_dictionaries, monkeypatch, tmp_path):
+    engine = ArticleEngine(init_dictionaries, SqliteSentenceCache(str(tmp_path / 'cache.sqlite3')))
+    text: str = "It’s beautiful city. He is actor.\nBoy came to me. All of students were present."
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Resources are loaded again")
+
+    with allure.step("Nothing is loaded by calls of the engine"):
+        for loader in ('load_preloading', 'download_nltk_modules', 'load_contractions', 'load_rules_fix_pos_tagging',
+                       'load_uncountable_nouns_list', 'load_gazetteer', 'load_sentence_tokenizer',
+                       'create_chunk_parser', 'create_tagger', 'create_recognizer'):
+            monkeypatch.setattr(f'src.processing.run_processing.{loader}', fail)
+        answers: List[List[SentenceDto]] = [engine.process_text(text), engine.process_text(text, use_cache=True),
+                                            engine.process_text(text, use_cache=True),
+                                            list(engine.iter_process_text(io.StringIO(text)))]
+        assert engine.process_sentence("He is actor.") == answers[0][1]
+    with allure.step("Every call gives the same results with the same preloading"):
+        assert all(answer == answers[0] for answer in answers)
+        assert engine.preloading is init_dictionaries and init_dictionaries.frozen
+    with allure.step("Persistent cache is opened once and kept"):
+        assert engine.get_cache() is engine.get_cache()
+        assert engine.get_cache().count(init_dictionaries.fingerprint) > 0
+    engine.get_cache().close()
+
+
+@allure.feature("Application")
+@allure.story("Engine")
+@allure.title("Closed engine writes buffered times of use of its cache")
+def test_engine_close(init_dictionaries, tmp_path):
+    path: str = str(tmp_path / 'cache.sqlite3')
+    text: str = "He is actor. Boy came to me."
+    with ArticleEngine(init_dictionaries, SqliteSentenceCache(path)) as engine:
+        engine.process_text(text, use_cache=True)
+        engine.get_cache().connection.execute('UPDATE results SET used = 0')
+        engine.process_text(text, use_cache=True)
+        assert engine.get_cache().touched
+    with allure.step("Times of use are written on close"):
+        assert engine.cache is None
+        with SqliteSentenceCache(path) as cache:
+            assert cache.connection.execute('SELECT MIN(used) FROM results').fetchone()[0] > 0
+
+
+@allure.feature("Session")
+@allure.story("Incremental checking")
+@allure.title("Session gives the same suggestions as checking from scratch")
+def test_document_session(init_dictionaries):
+    engine = ArticleEngine(init_dictionaries)
+    text: str = "It’s beautiful city. He is actor.\nBoy came to me. All of students were present."
+    session = engine.open_session(text)
+    assert session.get_results() == engine.process_text(text, with_offsets=True)
+    with allure.step("Edit the second sentence"):
+        edited: str = text.replace("He is actor.", "She is good actor.")
+        assert session.update(edited) == engine.process_text(edited, with_offsets=True)
+        assert session.recomputed == 1
+
+
+@allure.feature("Application")
+@allure.story("Micro-batching")
+@allure.title("Concurrent texts checked by micro-batches give the same suggestions")
+def test_micro_batching(init_dictionaries):
+    texts: List[str] = ["It’s beautiful city. He is actor.", "Boy came to me.", "All of students were present.",
+                        "Main part is fantastic.\nIn greatest city in world.", "I like this actor."] * 4
+    engine = ArticleEngine(init_dictionaries, memory_cache=LruSentenceCache())
+    expected: List[List[SentenceDto]] = [engine.process_text(text) for text in texts]
+    engine.memory_cache.clear()
+    engine.start_micro_batching(max_batch_size=8, max_wait=0.02)
+    try:
+        with allure.step("Check texts from several threads"):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                answer: List[List[SentenceDto]] = list(executor.map(engine.process_text, texts))
+        with allure.step("Results are the same as one by one"):
+            assert answer == expected
+            assert engine.batcher.stats()['batches'] >= 1
+    finally:
+        engine.stop_micro_batching()
+
+
+@allure.feature("Application")
+@allure.story("Cache")
+@allure.title("Cached results cannot be changed by callers")
+def test_memory_cache_immutable():
+    cache = LruSentenceCache(max_entries=1)
+    cache.put('He is actor.', SentenceDto(text='He is actor.', suggestions=[
+        SuggestionDto(start=6, end=12, cause='Missed article before noun group', replacements=['an actor'])]))
+    with allure.step("Change the result got from cache"):
+        cache.get('He is actor.')['suggestions'].clear()
+    with allure.step("Cache still has the original result, the oldest sentence is evicted"):
+        assert cache.get('He is actor.')['suggestions'][0]['replacements'] == ['an actor']
+        cache.put('Boy came to me.', SentenceDto(text='Boy came to me.', suggestions=[]))
+        assert cache.get('He is actor.') is None
+        assert cache.stats()['evictions'] == 1
+
+
 @allure.feature("Application")
 @allure.story("Cache")
 @allure.title("Number of additional suggestions")
@@ -222,6 +456,154 @@ def test_big_text_quality(load_moby_dick):
                     item['suggestions'] != []]) < 15000, "Too many suggestions for initially right corrected text"
 
 
+@allure.feature("Application")
+@allure.story("Batch")
+@allure.title("Batched tagging gives the same suggestions as sentence by sentence processing")
+def test_batched_tagging(init_dictionaries):
+    text = "It’s beautiful city. He is actor. Let’s look at int array closer.\n\nBoy came to me. All of students " \
+           "were present.\nMain part is fantastic. In greatest city in world. I like this actor."
+    with allure.step(f"Run process_text for {text.split('.')[0] + '...'}"):
+        answer: List[SentenceDto] = process_text(text, preloading=init_dictionaries)
+    with allure.step("Suggestions are the same as for every sentence processed separately"):
+        assert answer == [process_sentence(item['text'] if item['text'] != '\n' else '', init_dictionaries)
+                          for item in answer]
+
+
+@allure.feature("Application")
+@allure.story("Batch")
+@allure.title("Parallel processing keeps suggestions and order of sentences")
+def test_workers(init_dictionaries):
+    text = "It’s beautiful city. He is actor. Let’s look at int array closer.\n\nBoy came to me. All of students " \
+           "were present.\nMain part is fantastic. In greatest city in world. I like this actor."
+    with allure.step("Run process_text in 1 and in 3 processes"):
+        answer: List[SentenceDto] = process_text(text, preloading=init_dictionaries)
+        answer_in_pool: List[SentenceDto] = process_text(text, preloading=init_dictionaries, workers=3)
+    with allure.step("Results are the same"):
+        assert answer_in_pool == answer
+
+
+@allure.feature("Application")
+@allure.story("Batch")
+@allure.title("Workers check sentences with dictionaries of the caller")
+def test_workers_custom_dictionaries(init_dictionaries, tmp_path):
+    text = "He is actor. I like this actor.\nIt’s beautiful city."
+    preloading = Preloading(init_dictionaries.contractions, init_dictionaries.rules_fix_pos_tagging,
+                            init_dictionaries.uncountable_nouns_list + ['actor'], True)
+    with allure.step("Run process_text with custom dictionaries in 1 and in 2 processes"):
+        answer: List[SentenceDto] = process_text(text, preloading=preloading)
+        with SqliteSentenceCache(str(tmp_path / 'cache.sqlite3')) as cache:
+            answer_in_pool: List[SentenceDto] = process_text(text, True, preloading, workers=2, cache=cache)
+            cached: List[SentenceDto] = process_text(text, True, preloading, cache=cache)
+    with allure.step("Results are the ones of custom dictionaries, also in cache"):
+        assert answer != process_text(text, preloading=init_dictionaries)
+        assert answer_in_pool == answer
+        assert cached == answer
+    with allure.step("Worker with other dictionaries refuses to start"):
+        with pytest.raises(RuntimeError):
+            run_processing_module.init_worker(preloading.ne_backend, preloading.tagger_backend,
+                                              preloading.contractions, preloading.rules_fix_pos_tagging,
+                                              init_dictionaries.uncountable_nouns_list, preloading.gazetteer,
+                                              preloading.fingerprint)
+
+
+@allure.feature("Application")
+@allure.story("Offsets")
+@allure.title("Sentences and suggestions carry their positions in the text")
+def test_offsets(init_dictionaries):
+    text = "It’s beautiful city.  He is actor.\n\n  Boy came to me. All of students were present.\n" \
+           "Main part is fantastic.   In greatest city in world."
+    with allure.step("Run process_text with and without offsets"):
+        answer: List[SentenceDto] = process_text(text, preloading=init_dictionaries, with_offsets=True)
+        plain: List[SentenceDto] = process_text(text, preloading=init_dictionaries)
+    with allure.step("Offsets point to sentences and noun groups in the text"):
+        for item in answer:
+            assert text[item['start']:item['end']] == item['text']
+            for suggestion in item['suggestions']:
+                assert text[suggestion['documentStart']:suggestion['documentEnd']] == \
+                       item['text'][suggestion['start']:suggestion['end']]
+        # Punkt keeps leading spaces of a line in its first sentence, the same as sent_tokenize() does
+        assert [item['paragraph'] for item in answer if item['text'].strip() == 'Boy came to me.'] == [2]
+    with allure.step("Results are the same apart from offsets"):
+        assert [{'text': item['text'], 'suggestions': [
+            {key: value for key, value in suggestion.items() if not key.startswith('document')}
+            for suggestion in item['suggestions']]} for item in answer] == plain
+    with allure.step("Streamed text gives the same offsets"):
+        assert list(iter_process_text(io.StringIO(text), preloading=init_dictionaries, batch_size=2,
+                                      with_offsets=True)) == answer
+    with allure.step("Blank lines give separators pointing to their line breaks"):
+        blank: str = "Boy came.\n   \n\t\nHe is actor.\n"
+        separated: List[SentenceDto] = process_text(blank, preloading=init_dictionaries, with_offsets=True)
+        assert all(blank[item['start']:item['end']] == item['text'] for item in separated)
+        assert [item['text'] for item in separated] == ['Boy came.', '\n', '\n', '\n', 'He is actor.', '\n']
+
+
+@allure.feature("Application")
+@allure.story("Streaming")
+@allure.title("Streamed text gives the same suggestions as the whole one")
+def test_iter_process_text(init_dictionaries):
+    text = "It’s beautiful city. He is actor. Let’s look at int array closer.\n\nBoy came to me. All of students " \
+           "were present.\nMain part is fantastic. In greatest city in world. I like this actor.\n"
+    with allure.step("Run iter_process_text with small batches"):
+        answer: List[SentenceDto] = list(iter_process_text(io.StringIO(text), preloading=init_dictionaries,
+                                                           batch_size=2))
+    with allure.step("Results are the same as for process_text"):
+        assert answer == process_text(text, preloading=init_dictionaries)
+
+
+@allure.feature("Application")
+@allure.story("Named Entities")
+@allure.title("Named Entities are recognized only for sentences with noun groups to check")
+def test_lazy_named_entities(init_dictionaries, monkeypatch):
+    calls: List[int] = []
+    ne_chunk = nltk.ne_chunk
+
+    def counting_ne_chunk(tags, binary=False):
+        calls.append(len(tags))
+        return ne_chunk(tags, binary=binary)
+
+    monkeypatch.setattr(nltk, 'ne_chunk', counting_ne_chunk)
+    with allure.step("Sentence without nouns is not classified"):
+        assert process_sentence('He went away quickly.', init_dictionaries) == \
+               {'text': 'He went away quickly.', 'suggestions': []}
+        assert calls == []
+    with allure.step("Sentence with a noun group is classified once"):
+        text: SentenceDto = run_processing(init_dictionaries, 'Boy came to me')
+        assert [suggestion['replacements'] for suggestion in text['suggestions']] == [['a boy', 'the boy']]
+        assert calls == [4]
+
+
+@allure.feature("Application")
+@allure.story("Cache")
+@allure.title("Results are taken from persistent cache")
+def test_persistent_cache(init_dictionaries, tmp_path):
+    text = "It’s beautiful city. He is actor.\n\nHe is actor."
+    with allure.step("Run process_text twice with the same cache"):
+        with SqliteSentenceCache(str(tmp_path / 'sentences.sqlite3')) as cache:
+            first: List[SentenceDto] = process_text(text, True, init_dictionaries, cache=cache)
+            cached_sentences = len(cache)
+            second: List[SentenceDto] = process_text(text, True, init_dictionaries, cache=cache)
+    with allure.step("Every unique sentence is cached once, results are the same as without cache"):
+        assert cached_sentences == 3
+        assert first == second == process_text(text, preloading=init_dictionaries)
+
+
+@allure.feature("Application")
+@allure.story("Cache")
+@allure.title("Change of dictionaries invalidates cache")
+def test_cache_invalidation(init_dictionaries, tmp_path):
+    text = "Time is money."
+    changed = Preloading(init_dictionaries.contractions, init_dictionaries.rules_fix_pos_tagging,
+                         [noun for noun in init_dictionaries.uncountable_nouns_list if noun != 'Time'], True)
+    with allure.step("Fingerprint depends on dictionaries"):
+        assert get_fingerprint(changed) != get_fingerprint(init_dictionaries)
+    with allure.step("Results cached with the previous dictionaries are not used"):
+        with SqliteSentenceCache(str(tmp_path / 'sentences.sqlite3')) as cache:
+            process_text(text, True, init_dictionaries, cache=cache)
+            answer: List[SentenceDto] = process_text(text, True, changed, cache=cache)
+            assert len(cache) == 2
+        assert answer == process_text(text, preloading=changed)
+
+
 @pytest.mark.timeout(5)
 #Fails if run out of timeout
 @allure.feature("Application")
@@ -266,10 +648,10 @@ def load_moby_dick():
         else:
             with open(filepath, "r", encoding="utf-8") as f:
                 text = f.read()
-    with allure.step("Cache exists"):
-        hashes_json = os.path.join(os.path.dirname(__file__), "../../resources/dictionaries/hashes.json")
-        if os.path.exists(hashes_json):
-            return text
-        else:
-            process_text(text, True)
-            return text
+    with allure.step("Cache of the current dictionaries and models exists"):
+        preloading: Preloading = load_preloading()
+        complete_preloading(preloading)
+        with SqliteSentenceCache() as cache:
+            if cache.count(preloading.fingerprint) == 0:
+                process_text(text, True, preloading, cache=cache)
+        return text